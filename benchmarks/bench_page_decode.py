@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+"""
+Memory benchmark of the Zoho records page decoding.
+
+Synthetic response bodies of 200 records are generated for a wide module,
+each record carrying Zoho's ``$`` metadata keys besides its fields. The
+streaming path decodes every page with ``decode_records_page`` from 64 KiB
+chunks, keeping only the mapped fields, and drops the page once it is
+processed, like the importers do. The previous path, ``response.json()`` on
+every page and all records kept in one list, is measured with ``--legacy``.
+Peak memory is traced with ``tracemalloc``.
+
+Usage::
+
+    python benchmarks/bench_page_decode.py [--sizes 2000,10000]
+                                           [--fields 300] [--mapped 40] [--legacy]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import time
+import tracemalloc
+
+PER_PAGE = 200
+ZOHO_KEYS = ('$approval', '$currency_symbol', '$state', '$process_flow', '$editable', '$review')
+
+
+def load_json_stream():
+    """Load the decoder without importing Odoo through the addon package."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'cr_odoo_zoho_integration',
+                        'tools', 'json_stream.py')
+    spec = importlib.util.spec_from_file_location('json_stream', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeResponse:
+    """Stand-in for a streamed ``requests.Response``."""
+
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def synthetic_body(page, record_count, fields):
+    first = (page - 1) * PER_PAGE
+    last = min(first + PER_PAGE, record_count)
+    records = []
+    for index in range(first, last):
+        record = {'id': str(4000000000000000000 + index)}
+        for key in ZOHO_KEYS:
+            record[key] = {'delegate': False, 'approve': False, 'reject': False}
+        for field in fields:
+            record[field] = f'{field} value of record {index}'
+        records.append(record)
+    info = {'per_page': PER_PAGE, 'count': len(records), 'page': page,
+            'more_records': last < record_count}
+    return json.dumps({'data': records, 'info': info}).encode()
+
+
+def iter_responses(record_count, fields):
+    page = 1
+    while (page - 1) * PER_PAGE < record_count:
+        yield FakeResponse(synthetic_body(page, record_count, fields))
+        page += 1
+
+
+def run_streaming(json_stream, record_count, fields, mapped):
+    processed = 0
+    for response in iter_responses(record_count, fields):
+        records, _info = json_stream.decode_records_page(
+            response.iter_content(json_stream.READ_CHUNK_SIZE), mapped)
+        processed += len(records)
+    return processed
+
+
+def run_legacy(record_count, fields):
+    combined = []
+    for response in iter_responses(record_count, fields):
+        combined.extend(response.json().get('data', []))
+    return len(combined)
+
+
+def measure(label, size, function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    processed = function(*args)
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<9} records={size:>6} processed={processed:>6} "
+          f"peak={peak / 1024 / 1024:9.1f} MiB time={elapsed:7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='2000,10000')
+    parser.add_argument('--fields', type=int, default=300, help="fields of the module")
+    parser.add_argument('--mapped', type=int, default=40, help="fields kept by the mapping")
+    parser.add_argument('--legacy', action='store_true',
+                        help="also measure response.json() with every record kept")
+    args = parser.parse_args()
+
+    json_stream = load_json_stream()
+    fields = [f'Field_{index}' for index in range(args.fields)]
+    mapped = fields[:args.mapped]
+    for size in (int(s) for s in args.sizes.split(',')):
+        measure('streaming', size, run_streaming, json_stream, size, fields, mapped)
+        if args.legacy:
+            measure('legacy', size, run_legacy, size, fields)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+"""
+Benchmark of the field-batch merge used by the Zoho module importers.
+
+Synthetic pages of 200 records are generated for every field batch, exactly
+as ``_iter_merged_pages`` receives them, and folded with ``ZohoRecordMerger``
+in streaming mode. The previous list scan merge can be measured as well with
+``--legacy``; it is quadratic, so only use it with the smallest size.
+
+Usage::
+
+    python benchmarks/bench_record_merge.py [--sizes 10000,100000,500000]
+                                            [--fields 150] [--legacy]
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+PER_PAGE = 200
+BATCH_SIZE = 50
+
+
+def load_merger():
+    """Load the merger without importing Odoo through the addon package."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'cr_odoo_zoho_integration',
+                        'tools', 'record_merge.py')
+    spec = importlib.util.spec_from_file_location('record_merge', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ZohoRecordMerger
+
+
+def synthetic_page(page, record_count, fields_batch):
+    first = (page - 1) * PER_PAGE
+    last = min(first + PER_PAGE, record_count)
+    records = []
+    for index in range(first, last):
+        record = {'id': str(4000000000000000000 + index)}
+        for field in fields_batch:
+            record[field] = f'{field}-{index}'
+        records.append(record)
+    return records, last < record_count
+
+
+def field_batches(field_count):
+    fields = [f'Field_{index}' for index in range(field_count)]
+    return [fields[i:i + BATCH_SIZE] for i in range(0, len(fields), BATCH_SIZE)]
+
+
+def run_streaming(merger_cls, record_count, batches):
+    merger = merger_cls(batch_count=len(batches))
+    merged = 0
+    page = 1
+    while True:
+        more_records = False
+        for fields_batch in batches:
+            records, more = synthetic_page(page, record_count, fields_batch)
+            merger.add(records)
+            more_records = more_records or more
+        merged += sum(1 for _record in merger.pop_complete())
+        if not more_records:
+            break
+        page += 1
+    merged += sum(1 for _record in merger.drain())
+    return merged
+
+
+def run_legacy(record_count, batches):
+    combined = []
+    for fields_batch in batches:
+        page = 1
+        while True:
+            records, more = synthetic_page(page, record_count, fields_batch)
+            for record in records:
+                existing = next((r for r in combined if r.get('id') == record.get('id')), None)
+                if existing:
+                    existing.update(record)
+                else:
+                    combined.append(record)
+            if not more:
+                break
+            page += 1
+    return len(combined)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000,500000')
+    parser.add_argument('--fields', type=int, default=150)
+    parser.add_argument('--legacy', action='store_true',
+                        help="also time the previous list scan merge")
+    args = parser.parse_args()
+
+    merger_cls = load_merger()
+    batches = field_batches(args.fields)
+    for size in (int(s) for s in args.sizes.split(',')):
+        start = time.perf_counter()
+        merged = run_streaming(merger_cls, size, batches)
+        elapsed = time.perf_counter() - start
+        print(f"merge   records={size:>7} batches={len(batches)} merged={merged:>7} "
+              f"time={elapsed:8.2f}s rate={merged / elapsed:10.0f} rec/s")
+        if args.legacy:
+            start = time.perf_counter()
+            merged = run_legacy(size, batches)
+            elapsed = time.perf_counter() - start
+            print(f"legacy  records={size:>7} batches={len(batches)} merged={merged:>7} "
+                  f"time={elapsed:8.2f}s rate={merged / elapsed:10.0f} rec/s")
+
+
+if __name__ == '__main__':
+    main()
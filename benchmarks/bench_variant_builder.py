@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+"""
+Benchmark of the product variant builder on a project of 2,000 units.
+
+Generated Zoho products of one project are written by the products writer of
+the addon, which resolves the attribute values of the project at once and
+writes the attribute line of the template once. With ``--legacy`` the same
+units are written the way the former importer did it, one product at a time:
+a template, attribute and value lookup per unit and an attribute line write,
+regenerating the variants, per unit. Wall time and SQL query count are
+reported; ``--runs 2`` also measures a resync of unchanged units.
+
+The benchmark commits its products: run it on a disposable database with the
+addon installed. Odoo must be importable, e.g. from its source tree::
+
+    PYTHONPATH=/path/to/odoo python benchmarks/bench_variant_builder.py -c odoo.conf -d zoho_bench
+        [--units 2000] [--runs 2] [--legacy]
+"""
+import argparse
+import time
+
+
+def make_pages(project_name, units, per_page=200):
+    """Zoho product records of one project, as merged pages."""
+    records = [{
+        'id': str(5000000000 + index),
+        'Product_Name': f'Unit {index:05d}',
+        'Product_Code': f'U-{index:05d}',
+        'Unit_Price': 250000.0 + index,
+        'Description': f'Unit {index} of {project_name}',
+        'Project_Name': {'id': '4000000001', 'name': project_name},
+    } for index in range(units)]
+    return [records[start:start + per_page] for start in range(0, len(records), per_page)]
+
+
+def write_legacy(env, pages):
+    """One product at a time, as the commented-out importer did."""
+    for page_records in pages:
+        for product in page_records:
+            project_name = product['Project_Name']['name']
+            template = env['product.template'].search([('name', '=', project_name)], limit=1)
+            if not template:
+                template = env['product.template'].create({'name': project_name})
+            attribute = env['product.attribute'].search([('name', '=', project_name)], limit=1)
+            if not attribute:
+                attribute = env['product.attribute'].create({'name': project_name})
+            value = env['product.attribute.value'].search([
+                ('name', '=', product['Product_Name']), ('attribute_id', '=', attribute.id)], limit=1)
+            if not value:
+                value = env['product.attribute.value'].create({
+                    'name': product['Product_Name'], 'attribute_id': attribute.id})
+            line = template.attribute_line_ids.filtered(lambda l: l.attribute_id == attribute)
+            if not line:
+                env['product.template.attribute.line'].create({
+                    'product_tmpl_id': template.id, 'attribute_id': attribute.id, 'value_ids': [(4, value.id)]})
+            else:
+                line.write({'value_ids': [(4, value.id)]})
+    env.cr.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-c', '--config', help="Odoo configuration file")
+    parser.add_argument('-d', '--database', required=True)
+    parser.add_argument('--units', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--legacy', action='store_true', help="write the units one at a time")
+    args = parser.parse_args()
+
+    import odoo
+    from odoo import api, SUPERUSER_ID
+
+    odoo.tools.config.parse_config(['-c', args.config] if args.config else [])
+    from odoo.addons.cr_odoo_zoho_integration.models.cr_field_mapping import DEFAULT_ZOHO_MAPPINGS
+    from odoo.addons.cr_odoo_zoho_integration.models.cr_sync_engine import ZOHO_SYNC_MODULES
+    from odoo.addons.cr_odoo_zoho_integration.tools.field_mapping import CompiledMapping
+    from odoo.addons.cr_odoo_zoho_integration.tools.sync_metrics import SyncMetrics
+
+    spec = ZOHO_SYNC_MODULES['products']
+    mapping = CompiledMapping(DEFAULT_ZOHO_MAPPINGS['Products'][1], spec['extra_fields'])
+    project_name = f"Bench Project {int(time.time())}"
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        config = env['zoho.config'].create({
+            'cr_name': 'Zoho Variant Benchmark',
+            'cr_client_id': 'bench',
+            'cr_client_secret': 'bench',
+            'cr_redirect_uri': 'http://localhost/zoho/auth',
+        })
+        cr.commit()
+        try:
+            for run in range(1, args.runs + 1):
+                pages = make_pages(project_name, args.units)
+                metrics = SyncMetrics()
+                queries = cr.sql_log_count
+                start = time.perf_counter()
+                if args.legacy:
+                    write_legacy(env, pages)
+                else:
+                    config.with_context(zoho_sync_metrics=metrics)._write_zoho_products(
+                        spec, iter(pages), mapping, {})
+                elapsed = time.perf_counter() - start
+                values = metrics.snapshot()
+                variants = env['product.template'].search([('name', '=', project_name)]).product_variant_count
+                print(f"run={run} {'legacy' if args.legacy else 'bulk':<6} units={args.units} "
+                      f"time={elapsed:8.2f}s queries={cr.sql_log_count - queries:>7} variants={variants} "
+                      f"created={values['records_created']} updated={values['records_updated']} "
+                      f"unchanged={values['records_unchanged']}")
+        finally:
+            config.unlink()
+            cr.commit()
+
+
+if __name__ == '__main__':
+    main()
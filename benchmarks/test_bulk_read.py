@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+"""
+Tests of the Bulk Read client against the local Zoho stub.
+
+The addon tools are loaded without importing Odoo through the addon package,
+so the tests run with the standard library and ``requests`` only::
+
+    python -m unittest benchmarks/test_bulk_read.py
+"""
+import importlib.util
+import os
+import sys
+import unittest
+
+ADDON_PATH = os.path.join(os.path.dirname(__file__), '..', 'cr_odoo_zoho_integration')
+
+
+def load_module(name, path, package=None):
+    spec = importlib.util.spec_from_file_location(name, path, submodule_search_locations=package)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_tools():
+    """Load the addon tools as a standalone ``zoho_tools`` package."""
+    tools_path = os.path.join(ADDON_PATH, 'tools')
+    load_module('zoho_tools', os.path.join(tools_path, '__init__.py'), package=[tools_path])
+    return (load_module('zoho_tools.zoho_client', os.path.join(tools_path, 'zoho_client.py')),
+            load_module('zoho_tools.bulk_read', os.path.join(tools_path, 'bulk_read.py')))
+
+
+zoho_client, bulk_read = load_tools()
+zoho_stub_server = load_module('zoho_stub_server', os.path.join(os.path.dirname(__file__), 'zoho_stub_server.py'))
+
+
+class TestBulkRead(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = zoho_stub_server.StubSettings(records={'Products': 25}, bulk_page_size=10, bulk_polls=2)
+        self.server, self.base_url = zoho_stub_server.start_in_thread(self.settings)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        rate_limiter = sys.modules['zoho_tools.rate_limit'].ZohoRateLimiter(requests_per_minute=60000, burst=10)
+        self.client = zoho_client.ZohoClient(rate_limiter=rate_limiter)
+        self.client.access_token = 'stub-token'
+        self.addCleanup(self.client.close)
+
+    def bulk_read(self, **kwargs):
+        return bulk_read.ZohoBulkRead(self.client, api_domain=self.base_url, poll_interval=0, **kwargs)
+
+    def test_iter_records(self):
+        fields = ['Product_Name', 'Unit_Price', 'Project_Name']
+        records = list(self.bulk_read().iter_records('Products', fields))
+
+        # 25 records exported by three jobs of 10, each polled until completed
+        self.assertEqual(len(records), 25)
+        self.assertEqual(self.settings.counters['bulk_jobs'], 3)
+        self.assertTrue(all(job['polls'] == 3 for job in self.settings.bulk_jobs.values()))
+        self.assertEqual([record['id'] for record in records],
+                         [str(4000000000000000000 + index) for index in range(25)])
+        self.assertEqual(set(records[0]), {'id'} | set(fields))
+        self.assertEqual(records[3]['Product_Name'], 'Product_Name 3')
+        self.assertEqual(float(records[3]['Unit_Price']), 104.5)
+        # Lookups are exported as ids only: syncs reading their name cannot use Bulk Read
+        self.assertEqual(records[3]['Project_Name'], str(5000000000000003))
+
+    def test_job_timeout(self):
+        reader = self.bulk_read(timeout=0)
+        job_id = reader.create_job('Products', ['Product_Name'])
+        with self.assertRaises(bulk_read.ZohoBulkReadError):
+            reader.wait_for_job(job_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,477 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+"""
+Local stub of the Zoho CRM, Books and OAuth endpoints used by the addon.
+
+Point the API Domain and Accounts URL of a Zoho configuration to the stub to
+run syncs without a live account. The stub serves:
+
+* ``POST /oauth/v2/token``: any grant returns a one-hour access token
+* ``GET /crm/v7/settings/fields?module=...``: the module layout, with ETag
+* ``GET /crm/v7/<module>``: records by page number up to 2,000 records, and by
+  ``page_token`` beyond, with only the requested fields
+* ``GET /books/v3/organizations``: the Zoho Books organizations
+* ``POST /crm/bulk/v7/read``: a Bulk Read job, reported in progress for the
+  first status checks of ``GET /crm/bulk/v7/read/<job id>``, then completed
+  with a download URL serving the zipped CSV export of the requested page;
+  like Zoho, the export gives the id of lookup fields, not their name
+
+Records are generated deterministically, so two runs see the same data. Every
+response can be delayed, and a share of the API calls can be answered with
+429 to exercise the rate limiter.
+
+Usage::
+
+    python benchmarks/zoho_stub_server.py [--port 8089] [--latency 50]
+                                          [--records Contacts=5000,Products=2000]
+                                          [--fields 100] [--throttle 0.05]
+"""
+import argparse
+import base64
+import csv
+import hashlib
+import io
+import itertools
+import json
+import random
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_PER_PAGE = 200
+MAX_PAGE_NUMBER_RECORDS = 2000
+BULK_READ_PAGE_SIZE = 200000
+DEFAULT_RECORDS = {
+    'Contacts': 5000,
+    'Products': 2000,
+    'Property_Project': 500,
+    'Deals': 1000,
+    'Accounts': 1000,
+}
+
+# Fields the addon maps or needs, per module: {api name: data type}
+MODULE_FIELDS = {
+    'Contacts': {
+        'Full_Name': 'text', 'Email': 'email', 'Phone': 'phone', 'Mobile': 'phone',
+        'Title': 'text', 'Mailing_Street': 'text', 'Mailing_City': 'text', 'Mailing_Zip': 'text',
+        'Description': 'textarea',
+    },
+    'Products': {
+        'Product_Name': 'text', 'Product_Code': 'text', 'Unit_Price': 'currency',
+        'Description': 'textarea', 'Project_Name': 'lookup',
+    },
+    'Property_Project': {
+        'Name': 'text', 'Building': 'text', 'Anticipated_Start_Date': 'date',
+        'Anticipated_Completion_Date': 'date', 'Organisation_ID': 'text', 'Description_of_Land': 'textarea',
+    },
+    'Deals': {'Deal_Name': 'text', 'Amount': 'currency', 'Stage': 'picklist', 'Closing_Date': 'date'},
+    'Accounts': {'Account_Name': 'text', 'Phone': 'phone', 'Website': 'website'},
+}
+
+
+class StubSettings:
+    """Behaviour of the stub, shared by all request handler threads."""
+
+    def __init__(self, records=None, custom_fields=0, latency=0.0, throttle=0.0, retry_after=1,
+                 organizations=5, credits=100000, seed=0, bulk_page_size=BULK_READ_PAGE_SIZE, bulk_polls=1):
+        """
+        :param records: Number of records per module
+        :param custom_fields: Number of extra text fields added to every module layout
+        :param latency: Seconds every response is delayed by
+        :param throttle: Share of the CRM and Books calls answered with 429
+        :param retry_after: ``Retry-After`` seconds sent with a 429
+        :param organizations: Number of Zoho Books organizations
+        :param credits: Daily API credits announced in the rate limit headers
+        :param seed: Seed of the 429 injection
+        :param bulk_page_size: Number of records per Bulk Read job
+        :param bulk_polls: Number of status checks a Bulk Read job stays in progress for
+        """
+        self.records = dict(DEFAULT_RECORDS, **(records or {}))
+        self.custom_fields = custom_fields
+        self.latency = latency
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.organizations = organizations
+        self.credits = credits
+        self.credits_used = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'throttled': 0, 'tokens': 0, 'bulk_jobs': 0}
+        self.bulk_page_size = bulk_page_size
+        self.bulk_polls = bulk_polls
+        self.bulk_jobs = {}
+        self.bulk_job_ids = itertools.count(6000000000000000)
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def should_throttle(self):
+        with self.lock:
+            return self.throttle and self.random.random() < self.throttle
+
+    def spend_credit(self):
+        with self.lock:
+            self.credits_used += 1
+            return max(0, self.credits - self.credits_used)
+
+    def add_bulk_job(self, query):
+        """Register a Bulk Read job and return its id."""
+        with self.lock:
+            self.counters['bulk_jobs'] += 1
+            job_id = str(next(self.bulk_job_ids))
+            self.bulk_jobs[job_id] = dict(query, polls=0)
+            return job_id
+
+    def poll_bulk_job(self, job_id):
+        """Return a Bulk Read job, counting one more status check, or None when unknown."""
+        with self.lock:
+            job = self.bulk_jobs.get(job_id)
+            if job is not None:
+                job['polls'] += 1
+            return job
+
+    def module_fields(self, module):
+        module_fields = dict(MODULE_FIELDS.get(module, {'Name': 'text'}))
+        for index in range(self.custom_fields):
+            module_fields[f'Custom_Field_{index}'] = 'text'
+        return module_fields
+
+
+def organization_id(index):
+    return str(70000000 + index)
+
+
+def field_value(module, index, api_name, data_type, settings):
+    """Deterministic value of a field of the record ``index`` of a module."""
+    if api_name == 'Email':
+        return f'{module.lower()}.{index}@example.com'
+    if api_name == 'Organisation_ID':
+        return organization_id(index % max(settings.organizations, 1))
+    if data_type in ('currency', 'double'):
+        return round(100 + index * 1.5, 2)
+    if data_type == 'date':
+        return f'2025-{index % 12 + 1:02d}-{index % 28 + 1:02d}'
+    if data_type == 'lookup':
+        return {'id': str(5000000000000000 + index % 50), 'name': f'Project {index % 50}'}
+    return f'{api_name} {index}'
+
+
+def bulk_read_archive(module, index_range, requested, settings):
+    """Zipped CSV export of records, as served by a completed Bulk Read job."""
+    module_fields = settings.module_fields(module)
+    columns = ['Id'] + [api_name for api_name in requested if api_name in module_fields and api_name != 'id']
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    for index in index_range:
+        row = [str(4000000000000000000 + index)]
+        for api_name in columns[1:]:
+            value = field_value(module, index, api_name, module_fields[api_name], settings)
+            # Lookups are exported as the id of the record they point to
+            row.append(value['id'] if isinstance(value, dict) else value)
+        writer.writerow(row)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(f'{module}.csv', text.getvalue())
+    return archive.getvalue()
+
+
+def build_record(module, index, requested, settings):
+    module_fields = settings.module_fields(module)
+    record = {'id': str(4000000000000000000 + index)}
+    for api_name in requested:
+        if api_name in module_fields:
+            record[api_name] = field_value(module, index, api_name, module_fields[api_name], settings)
+    # Zoho adds its own keys to every record
+    record['$approval'] = {'delegate': False, 'approve': False, 'reject': False, 'resubmit': False}
+    record['$editable'] = True
+    return record
+
+
+def encode_page_token(module, offset):
+    return base64.urlsafe_b64encode(f'{module}:{offset}'.encode()).decode()
+
+
+def decode_page_token(token):
+    module, offset = base64.urlsafe_b64decode(token.encode()).decode().rsplit(':', 1)
+    return module, int(offset)
+
+
+class ZohoStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ZohoStub/1.0'
+
+    @property
+    def settings(self):
+        return self.server.settings
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def send_bytes(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def check_api_call(self):
+        """
+        Authenticate, throttle and charge an API call.
+        :return: Rate limit headers of the response, or None when an error was sent
+        """
+        settings = self.settings
+        if not self.headers.get('Authorization', '').startswith('Zoho-oauthtoken '):
+            self.send_json(401, {'code': 'AUTHENTICATION_FAILURE'})
+            return None
+        if settings.should_throttle():
+            settings.count('throttled')
+            self.send_json(429, {'code': 'TOO_MANY_REQUESTS'}, {
+                'Retry-After': str(settings.retry_after),
+            })
+            return None
+        remaining = settings.spend_credit()
+        return {
+            'X-RATELIMIT-LIMIT': str(settings.credits),
+            'X-RATELIMIT-REMAINING': str(remaining),
+        }
+
+    def do_POST(self):
+        self.settings.count('requests')
+        body = self.read_body()
+        time.sleep(self.settings.latency)
+        path = urlparse(self.path).path.rstrip('/')
+        if path == '/oauth/v2/token':
+            self.settings.count('tokens')
+            return self.send_json(200, {
+                'access_token': f'stub-token-{self.settings.counters["tokens"]}',
+                'refresh_token': 'stub-refresh-token',
+                'expires_in': 3600,
+                'token_type': 'Bearer',
+            })
+        headers = self.check_api_call()
+        if headers is None:
+            return
+        if path == '/crm/bulk/v7/read':
+            return self.create_bulk_job(body, headers)
+        self.send_json(404, {'code': 'INVALID_URL_PATTERN'})
+
+    def do_GET(self):
+        settings = self.settings
+        settings.count('requests')
+        time.sleep(settings.latency)
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        headers = self.check_api_call()
+        if headers is None:
+            return
+        path = url.path.rstrip('/')
+        if path.startswith('/crm/bulk/v7/read/'):
+            job_id, _sep, result = path[len('/crm/bulk/v7/read/'):].partition('/')
+            if result == 'result':
+                return self.get_bulk_result(job_id, headers)
+            return self.get_bulk_job(job_id, headers)
+        if path == '/crm/v7/settings/fields':
+            return self.get_fields(params, headers)
+        if path == '/books/v3/organizations':
+            return self.send_json(200, {
+                'code': 0,
+                'message': 'success',
+                'organizations': [{
+                    'organization_id': organization_id(index),
+                    'name': f'Organization {index}',
+                    'contact_name': f'Contact of Organization {index}',
+                    'email': f'org.{index}@example.com',
+                    'phone': f'+1 555 01{index:02d}',
+                } for index in range(settings.organizations)],
+            }, headers)
+        if path.startswith('/crm/v7/'):
+            return self.get_records(path[len('/crm/v7/'):], params, headers)
+        self.send_json(404, {'code': 'INVALID_URL_PATTERN'})
+
+    def get_fields(self, params, headers):
+        module = params.get('module')
+        if module not in self.settings.records:
+            return self.send_json(400, {'code': 'INVALID_MODULE'})
+        definitions = [{
+            'api_name': api_name,
+            'field_label': api_name.replace('_', ' '),
+            'data_type': data_type,
+            'read_only': False,
+        } for api_name, data_type in self.settings.module_fields(module).items()]
+        etag = hashlib.sha1(json.dumps(definitions).encode()).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_json(304, None, dict(headers, ETag=etag))
+        self.send_json(200, {'fields': definitions}, dict(headers, ETag=etag))
+
+    def get_records(self, module, params, headers):
+        total = self.settings.records.get(module)
+        if total is None:
+            return self.send_json(400, {'code': 'INVALID_MODULE'})
+        requested = [name for name in params.get('fields', '').split(',') if name]
+        if not requested or len(requested) > 50:
+            return self.send_json(400, {'code': 'REQUIRED_PARAM_MISSING' if not requested else 'LIMIT_EXCEEDED'})
+        per_page = min(int(params.get('per_page', MAX_PER_PAGE)), MAX_PER_PAGE)
+        if params.get('page_token'):
+            token_module, offset = decode_page_token(params['page_token'])
+            if token_module != module:
+                return self.send_json(400, {'code': 'INVALID_DATA', 'details': {'param': 'page_token'}})
+        else:
+            page = int(params.get('page', 1))
+            offset = (page - 1) * per_page
+            if offset + per_page > MAX_PAGE_NUMBER_RECORDS and offset > 0:
+                # Zoho only serves the first 2,000 records by page number
+                return self.send_json(400, {'code': 'LIMIT_REACHED',
+                                            'message': 'use page_token to fetch more than 2000 records'})
+        end = min(offset + per_page, total)
+        if offset >= end:
+            return self.send_json(204, None, headers)
+        more_records = end < total
+        self.send_json(200, {
+            'data': [build_record(module, index, requested, self.settings) for index in range(offset, end)],
+            'info': {
+                'per_page': per_page,
+                'count': end - offset,
+                'page': offset // per_page + 1,
+                'more_records': more_records,
+                'next_page_token': encode_page_token(module, end) if more_records else None,
+            },
+        }, headers)
+
+
+    def create_bulk_job(self, body, headers):
+        try:
+            query = json.loads(body)['query']
+            module = query['module']['api_name']
+        except (ValueError, KeyError, TypeError):
+            return self.send_json(400, {'code': 'INVALID_DATA'})
+        if module not in self.settings.records:
+            return self.send_json(400, {'code': 'INVALID_MODULE'})
+        job_id = self.settings.add_bulk_job({
+            'module': module,
+            'fields': list(query.get('fields') or self.settings.module_fields(module)),
+            'page': int(query.get('page', 1)),
+        })
+        self.send_json(201, {'data': [{
+            'status': 'success',
+            'code': 'ADDED_SUCCESSFULLY',
+            'message': 'Added successfully.',
+            'details': {'id': job_id, 'operation': 'read', 'state': 'ADDED'},
+        }], 'info': {}}, headers)
+
+    def bulk_job_range(self, job):
+        total = self.settings.records[job['module']]
+        start = (job['page'] - 1) * self.settings.bulk_page_size
+        return range(min(start, total), min(start + self.settings.bulk_page_size, total)), total
+
+    def get_bulk_job(self, job_id, headers):
+        job = self.settings.poll_bulk_job(job_id)
+        if job is None:
+            return self.send_json(400, {'code': 'INVALID_DATA', 'details': {'id': job_id}})
+        details = {'id': job_id, 'operation': 'read', 'state': 'IN PROGRESS'}
+        if job['polls'] > self.settings.bulk_polls:
+            index_range, total = self.bulk_job_range(job)
+            details.update(state='COMPLETED', result={
+                'page': job['page'],
+                'count': len(index_range),
+                'per_page': self.settings.bulk_page_size,
+                'more_records': index_range.stop < total,
+                'download_url': f'/crm/bulk/v7/read/{job_id}/result',
+            })
+        self.send_json(200, {'data': [details]}, headers)
+
+    def get_bulk_result(self, job_id, headers):
+        job = self.settings.bulk_jobs.get(job_id)
+        if job is None or job['polls'] <= self.settings.bulk_polls:
+            return self.send_json(400, {'code': 'INVALID_DATA', 'details': {'id': job_id}})
+        index_range, _total = self.bulk_job_range(job)
+        body = bulk_read_archive(job['module'], index_range, job['fields'], self.settings)
+        self.send_bytes(200, body, 'application/zip', dict(
+            headers, **{'Content-Disposition': f'attachment; filename={job_id}.zip'}))
+
+
+def make_server(settings, host='127.0.0.1', port=0):
+    """
+    Build the stub server; ``port=0`` picks a free port.
+    :return: ``ThreadingHTTPServer`` whose ``settings`` attribute holds the StubSettings
+    """
+    server = ThreadingHTTPServer((host, port), ZohoStubHandler)
+    server.daemon_threads = True
+    server.settings = settings
+    return server
+
+
+def start_in_thread(settings, host='127.0.0.1', port=0):
+    """
+    Start the stub server in a daemon thread.
+    :return: Tuple (server, base URL); stop it with ``server.shutdown()``
+    """
+    server = make_server(settings, host, port)
+    threading.Thread(target=server.serve_forever, name='zoho_stub', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def parse_records(value):
+    records = {}
+    for item in filter(None, value.split(',')):
+        module, count = item.split('=')
+        records[module.strip()] = int(count)
+    return records
+
+
+def add_arguments(parser):
+    """Add the options of the stub to an argument parser."""
+    parser.add_argument('--records', type=parse_records, default={},
+                        help="records per module, e.g. Contacts=5000,Products=2000")
+    parser.add_argument('--fields', type=int, default=0, help="extra custom fields per module")
+    parser.add_argument('--latency', type=float, default=0, help="response delay in milliseconds")
+    parser.add_argument('--throttle', type=float, default=0, help="share of calls answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds of a 429")
+    parser.add_argument('--organizations', type=int, default=5)
+
+
+def settings_from_args(args):
+    return StubSettings(records=args.records, custom_fields=args.fields, latency=args.latency / 1000,
+                        throttle=args.throttle, retry_after=args.retry_after,
+                        organizations=args.organizations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = make_server(settings_from_args(args), args.host, args.port)
+    print(f"Zoho stub listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {server.settings.counters}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,16 +6,14 @@
     'category': 'Tools',
     'summary': 'Module for Zoho integration with Odoo',
     'author': '',
-<<<<<<< HEAD
-    'depends': ['base','project'],
-=======
-    'depends': ['base','product','stock'],
->>>>>>> 133f03343d0f6a744e8175c20278022373b2df0a
+    'depends': ['base', 'project', 'product', 'stock', 'account'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/zoho_config_views.xml',
         'views/view_success_message.xml',
         'views/logs.xml',
+        'views/staged_record_views.xml',
     ],
     'installable': True,
     'application': True,
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import json
 from odoo import http
 from odoo.http import request
 
@@ -11,7 +12,7 @@ class ZohoController(http.Controller):
         if not grant_token:
             return "Authorization failed: Grant token not found."
 
-        zoho_config = request.env['zoho.config'].sudo().search([], limit=1)
+        zoho_config = request.env['zoho.config'].sudo()._get_config_from_auth_state(kwargs.get('state'))
         if not zoho_config:
             return "Zoho Configuration not found."
 
@@ -20,3 +21,15 @@ class ZohoController(http.Controller):
             return request.render('cr_odoo_zoho_integration.success_redirect_template')
         except Exception as e:
             return f"Authorization failed: {str(e)}"
+
+
+    @http.route('/zoho/notify', type='http', auth='public', methods=['POST'], csrf=False)
+    def zoho_notify(self, **kwargs):
+        """Handle Zoho CRM notification callbacks: queue the changed records to be synced."""
+        try:
+            payload = json.loads(request.httprequest.get_data() or b'{}')
+        except ValueError:
+            return request.make_json_response({'status': 'invalid payload'}, status=400)
+        if not isinstance(payload, dict) or not request.env['zoho.config'].sudo()._receive_zoho_notification(payload):
+            return request.make_json_response({'status': 'unknown channel'}, status=403)
+        return request.make_json_response({'status': 'queued'})
@@ -2,10 +2,29 @@
 # Part of Creyox Technologies.
 
 from . import cr_zoho_config
+from . import cr_coql
+from . import cr_bulk_upsert
+from . import cr_sync_engine
 from . import cr_logs
+from . import cr_sync_state
+from . import cr_field_metadata
+from . import cr_field_mapping
+from . import cr_sync_job
+from . import cr_sync_orchestrator
+from . import cr_zoho_notification
+from . import cr_notifications
+from . import cr_zoho_staged_record
+from . import cr_staging
+from . import cr_deletions
 from . import cr_contacts
 from . import cr_products
 from . import  cr_zoho_organizations
+from . import cr_books_sync
 from . import  cr_property_project
 from . import  project_project
-from . import  res_company
\ No newline at end of file
+from . import  res_company
+from . import res_partner
+from . import product_product
+from . import product_template
+from . import product_attribute_value
+from . import account_move
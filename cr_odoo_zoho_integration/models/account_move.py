@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    x_zoho_books_id = fields.Char(string='Zoho Books ID', index=True, copy=False, help="ID of the Zoho Books invoice")
+    x_zoho_books_status = fields.Char(string='Zoho Books Status', copy=False,
+                                      help="Status of the invoice in Zoho Books, e.g. sent, paid or overdue")
+    x_zoho_hash = fields.Char(string='Zoho Data Hash', copy=False,
+                              help="Hash of the Zoho values last written; unchanged records are not rewritten")
+
+    _sql_constraints = [
+        ('x_zoho_books_id_company_uniq', 'unique(x_zoho_books_id, company_id)',
+         'A Zoho Books invoice can only be linked to one entry per company.'),
+    ]
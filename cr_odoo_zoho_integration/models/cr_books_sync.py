@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import logging
+import requests
+from odoo import models, Command, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Zoho Books lists synced for every organization, in sync order: invoices are
+# matched with the contacts synced before them.
+#   label: Name of the list shown to users
+#   endpoint: Path of the list under books/v3, also the key of its records
+#   model: Odoo model the records are written to, matched on x_zoho_books_id
+#   hash_field: Field of ``model`` storing the hash of the values last written
+#   prepare: zoho.config method ``(record, company, lookups) -> values or None``
+ZOHO_BOOKS_MODULES = {
+    'contacts': {
+        'label': 'Books Contacts',
+        'endpoint': 'contacts',
+        'model': 'res.partner',
+        'hash_field': 'x_zoho_books_hash',
+        'prepare': '_prepare_books_contact',
+    },
+    'invoices': {
+        'label': 'Books Invoices',
+        'endpoint': 'invoices',
+        'model': 'account.move',
+        'hash_field': 'x_zoho_hash',
+        'prepare': '_prepare_books_invoice',
+    },
+}
+
+
+class ZohoBooksSync(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Books Sync'
+
+    def _get_zoho_books_companies(self):
+        """Return the companies linked to a Zoho Books organization."""
+        return self.env['res.company'].sudo().search([('external_org_id', '!=', False)])
+
+    def _iter_books_pages(self, company, endpoint, modified_since=None, cursor=None, per_page=200):
+        """
+        Lazily paginate a Zoho Books list of one organization.
+        :param company: Company linked to the Zoho Books organization
+        :param endpoint: Path of the list under books/v3, e.g. ``invoices``
+        :param modified_since: Only fetch records modified after this datetime
+        :param cursor: Optional dictionary holding the ``page`` to resume from, kept up to date
+        :param per_page: Number of records per page (200 at most)
+        :return: Generator of lists of Zoho Books records, one list per page
+        """
+        cursor = cursor if cursor is not None else {}
+        client = self._get_zoho_client()
+        url = self._get_zoho_api_url(f"books/v3/{endpoint}")
+        priority = self._get_zoho_sync_priority()
+        metrics = self._get_zoho_sync_metrics()
+        params = {"organization_id": company.external_org_id, "per_page": per_page}
+        if modified_since:
+            params["last_modified_time"] = modified_since.strftime('%Y-%m-%dT%H:%M:%S+0000')
+        page = cursor.get('page', 1)
+        while True:
+            metrics.add('pages_fetched')
+            try:
+                with metrics.timer('http_time'), client.get(
+                        url, params=dict(params, page=page), priority=priority, metrics=metrics) as response:
+                    response.raise_for_status()
+                    data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                raise UserError(_("Error fetching %s of %s from Zoho Books: %s") % (endpoint, company.name, e))
+            if data.get("code") != 0:
+                raise UserError(_("Error fetching %s of %s from Zoho Books: %s")
+                                % (endpoint, company.name, data.get("message")))
+            records = data.get(endpoint, [])
+            metrics.add('records_fetched', len(records))
+            cursor['page'] = page + 1
+            yield records
+            if not data.get("page_context", {}).get("has_more_page"):
+                return
+            page += 1
+
+    def _get_books_lookups(self, company, record_ids):
+        """
+        Build the maps needed to prepare the Books records of a company, once per list.
+        :param company: Company linked to the Zoho Books organization
+        :param record_ids: Zoho Books id -> record id map of the list being synced
+        :return: Dictionary of lookups handed to the prepare methods
+        """
+        journal = self.env['account.journal'].search([
+            ('company_id', '=', company.id), ('type', '=', 'sale'),
+        ], limit=1)
+        return {
+            'partner_ids': self._zoho_id_map('res.partner', 'x_zoho_books_id', [('company_id', '=', company.id)]),
+            'record_ids': record_ids,
+            'currency_ids': self._zoho_id_map('res.currency', 'name', [('active', '=', True)]),
+            'journal_id': journal.id,
+        }
+
+    def _prepare_books_contact(self, record, company, lookups):
+        """
+        Prepare partner values for a Zoho Books contact.
+        :param record: Zoho Books contact
+        :param company: Company of the organization
+        :param lookups: Maps from :meth:`_get_books_lookups`
+        :return: Dictionary of partner values
+        """
+        vals = {
+            'x_zoho_books_id': record.get('contact_id'),
+            'name': record.get('contact_name') or record.get('company_name') or _("Unnamed Contact"),
+            'email': record.get('email') or False,
+            'phone': record.get('phone') or False,
+            'mobile': record.get('mobile') or False,
+            'is_company': record.get('customer_sub_type') == 'business',
+            'company_id': company.id,
+            'active': record.get('status') != 'inactive',
+        }
+        if record.get('contact_type') == 'vendor':
+            vals['supplier_rank'] = 1
+        else:
+            vals['customer_rank'] = 1
+        return vals
+
+    def _prepare_books_invoice(self, record, company, lookups):
+        """
+        Prepare customer invoice values for a Zoho Books invoice.
+
+        The Books list only gives the invoice totals, so a new invoice gets a single
+        line holding its total, without taxes. Invoices already imported may have
+        been posted in Odoo: only their Books status is updated.
+        :param record: Zoho Books invoice
+        :param company: Company of the organization
+        :param lookups: Maps from :meth:`_get_books_lookups`
+        :return: Dictionary of invoice values
+        """
+        vals = {
+            'x_zoho_books_id': record.get('invoice_id'),
+            'x_zoho_books_status': record.get('status') or False,
+        }
+        if record.get('invoice_id') in lookups['record_ids']:
+            return vals
+        if not lookups['journal_id']:
+            raise UserError(_("No sales journal found for %s to import its Zoho Books invoices.") % company.name)
+        vals.update({
+            'move_type': 'out_invoice',
+            'company_id': company.id,
+            'journal_id': lookups['journal_id'],
+            'partner_id': lookups['partner_ids'].get(record.get('customer_id'), False),
+            'ref': record.get('invoice_number') or False,
+            'payment_reference': record.get('reference_number') or False,
+            'invoice_date': record.get('date') or False,
+            'invoice_date_due': record.get('due_date') or False,
+            'currency_id': lookups['currency_ids'].get(record.get('currency_code'), company.currency_id.id),
+            'invoice_line_ids': [Command.create({
+                'name': _("Zoho Books invoice %s") % (record.get('invoice_number') or record.get('invoice_id')),
+                'quantity': 1,
+                'price_unit': record.get('total') or 0.0,
+                'tax_ids': [Command.set([])],
+            })],
+        })
+        return vals
+
+    def _sync_zoho_books(self, company):
+        """
+        Sync the contacts, then the invoices, of the Zoho Books organization of a company.
+
+        Each list has its own watermark, ``books/<organization id>/<list>``, so daily
+        runs only fetch the records modified since the last successful one. Records
+        are bulk-written under the company of the organization and the job is
+        checkpointed with every chunk; a resumed job skips the lists already done.
+        :param company: Company linked to the Zoho Books organization
+        :return: Dictionary {list: upsert result}
+        """
+        self.ensure_one()
+        self._check_access_token()
+        synced_at = self._get_zoho_sync_start()
+        cursor = self._get_zoho_checkpoint().get('cursor', {})
+        results = {}
+        for books_type, spec in ZOHO_BOOKS_MODULES.items():
+            list_cursor = cursor.setdefault(books_type, {})
+            if list_cursor.get('done'):
+                continue
+            watermark = f"books/{company.external_org_id}/{spec['endpoint']}"
+            id_domain = [('company_id', '=', company.id)]
+            id_map = self._zoho_id_map(spec['model'], 'x_zoho_books_id', id_domain)
+            lookups = self._get_books_lookups(company, id_map)
+            prepare_method = getattr(self, spec['prepare'])
+            results[books_type] = self.with_company(company)._upsert_zoho_pages(
+                self._iter_books_pages(company, spec['endpoint'], self._get_sync_watermark(watermark), list_cursor),
+                spec['model'], 'x_zoho_books_id',
+                lambda record: prepare_method(record, company, lookups),
+                cursor, id_map=id_map, hash_field=spec['hash_field'], id_domain=id_domain)
+            _logger.info("%s %s created: %s, updated: %s, unchanged: %s", company.name, spec['label'],
+                         results[books_type]['created'], results[books_type]['updated'],
+                         results[books_type]['unchanged'])
+            cursor[books_type] = {'done': True}
+            self._set_sync_watermark(watermark, synced_at)
+            job = self._get_zoho_sync_job()
+            if job:
+                job._save_checkpoint({'cursor': cursor}, 0)
+        return results
+
+    def sync_zoho_books(self):
+        """
+        Fan the Zoho Books sync out to one background job per organization.
+
+        Every organization is its own dispatch group: jobs of several organizations
+        run in parallel on the sync workers, up to the parallel organization limit
+        of the configuration.
+        """
+        job_model = self.env['cr.zoho.sync.job']
+        for config in self:
+            for company in config._get_zoho_books_companies():
+                job_model._enqueue(config, 'books', full_sync=config._is_zoho_full_sync(), company=company)
+
+    def action_sync_zoho_books(self):
+        """Queue the Zoho Books sync of every organization."""
+        self.ensure_one()
+        companies = self._get_zoho_books_companies()
+        if not companies:
+            raise UserError(_("No company is linked to a Zoho Books organization; sync the organizations first."))
+        self.sync_zoho_books()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Zoho Sync"),
+                'message': _("Zoho Books sync queued for %s organizations; its progress is shown in the "
+                             "Sync Jobs tab.") % len(companies),
+                'type': 'info',
+            },
+        }
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import time
+from itertools import islice
+from odoo import models, fields
+from ..tools.record_hash import values_hash
+
+
+class ZohoBulkUpsert(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Bulk Upsert'
+
+    cr_commit_chunk_size = fields.Integer(
+        string="Commit Chunk Size", default=500,
+        help="Number of records written and committed at once during a sync")
+
+    def _zoho_commit(self):
+        """Commit the current transaction, except when running tests."""
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    def _zoho_id_map(self, model_name, key_field, domain=None):
+        """
+        Load the key -> record id map of a model with a single query.
+
+        Built once per sync run, it replaces a search per incoming record, or per
+        chunk when handed to :meth:`_zoho_bulk_upsert`.
+        :param model_name: Name of the Odoo model
+        :param key_field: Indexed field holding the Zoho key, e.g. ``x_zoho_id``
+        :param domain: Optional domain restricting the records
+        :return: Dictionary mapping every key to its record id
+        """
+        model = self.env[model_name].with_context(active_test=False)
+        id_map = {}
+        for row in model.search_read([(key_field, '!=', False)] + (domain or []), [key_field], order='id'):
+            id_map.setdefault(row[key_field], row['id'])
+        return id_map
+
+    def _zoho_bulk_upsert(self, model_name, key_field, vals_iter, chunk_size=None, update_existing=True,
+                          id_map=None, fallback_key=None, hash_field=None, id_domain=None):
+        """
+        Create or update records of a model in bulk, matching them on a key field.
+
+        Values are processed in chunks: existing records of a chunk are loaded with
+        a single ``search_read`` on the key field, missing ones are created with one
+        multi-record ``create`` and existing ones are updated with one ``write`` per
+        group of identical values. The transaction is committed after every chunk.
+        Values without a key are always created; values sharing a key are merged,
+        the last one winning.
+
+        With a hash field, the hash of the incoming values is stored on every record:
+        records whose stored hash is unchanged are not written at all, and changed
+        ones only get the fields whose value differs, which spares recomputes, mail
+        tracking and ``write_date`` churn on records Zoho did not change.
+        :param model_name: Name of the Odoo model to write
+        :param key_field: Field used to match incoming values with existing records
+        :param vals_iter: Iterable of value dictionaries, consumed lazily
+        :param chunk_size: Number of values per chunk, defaults to the configured size
+        :param update_existing: Write the values on records that already exist
+        :param id_map: Optional key -> record id map from :meth:`_zoho_id_map`, used
+            instead of searching every chunk; only keys it misses are searched, and
+            created records are added to it
+        :param fallback_key: Optional field matching values whose key is unknown with
+            records that have no key yet, e.g. records imported before the key
+            existed; the key is then written on them
+        :param hash_field: Optional field storing the hash of the values last written
+        :param id_domain: Optional domain the records of ``id_map`` were loaded with
+        :return: Dictionary with the ``created``, ``updated`` and ``unchanged`` counts and the
+            ``ids`` mapping every key to its record id
+        """
+        model = self.env[model_name].with_context(active_test=False)
+        chunk_size = chunk_size or self.cr_commit_chunk_size or 500
+        metrics = self._get_zoho_sync_metrics()
+        result = {'created': 0, 'updated': 0, 'unchanged': 0, 'ids': {}}
+        vals_iter = iter(vals_iter)
+        while True:
+            chunk = list(islice(vals_iter, chunk_size))
+            if not chunk:
+                break
+            orm_start = time.perf_counter()
+            keyed_vals = {}
+            to_create = []
+            for vals in chunk:
+                key = vals.get(key_field)
+                if key:
+                    keyed_vals.setdefault(key, {}).update(vals)
+                else:
+                    to_create.append(vals)
+
+            existing = {}
+            if keyed_vals:
+                if id_map is not None:
+                    existing = {key: id_map[key] for key in keyed_vals if key in id_map}
+                    missing = [key for key in keyed_vals if key not in existing]
+                    if missing:
+                        # The map may be stale: another worker, e.g. the notifications
+                        # cron, may have created records since it was built
+                        for row in model.search_read([(key_field, 'in', missing)] + (id_domain or []), [key_field]):
+                            existing.setdefault(row[key_field], row['id'])
+                else:
+                    for row in model.search_read([(key_field, 'in', list(keyed_vals))], [key_field]):
+                        existing.setdefault(row[key_field], row['id'])
+            if fallback_key:
+                unmatched = {vals[fallback_key]: key for key, vals in keyed_vals.items()
+                             if key not in existing and vals.get(fallback_key)}
+                if unmatched:
+                    for row in model.search_read([(fallback_key, 'in', list(unmatched)), (key_field, '=', False)],
+                                                 [fallback_key]):
+                        key = unmatched.pop(row[fallback_key], None)
+                        if key:
+                            existing[key] = row['id']
+
+            stored_hashes = {}
+            if hash_field:
+                for vals in to_create + list(keyed_vals.values()):
+                    vals[hash_field] = values_hash(vals, exclude=(hash_field,))
+                matched_ids = [existing[key] for key in keyed_vals if key in existing]
+                if matched_ids and update_existing:
+                    stored_hashes = {row['id']: row[hash_field]
+                                     for row in model.search_read([('id', 'in', matched_ids)], [hash_field])}
+
+            to_write = {}
+            for key, vals in keyed_vals.items():
+                record_id = existing.get(key)
+                if not record_id:
+                    to_create.append(vals)
+                elif hash_field and stored_hashes.get(record_id) == vals[hash_field]:
+                    result['unchanged'] += 1
+                elif update_existing:
+                    to_write[record_id] = vals
+                result['ids'][key] = record_id
+                if id_map is not None and record_id:
+                    id_map[key] = record_id
+
+            if to_create:
+                created = model.create(to_create)
+                result['created'] += len(created)
+                for record, vals in zip(created, to_create):
+                    if vals.get(key_field):
+                        result['ids'][vals[key_field]] = record.id
+                        if id_map is not None:
+                            id_map[vals[key_field]] = record.id
+            if hash_field and to_write:
+                to_write = self._zoho_changed_values(model.browse(list(to_write)), to_write)
+            write_groups = {}
+            for record_id, vals in to_write.items():
+                group_key = tuple(sorted((name, repr(value)) for name, value in vals.items()))
+                write_groups.setdefault(group_key, (vals, []))[1].append(record_id)
+            for vals, record_ids in write_groups.values():
+                model.browse(record_ids).write(vals)
+                result['updated'] += len(record_ids)
+
+            self._zoho_commit()
+            metrics.add('orm_time', time.perf_counter() - orm_start)
+        metrics.add('records_created', result['created'])
+        metrics.add('records_updated', result['updated'])
+        metrics.add('records_unchanged', result['unchanged'])
+        return result
+
+    def _zoho_changed_values(self, records, vals_by_id):
+        """
+        Keep, for every record, only the values that differ from what it stores.
+
+        Values are compared once converted to the cache format of their field, so
+        e.g. a many2one id matches the stored record and a date string the stored
+        date. Relational x2many values are always kept.
+        :param records: Records to compare with
+        :param vals_by_id: Dictionary mapping record ids to their incoming values
+        :return: Dictionary mapping record ids to their changed values
+        """
+        records.fetch(list({name for vals in vals_by_id.values() for name in vals}))
+        changed = {}
+        for record in records:
+            changed[record.id] = {
+                name: value for name, value in vals_by_id[record.id].items()
+                if record._fields[name].type in ('one2many', 'many2many')
+                or record._fields[name].convert_to_cache(value, record, validate=False)
+                != record._fields[name].convert_to_cache(record[name], record, validate=False)
+            }
+        return changed
+
+    def _upsert_zoho_pages(self, pages, model_name, key_field, prepare, cursor=None, id_map=None,
+                           fallback_key=None, hash_field=None, write_chunk=None, id_domain=None):
+        """
+        Write pages of Zoho records in commit-sized chunks, checkpointing the sync job.
+
+        Pages are buffered until the commit chunk size is reached, then written with
+        :meth:`_zoho_bulk_upsert`. When the sync runs as a background job, the
+        pagination cursor is saved with every chunk, so a crashed job resumes after
+        the last committed page instead of starting over.
+        :param pages: Iterable of lists of Zoho records
+        :param model_name: Name of the Odoo model to write
+        :param key_field: Field used to match incoming values with existing records
+        :param prepare: Callable turning a Zoho record into values, or None to skip it
+        :param cursor: Pagination cursor updated by the page iterator
+        :param id_map: Optional key -> record id map, see :meth:`_zoho_bulk_upsert`
+        :param fallback_key: Optional fallback match field, see :meth:`_zoho_bulk_upsert`
+        :param hash_field: Optional field storing the values hash, see :meth:`_zoho_bulk_upsert`
+        :param id_domain: Optional domain of ``id_map``, see :meth:`_zoho_bulk_upsert`
+        :param write_chunk: Optional callable ``(list of prepared values) -> result`` writing
+            a chunk instead of :meth:`_zoho_bulk_upsert`
+        :return: Dictionary with the ``created``, ``updated`` and ``unchanged`` counts
+        """
+        job = self._get_zoho_sync_job()
+        metrics = self._get_zoho_sync_metrics()
+        chunk_size = self.cr_commit_chunk_size or 500
+        totals = {'created': 0, 'updated': 0, 'unchanged': 0}
+        buffer = []
+
+        def flush():
+            if write_chunk:
+                result = write_chunk(buffer)
+            else:
+                result = self._zoho_bulk_upsert(model_name, key_field, buffer, id_map=id_map,
+                                                fallback_key=fallback_key, hash_field=hash_field,
+                                                id_domain=id_domain)
+            for count in totals:
+                totals[count] += result[count]
+            if job:
+                job._save_checkpoint({'cursor': cursor or {}}, len(buffer))
+            buffer.clear()
+
+        for page_records in pages:
+            with metrics.timer('transform_time'):
+                for record in page_records:
+                    vals = prepare(record)
+                    if vals:
+                        buffer.append(vals)
+                    else:
+                        metrics.add('records_skipped')
+            if len(buffer) >= chunk_size:
+                flush()
+        if buffer:
+            flush()
+        return totals
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import itertools
+import requests
+from odoo import models, fields
+from ..tools.json_stream import READ_CHUNK_SIZE, decode_records_page
+
+# Maximum number of rows returned by one COQL query (LIMIT offset, count)
+COQL_PAGE_SIZE = 2000
+# COQL cannot page further than this offset; larger modules need Bulk Read
+COQL_MAX_OFFSET = 100000
+# Maximum number of values of an ``in`` condition
+COQL_MAX_IN_VALUES = 50
+
+
+def coql_literal(value):
+    """Quote a value for a COQL query."""
+    return "'%s'" % str(value).replace('\\', '\\\\').replace("'", "\\'")
+
+
+class ZohoCoql(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho COQL Queries'
+
+    cr_fetch_engine = fields.Selection(
+        selection_add=[('coql', 'COQL Queries')], ondelete={'coql': 'set default'})
+
+    def _get_zoho_sync_filter_values(self, spec):
+        """
+        Return the values accepted by the filters of a sync, whatever its fetch engine.
+
+        The ``coql`` key of a sync spec maps Zoho fields to the ``(model, key field)``
+        holding their accepted values, e.g. the organisations of the companies.
+        :param spec: Spec of the sync
+        :return: Dictionary {Zoho field: sorted accepted values}, or None when the
+            sync has no filters
+        """
+        if spec.get('coql') is None:
+            return None
+        return {
+            zoho_field: sorted(self._zoho_id_map(model_name, key_field))
+            for zoho_field, (model_name, key_field) in spec['coql'].items()
+        }
+
+    def _get_zoho_coql_filters(self, spec):
+        """
+        Return the server-side filters of a sync when it is fetched with COQL.
+        :param spec: Spec of the sync
+        :return: Dictionary {Zoho field: sorted accepted values}, or None when the
+            sync is not fetched with COQL
+        """
+        if self.cr_fetch_engine != 'coql':
+            return None
+        return self._get_zoho_sync_filter_values(spec)
+
+    def _zoho_coql_where_clauses(self, modified_since=None, filters=None):
+        """
+        Build the WHERE clauses of the COQL queries fetching a module.
+
+        ``in`` conditions accept COQL_MAX_IN_VALUES values, so longer value lists
+        are split and one query series is run per combination of value chunks.
+        :param modified_since: Only select records modified after this datetime
+        :param filters: Dictionary {Zoho field: accepted values}
+        :return: List of WHERE clauses, empty when a filter accepts no value
+        """
+        # COQL requires a WHERE clause; without a watermark every record is selected
+        base = (f"Modified_Time > {coql_literal(modified_since.strftime('%Y-%m-%dT%H:%M:%S+00:00'))}"
+                if modified_since else "id is not null")
+        field_conditions = []
+        for zoho_field, values in (filters or {}).items():
+            values = [coql_literal(value) for value in values]
+            field_conditions.append([
+                "%s in (%s)" % (zoho_field, ', '.join(values[i:i + COQL_MAX_IN_VALUES]))
+                for i in range(0, len(values), COQL_MAX_IN_VALUES)
+            ])
+        return [' and '.join((base,) + conditions) for conditions in itertools.product(*field_conditions)]
+
+    def _zoho_coql_fetcher(self, module, where, per_page=COQL_PAGE_SIZE):
+        """
+        Build a page fetcher running COQL queries on a Zoho CRM module.
+
+        Like :meth:`_zoho_page_fetcher`, the returned callable never touches the
+        ORM. Only the fields of the batch are selected, and pages are read with
+        ``LIMIT offset, count``; the page token argument is not used by COQL.
+        :param module: API name of the Zoho module
+        :param where: WHERE clause of the query
+        :param per_page: Number of records per page (COQL_PAGE_SIZE at most)
+        :return: Callable ``(fields_batch, page, page_token=None) -> (records, info)``
+        """
+        client = self._get_zoho_client()
+        url = self._get_zoho_api_url("crm/v7/coql")
+        priority = self._get_zoho_sync_priority()
+        metrics = self._get_zoho_sync_metrics()
+
+        def fetch_page(fields_batch, page, page_token=None):
+            offset = (page - 1) * per_page
+            if offset >= COQL_MAX_OFFSET:
+                raise requests.RequestException(
+                    f"COQL cannot read past {COQL_MAX_OFFSET} records of {module}, use Bulk Read")
+            query = (f"select {', '.join(fields_batch)} from {module} where {where} "
+                     f"order by id limit {offset}, {per_page}")
+            metrics.add('pages_fetched')
+            with metrics.timer('http_time'), client.post(
+                    url, json={"select_query": query}, priority=priority,
+                    metrics=metrics, stream=True) as response:
+                response.raise_for_status()
+                if response.status_code == 204:
+                    # No record matches the query, or the offset is past the last one
+                    return [], {}
+                try:
+                    return decode_records_page(
+                        metrics.count_bytes(response.iter_content(READ_CHUNK_SIZE)), fields_batch)
+                except ValueError as e:
+                    raise requests.RequestException(f"Invalid Zoho response: {e}")
+
+        return fetch_page
+
+    def _iter_coql_pages(self, module, field_names, modified_since=None, filters=None, cursor=None):
+        """
+        Lazily paginate the records of a Zoho CRM module matching COQL filters.
+        :param module: API name of the Zoho module
+        :param field_names: Field api names to select, 50 per query at most
+        :param modified_since: Only fetch records modified after this datetime
+        :param filters: Dictionary {Zoho field: accepted values}
+        :param cursor: Optional resume cursor holding the current query series
+            (``coql_query``) and its pagination (``coql_page``), kept up to date
+        :return: Generator of lists of merged record dictionaries, one list per page
+        """
+        cursor = cursor if cursor is not None else {}
+        where_clauses = self._zoho_coql_where_clauses(modified_since, filters)
+        for index, where in enumerate(where_clauses):
+            if index < cursor.get('coql_query', 0):
+                continue
+            cursor['coql_query'] = index
+            page_cursor = cursor.setdefault('coql_page', {})
+            yield from self._iter_merged_pages(self._zoho_coql_fetcher(module, where), field_names,
+                                               cursor=page_cursor, per_page=COQL_PAGE_SIZE)
+            cursor.update(coql_query=index + 1, coql_page={})
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import logging
+import requests
+from odoo import models, _
+from odoo.exceptions import UserError
+from ..tools.json_stream import READ_CHUNK_SIZE, decode_records_page
+from .cr_sync_engine import ZOHO_SYNC_MODULES
+
+_logger = logging.getLogger(__name__)
+
+
+class ZohoDeletions(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Deleted Records Sync'
+
+    def _get_zoho_deletion_sync_types(self):
+        """Return the registered syncs whose records can be matched, and archived, by Zoho id."""
+        return [sync_type for sync_type, spec in ZOHO_SYNC_MODULES.items()
+                if spec.get('key') == 'x_zoho_id']
+
+    def _iter_zoho_deleted_ids(self, module, modified_since=None, per_page=200):
+        """
+        Lazily paginate the records deleted from a Zoho CRM module.
+
+        Both the records in the recycle bin and the permanently deleted ones are
+        read. Zoho answers "Not Modified" when nothing was deleted since the
+        If-Modified-Since watermark, which costs a single call.
+        :param module: API name of the Zoho module
+        :param modified_since: Only read records deleted after this datetime
+        :param per_page: Number of records per page (200 at most)
+        :return: Generator of lists of deleted record ids, one list per page
+        """
+        client = self._get_zoho_client()
+        url = self._get_zoho_api_url(f"crm/v7/{module}/deleted")
+        headers = self._zoho_modified_since_headers(modified_since)
+        priority = self._get_zoho_sync_priority()
+        metrics = self._get_zoho_sync_metrics()
+        page = 1
+        while True:
+            metrics.add('pages_fetched')
+            try:
+                with metrics.timer('http_time'), client.get(
+                        url, params={"type": "all", "page": page, "per_page": per_page}, headers=headers,
+                        priority=priority, metrics=metrics, stream=True) as response:
+                    response.raise_for_status()
+                    if response.status_code in (204, 304):
+                        return
+                    records, info = decode_records_page(
+                        metrics.count_bytes(response.iter_content(READ_CHUNK_SIZE)), ['deleted_time'])
+            except (requests.RequestException, ValueError) as e:
+                raise UserError(_("Error fetching deleted %s from Zoho: %s") % (module, e))
+            metrics.add('records_fetched', len(records))
+            yield [record['id'] for record in records if record.get('id')]
+            if not info.get('more_records'):
+                return
+            page += 1
+
+    def _archive_zoho_records(self, sync_type, zoho_ids):
+        """
+        Archive the Odoo records of deleted Zoho records with one search and one write.
+
+        Their values hash is cleared, so the record is written again, and unarchived,
+        if it is restored in Zoho. Their staged payloads are dropped too, so a replay
+        does not bring them back.
+        :param sync_type: Key of ZOHO_SYNC_MODULES
+        :param zoho_ids: Zoho ids of the deleted records
+        :return: Number of records archived
+        """
+        spec = self._get_zoho_sync_spec(sync_type)
+        if not zoho_ids:
+            return 0
+        metrics = self._get_zoho_sync_metrics()
+        with metrics.timer('orm_time'):
+            records = self.env[spec['model']].search([(spec['key'], 'in', list(zoho_ids))])
+            count = len(records)
+            vals = {'active': False}
+            if spec.get('hash_field'):
+                vals[spec['hash_field']] = False
+            records.write(vals)
+            if spec.get('archive'):
+                getattr(self, spec['archive'])(records)
+            self.env.cr.execute("""
+                DELETE FROM cr_zoho_staged_record
+                 WHERE cr_configuration_id = %s AND cr_module = %s AND cr_zoho_id = ANY(%s)
+            """, [self.id, spec['module'], list(zoho_ids)])
+        metrics.add('records_archived', count)
+        return count
+
+    def _sync_zoho_deletions(self, sync_type):
+        """
+        Archive the Odoo records deleted in Zoho since the deletion watermark of a module.
+
+        The watermark is kept apart from the one of the module sync, under
+        ``<module>/deleted``, and only advanced once every page was archived.
+        :param sync_type: Key of ZOHO_SYNC_MODULES
+        :return: Number of records archived
+        """
+        self.ensure_one()
+        spec = self._get_zoho_sync_spec(sync_type)
+        watermark = f"{spec['module']}/deleted"
+        self._check_access_token()
+        synced_at = self._get_zoho_sync_start()
+        archived = 0
+        for zoho_ids in self._iter_zoho_deleted_ids(spec['module'], self._get_sync_watermark(watermark)):
+            archived += self._archive_zoho_records(sync_type, zoho_ids)
+            self._zoho_commit()
+        _logger.info("%s archived: %s", spec['label'], archived)
+        self._set_sync_watermark(watermark, synced_at)
+        return archived
+
+    def sync_zoho_deletions(self):
+        """Archive the contacts, properties and projects deleted in Zoho since the last deletion sync."""
+        for config in self:
+            for sync_type in config._get_zoho_deletion_sync_types():
+                config._sync_zoho_deletions(sync_type)
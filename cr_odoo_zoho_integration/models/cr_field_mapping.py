@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields, api
+from ..tools.field_mapping import CONVERTER_SELECTION, CompiledMapping
+
+# Mappings used when a configuration has no mapping for a module yet:
+# {zoho module: (odoo model, [(zoho api name, odoo field, converter)])}
+DEFAULT_ZOHO_MAPPINGS = {
+    'Contacts': ('res.partner', [
+        ('Full_Name', 'name', 'char'),
+        ('Email', 'email', 'char'),
+        ('Phone', 'phone', 'char'),
+        ('Mobile', 'mobile', 'char'),
+        ('Title', 'function', 'char'),
+        ('Mailing_Street', 'street', 'char'),
+        ('Mailing_City', 'city', 'char'),
+        ('Mailing_Zip', 'zip', 'char'),
+        ('Description', 'comment', 'char'),
+    ]),
+    'Products': ('product.product', [
+        ('Product_Name', 'name', 'char'),
+        ('Product_Code', 'default_code', 'char'),
+        ('Unit_Price', 'list_price', 'float'),
+        ('Description', 'description', 'char'),
+    ]),
+    'Property_Project': ('project.project', [
+        ('Name', 'name', 'char'),
+        ('Building', 'description', 'char'),
+        ('Anticipated_Start_Date', 'date_start', 'date'),
+        ('Anticipated_Completion_Date', 'date', 'date'),
+    ]),
+}
+
+
+class ZohoFieldMapping(models.Model):
+    _name = 'cr.zoho.field.mapping'
+    _description = 'Zoho Field Mapping'
+    _order = 'cr_module, sequence, id'
+    _rec_name = 'cr_zoho_field'
+
+    cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True, ondelete='cascade')
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+    cr_module = fields.Char('Zoho Module', required=True)
+    cr_zoho_field = fields.Char('Zoho Field', required=True, help="API name of the field in Zoho")
+    cr_model_id = fields.Many2one('ir.model', string='Odoo Model', required=True, ondelete='cascade')
+    cr_field_id = fields.Many2one('ir.model.fields', string='Odoo Field', required=True, ondelete='cascade',
+                                  domain="[('model_id', '=', cr_model_id), ('store', '=', True)]")
+    cr_converter = fields.Selection(CONVERTER_SELECTION, string='Converter', required=True, default='char')
+
+    @api.onchange('cr_model_id')
+    def _onchange_cr_model_id(self):
+        if self.cr_field_id.model_id != self.cr_model_id:
+            self.cr_field_id = False
+
+    @api.model
+    def _compile_mapping(self, config, module, model_name, extra_fields=()):
+        """
+        Compile the mapping of a Zoho module into a converter for one sync run.
+
+        Falls back to the default mapping of the module when the configuration has
+        none; mappings that exist but are all archived map no field at all. Zoho
+        fields unknown to the module layout are left out, so a stale mapping
+        cannot make every page request fail.
+        :param config: zoho.config record
+        :param module: API name of the Zoho module
+        :param model_name: Name of the Odoo model the records are written to
+        :param extra_fields: Zoho fields the importer needs besides the mapped ones
+        :return: CompiledMapping
+        """
+        mappings = self.with_context(active_test=False).search([
+            ('cr_configuration_id', '=', config.id),
+            ('cr_module', '=', module),
+            ('cr_model_id.model', '=', model_name),
+        ])
+        if mappings:
+            rules = [(m.cr_zoho_field, m.cr_field_id.name, m.cr_converter) for m in mappings if m.active]
+        else:
+            rules = DEFAULT_ZOHO_MAPPINGS.get(module, (model_name, []))[1]
+
+        available = {field['api_name'] for field in config._get_zoho_field_definitions(module)}
+        if available:
+            rules = [rule for rule in rules if rule[0] in available]
+            extra_fields = [api_name for api_name in extra_fields if api_name in available]
+        return CompiledMapping(rules, extra_fields)
+
+    @api.model
+    def _load_default_mappings(self, config):
+        """
+        Create the default mappings of every module the configuration has none for.
+        :param config: zoho.config record
+        """
+        existing_modules = set(self.with_context(active_test=False).search([
+            ('cr_configuration_id', '=', config.id),
+        ]).mapped('cr_module'))
+        vals_list = []
+        for module, (model_name, rules) in DEFAULT_ZOHO_MAPPINGS.items():
+            if module in existing_modules:
+                continue
+            model = self.env['ir.model']._get(model_name)
+            for sequence, (api_name, field_name, converter) in enumerate(rules):
+                vals_list.append({
+                    'cr_configuration_id': config.id,
+                    'sequence': sequence,
+                    'cr_module': module,
+                    'cr_zoho_field': api_name,
+                    'cr_model_id': model.id,
+                    'cr_field_id': self.env['ir.model.fields']._get(model_name, field_name).id,
+                    'cr_converter': converter,
+                })
+        return self.create(vals_list)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import json
+from odoo import models, fields, api
+
+
+class ZohoFieldMetadata(models.Model):
+    _name = 'cr.zoho.field.metadata'
+    _description = 'Zoho Field Metadata Cache'
+    _rec_name = 'cr_module'
+
+    cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True, ondelete='cascade')
+    cr_module = fields.Char('Zoho Module', required=True)
+    cr_fields_json = fields.Text('Field Definitions', help="Field definitions returned by /settings/fields, as JSON")
+    cr_etag = fields.Char('ETag')
+    cr_fetched_at = fields.Datetime('Fetched At')
+    cr_field_count = fields.Integer('Number of Fields', compute='_compute_cr_field_count', store=True)
+
+    _sql_constraints = [
+        ('config_module_uniq', 'unique(cr_configuration_id, cr_module)',
+         'Only one field metadata cache per configuration and module is allowed.'),
+    ]
+
+    @api.depends('cr_fields_json')
+    def _compute_cr_field_count(self):
+        for metadata in self:
+            metadata.cr_field_count = len(metadata._get_field_definitions())
+
+    def _get_field_definitions(self):
+        """Return the cached field definitions as a list of dictionaries."""
+        self.ensure_one()
+        return json.loads(self.cr_fields_json) if self.cr_fields_json else []
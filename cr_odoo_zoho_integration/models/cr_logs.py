@@ -5,8 +5,10 @@ from odoo import models, fields
 class DataProcessingLog(models.Model):
     _name = 'cr.data.processing.log'
     _description = 'Log of data processing operations'
+    _order = 'cr_started_at desc, id desc'
 
     cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True)
+    cr_sync_job_id = fields.Many2one('cr.zoho.sync.job', string='Sync Job', ondelete='set null')
     cr_table_name = fields.Char('Name', required=True)
     cr_record_count = fields.Integer('Number of Records', required=True)
     cr_status = fields.Selection([
@@ -14,19 +16,68 @@ class DataProcessingLog(models.Model):
         ('failure', 'Failure')
     ], default='success', required=True)
     cr_error_message = fields.Text('Error Message')
-    cr_timestamp = fields.Char('Timestamp')
-    cr_initiated_at = fields.Char('Initiated At')
     cr_message = fields.Char('Message')
+    cr_started_at = fields.Datetime('Started At')
+    cr_finished_at = fields.Datetime('Finished At')
+    cr_duration = fields.Float('Duration (s)', group_operator='avg')
+    cr_api_calls = fields.Integer('API Calls')
+    cr_downloaded_mb = fields.Float('Downloaded (MB)', digits=(16, 3))
+    cr_pages_fetched = fields.Integer('Pages Fetched')
+    cr_records_fetched = fields.Integer('Records Fetched')
+    cr_records_created = fields.Integer('Records Created')
+    cr_records_updated = fields.Integer('Records Updated')
+    cr_records_unchanged = fields.Integer('Records Unchanged',
+                                          help="Records left untouched because their Zoho data did not change")
+    cr_records_skipped = fields.Integer('Records Skipped')
+    cr_records_archived = fields.Integer('Records Archived', help="Records archived because they were deleted in Zoho")
+    cr_retries = fields.Integer('Retries')
+    cr_throttle_wait = fields.Float('Throttling Wait (s)')
+    cr_http_time = fields.Float('HTTP Time (s)', help="Time spent in Zoho calls, summed over fetch threads")
+    cr_orm_time = fields.Float('ORM Time (s)', help="Time spent reading, writing and committing Odoo records")
+    cr_transform_time = fields.Float('Transform Time (s)', help="Time spent converting Zoho records to Odoo values")
 
-    def _log_data_processing(self, table_name, record_count, status, timespan, initiated_at, error_message=''):
-        """Logs data processing operations into the DataProcessingLog model."""
-        self.env['cr.data.processing.log'].sudo().create({
+    def _log_data_processing(self, config, table_name, status, started_at, duration=None, metrics=None,
+                             job=None, error_message='', message=''):
+        """
+        Log a sync run with the metrics collected while it ran.
+        :param config: zoho.config record the sync ran for
+        :param table_name: Name of the sync
+        :param status: ``success`` or ``failure``
+        :param started_at: Start of the run
+        :param duration: Duration of the run in seconds, measured by the caller
+        :param metrics: Dictionary of the counters of a ``SyncMetrics`` collector
+        :param job: cr.zoho.sync.job record that ran the sync, if any
+        :param error_message: Error that stopped the run
+        :param message: Optional note on the run
+        :return: cr.data.processing.log record
+        """
+        metrics = metrics or {}
+        finished_at = fields.Datetime.now()
+        created = metrics.get('records_created', 0)
+        updated = metrics.get('records_updated', 0)
+        return self.env['cr.data.processing.log'].sudo().create({
+            'cr_configuration_id': config.id,
+            'cr_sync_job_id': job.id if job else False,
             'cr_table_name': table_name,
-            'cr_record_count': record_count,
+            'cr_record_count': created + updated or metrics.get('records_fetched', 0),
             'cr_status': status,
             'cr_error_message': error_message,
-            'cr_timestamp': timespan,
-            'cr_initiated_at': initiated_at,
+            'cr_message': message,
+            'cr_started_at': started_at,
+            'cr_finished_at': finished_at,
+            'cr_duration': duration if duration is not None else (finished_at - started_at).total_seconds(),
+            'cr_api_calls': metrics.get('api_calls', 0),
+            'cr_downloaded_mb': metrics.get('bytes_downloaded', 0) / (1024 * 1024),
+            'cr_pages_fetched': metrics.get('pages_fetched', 0),
+            'cr_records_fetched': metrics.get('records_fetched', 0),
+            'cr_records_created': created,
+            'cr_records_updated': updated,
+            'cr_records_unchanged': metrics.get('records_unchanged', 0),
+            'cr_records_skipped': metrics.get('records_skipped', 0),
+            'cr_records_archived': metrics.get('records_archived', 0),
+            'cr_retries': metrics.get('retries', 0),
+            'cr_throttle_wait': metrics.get('throttle_wait', 0.0),
+            'cr_http_time': metrics.get('http_time', 0.0),
+            'cr_orm_time': metrics.get('orm_time', 0.0),
+            'cr_transform_time': metrics.get('transform_time', 0.0),
         })
-
-
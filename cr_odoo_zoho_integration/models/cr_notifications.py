@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import hmac
+import logging
+import secrets
+import requests
+from datetime import timedelta
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from .cr_sync_engine import ZOHO_SYNC_MODULES
+
+_logger = logging.getLogger(__name__)
+
+# Lifetime requested for the notification channel, renewed by a cron before it ends
+NOTIFY_CHANNEL_LIFETIME = timedelta(days=1)
+NOTIFY_RENEW_MARGIN = timedelta(hours=6)
+
+
+class ZohoNotifications(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Notifications'
+
+    cr_notify_enabled = fields.Boolean(string="Push Notifications", readonly=True, copy=False)
+    cr_notify_url = fields.Char(
+        string="Notification URL",
+        help="Public URL of the /zoho/notify endpoint of this database. Defaults to the "
+             "web.base.url system parameter.")
+    cr_notify_channel_id = fields.Char(string="Channel ID", readonly=True, copy=False)
+    cr_notify_token = fields.Char(string="Channel Token", readonly=True, copy=False, groups='base.group_system',
+                                  help="Secret sent back by Zoho with every notification of the channel")
+    cr_notify_expiry = fields.Datetime(string="Channel Expiry", readonly=True, copy=False)
+    cr_notify_queued = fields.Integer(string="Changed Records Queued", compute='_compute_notify_queued')
+
+    def _compute_notify_queued(self):
+        counts = dict(self.env['cr.zoho.notification']._read_group(
+            [('cr_configuration_id', 'in', self.ids)], ['cr_configuration_id'], ['__count']))
+        for config in self:
+            config.cr_notify_queued = counts.get(config, 0)
+
+    def _get_zoho_notify_url(self):
+        """Return the URL Zoho posts the notifications of this configuration to."""
+        base_url = self.cr_notify_url or self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        return base_url if base_url.endswith('/zoho/notify') else f"{base_url.rstrip('/')}/zoho/notify"
+
+    def _get_zoho_notify_events(self):
+        """Return the watched events: every change of the modules written to Odoo."""
+        return [f"{spec['module']}.all" for spec in ZOHO_SYNC_MODULES.values()]
+
+    def _zoho_watch(self, method='POST'):
+        """
+        Subscribe to, or renew, the Zoho CRM notification channel of this configuration.
+        :param method: ``POST`` to enable the channel, ``PATCH`` to renew it
+        """
+        self.ensure_one()
+        self._check_access_token()
+        expiry = fields.Datetime.now() + NOTIFY_CHANNEL_LIFETIME
+        payload = {"watch": [{
+            "channel_id": self.cr_notify_channel_id,
+            "events": self._get_zoho_notify_events(),
+            "channel_expiry": expiry.strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+            "token": self.sudo().cr_notify_token,
+            "notify_url": self._get_zoho_notify_url(),
+        }]}
+        try:
+            response = self._get_zoho_client().request(
+                method, self._get_zoho_api_url("crm/v7/actions/watch"), json=payload)
+            response.raise_for_status()
+            result = response.json().get('watch', [{}])[0]
+        except (requests.RequestException, ValueError) as e:
+            raise UserError(_("Error subscribing to Zoho notifications: %s") % e)
+        if result.get('status') != 'success':
+            raise UserError(_("Error subscribing to Zoho notifications: %s") % result.get('message'))
+        self.write({'cr_notify_enabled': True, 'cr_notify_expiry': expiry})
+
+    def action_enable_zoho_notifications(self):
+        """Subscribe to Zoho CRM notifications with a new channel and token."""
+        for config in self:
+            config.sudo().write({
+                'cr_notify_channel_id': str(10 ** 12 + secrets.randbelow(9 * 10 ** 12)),
+                'cr_notify_token': secrets.token_urlsafe(24),
+            })
+            config._zoho_watch()
+
+    def action_disable_zoho_notifications(self):
+        """Unsubscribe from Zoho CRM notifications."""
+        for config in self.filtered('cr_notify_channel_id'):
+            try:
+                config._get_zoho_client().request(
+                    'DELETE', config._get_zoho_api_url("crm/v7/actions/watch"),
+                    params={"channel_ids": config.cr_notify_channel_id})
+            except requests.RequestException as e:
+                _logger.warning("Could not unsubscribe Zoho notification channel %s: %s",
+                                config.cr_notify_channel_id, e)
+            config.sudo().write({
+                'cr_notify_enabled': False,
+                'cr_notify_channel_id': False,
+                'cr_notify_token': False,
+                'cr_notify_expiry': False,
+            })
+
+    @api.model
+    def _cron_renew_zoho_notifications(self):
+        """Renew the notification channels about to expire."""
+        configs = self.search([
+            ('cr_notify_enabled', '=', True),
+            ('cr_notify_expiry', '<', fields.Datetime.now() + NOTIFY_RENEW_MARGIN),
+        ])
+        for config in configs:
+            try:
+                config._zoho_watch(method='PATCH')
+            except UserError as e:
+                _logger.warning("Could not renew the Zoho notification channel of %s: %s", config.cr_name, e)
+
+    @api.model
+    def _receive_zoho_notification(self, payload):
+        """
+        Queue the records of a Zoho CRM notification, once its channel token is verified.
+
+        Only the ids of the changed records are queued; they are fetched in batches
+        by the notification cron. Deleted records are archived right away, which
+        needs no call to Zoho.
+        :param payload: Decoded JSON body of the notification
+        :return: True when the notification belongs to a channel and its token matches
+        """
+        channel_id = str(payload.get('channel_id') or '')
+        config = channel_id and self.sudo().search([
+            ('cr_notify_enabled', '=', True),
+            ('cr_notify_channel_id', '=', channel_id),
+        ], limit=1)
+        if not config or not hmac.compare_digest(str(payload.get('token') or ''), config.cr_notify_token or ''):
+            return False
+        module = payload.get('module')
+        sync_type = config._get_zoho_sync_type(module)
+        if not sync_type:
+            return True
+        if payload.get('operation') == 'delete':
+            if sync_type in config._get_zoho_deletion_sync_types():
+                config._archive_zoho_records(sync_type, payload.get('ids') or [])
+        else:
+            self.env['cr.zoho.notification'].sudo()._enqueue(config, module, payload.get('ids') or [])
+        return True
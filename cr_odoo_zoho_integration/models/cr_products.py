@@ -1,133 +1,399 @@
 # -*- coding: utf-8 -*-
-import requests
-from datetime import datetime
-from odoo import models, fields, _
-from odoo.exceptions import UserError
+from odoo import models, Command
 
 class ZohoConfig(models.Model):
     _inherit = 'zoho.config'
 
-    def fetch_products_page(self, fields_batch, page):
+    def import_products(self):
         """
-        Fetch a single page of products for the specified fields batch.
+        Import products from Zoho CRM and organize them as variants under a parent product.
+
+        Only products modified since the last successful sync are fetched, unless
+        a full resync is requested with the ``zoho_full_sync`` context key.
         """
-        fields_param = ",".join(fields_batch)
-        products_url = "https://www.zohoapis.com/crm/v7/Products"
-        params = {
-            "fields": fields_param,
-            "page": page,
-            "per_page": 200,
-        }
-        headers = {"Authorization": f"Zoho-oauthtoken {self.cr_access_token}"}
+        self._run_zoho_sync('products')
 
-        try:
-            response = requests.get(products_url, headers=headers, params=params)
-            response.raise_for_status()
+    def _write_zoho_products(self, spec, pages, mapping, cursor):
+        """
+        Writer of the products sync, see ZOHO_SYNC_MODULES: build the units of every
+        project as variants of one product per project.
 
-            data = response.json()
+        Every project becomes a product template, linked to the project by its Zoho
+        id, with an attribute named after it, and every unit a value of that
+        attribute, keyed by the Zoho id of the unit: a renamed project or unit
+        renames its template or value and keeps its variants. Products are
+        written in commit-sized chunks, checkpointing the sync job. In a chunk,
+        units are grouped by project and each step runs once: one query and one
+        batched create for the templates, attributes and values, and one attribute
+        line write per template, so variants are regenerated once per template
+        instead of once per unit. The unit price is set as the price extra of its
+        variant, mapped template fields are written once per template, and the
+        other mapped variant fields are written with the bulk upsert.
+        :param spec: Spec of the sync
+        :param pages: Iterator of merged pages of Zoho products
+        :param mapping: Compiled mapping of the Products module
+        :param cursor: Checkpoint cursor of the sync job
+        :return: Dictionary with the ``created``, ``updated`` and ``unchanged`` counts
+        """
+        template_fields = {name for name, field in self.env['product.product']._fields.items() if field.inherited}
+        return self._upsert_zoho_pages(
+            pages, spec['model'], spec['key'],
+            lambda record: self._prepare_zoho_unit(record, mapping, spec, template_fields),
+            cursor, write_chunk=lambda unit_list: self._write_zoho_unit_chunk(unit_list, spec))
 
-            return data.get('data', []), data.get('info', {}).get('more_records', False)
-        except requests.RequestException as e:
-            raise UserError(_("Error fetching products: %s") % e)
+    def _prepare_zoho_unit(self, record, mapping, spec, template_fields):
+        """
+        Convert a Zoho product into the unit it stands for in its project.
+        :param record: Merged Zoho product
+        :param mapping: Compiled mapping of the Products module
+        :param spec: Spec of the sync
+        :param template_fields: Names of the product fields stored on the template
+        :return: Dictionary with the ``project_id`` and ``project`` name, unit ``name``,
+            ``template_vals``, variant ``vals`` and, when mapped, ``price`` of the unit;
+            None to skip it
+        """
+        vals = self._prepare_zoho_values(record, mapping, spec)
+        project = record.get('Project_Name')
+        if not isinstance(project, dict):
+            return None
+        unit_name = vals.pop('name', None) or record.get('Product_Name')
+        if not project.get('id') or not project.get('name') or not unit_name or not vals.get('x_zoho_id'):
+            return None
+        unit = {'project_id': project['id'], 'project': project['name'], 'name': unit_name}
+        if 'list_price' in vals:
+            # Written on a variant, it would change the price of its whole template
+            unit['price'] = vals.pop('list_price') or 0.0
+        unit['template_vals'] = {name: vals.pop(name) for name in list(vals) if name in template_fields}
+        # Units sent by Zoho exist there: a unit, or project, restored in Zoho is unarchived
+        unit['template_vals']['active'] = True
+        vals['active'] = True
+        unit['vals'] = vals
+        return unit
 
+    def _write_zoho_unit_chunk(self, unit_list, spec):
+        """
+        Write a chunk of units: their values, templates, prices and variants.
+        :param unit_list: List of units from :meth:`_prepare_zoho_unit`
+        :param spec: Spec of the sync
+        :return: Dictionary with the ``created``, ``updated`` and ``unchanged`` counts
+        """
+        metrics = self._get_zoho_sync_metrics()
+        units = {}
+        projects = {}
+        for unit in unit_list:
+            units.setdefault(unit['project_id'], {})[unit['vals']['x_zoho_id']] = unit
+            projects[unit['project_id']] = unit['project']
 
-    def import_products(self):
+        with metrics.timer('orm_time'):
+            template_ids, attribute_ids = self._get_unit_templates(projects)
+            missing = [project_id for project_id in projects if project_id not in attribute_ids]
+            if missing:
+                attribute_names = self._get_or_create_by_name(
+                    'product.attribute', list({projects[project_id] for project_id in missing}))
+                attribute_ids.update({project_id: attribute_names[projects[project_id]] for project_id in missing})
+            value_ids, created = self._get_or_create_unit_values(units, attribute_ids)
+            self._set_unit_attribute_lines(units, projects, template_ids, attribute_ids, value_ids)
+            self._set_unit_template_values(units, template_ids)
+            variants = self._get_unit_variants(template_ids.values(), value_ids.values())
+            self._set_unit_prices(units, attribute_ids, value_ids, template_ids, variants)
+        metrics.add('records_created', created)
+
+        id_map = {}
+        vals_list = []
+        for project_id, project_units in units.items():
+            template_id = template_ids[project_id]
+            for zoho_id, unit in project_units.items():
+                variant = variants.get((template_id, value_ids[attribute_ids[project_id], zoho_id]))
+                if not variant:
+                    metrics.add('records_skipped')
+                    continue
+                id_map[zoho_id] = variant['variant_id']
+                vals_list.append(unit['vals'])
+        result = self._zoho_bulk_upsert('product.product', spec['key'], vals_list, id_map=id_map,
+                                        hash_field=spec.get('hash_field'))
+        return {'created': created, 'updated': result['updated'], 'unchanged': result['unchanged']}
+
+    def _get_or_create_by_name(self, model_name, names):
         """
-        Import products from Zoho CRM and organize them as variants under a parent product.
+        Find the records of a model by name with one query, creating the missing ones at once.
+        :param model_name: Name of the Odoo model
+        :param names: List of record names
+        :return: Dictionary mapping every name to its record id
+        """
+        model = self.env[model_name].with_context(active_test=False)
+        ids = {}
+        for row in model.search_read([('name', 'in', names)], ['name'], order='id'):
+            ids.setdefault(row['name'], row['id'])
+        missing = [name for name in names if name not in ids]
+        if missing:
+            for record, name in zip(model.create([{'name': name} for name in missing]), missing):
+                ids[name] = record.id
+        return ids
+
+    def _get_or_create_unit_values(self, units, attribute_ids):
+        """
+        Resolve the attribute value of every unit with one query and one batched create.
+
+        Values are matched on the Zoho id of their unit. A value created before
+        values were keyed, with the unit name and no Zoho id, is claimed by the
+        unit. Renamed units rename their value. Two units of a project sharing a
+        name are told apart by adding the Zoho id to the name of the later one,
+        since value names are unique per attribute.
+        :param units: Units grouped by project and Zoho id, see :meth:`_write_zoho_unit_chunk`
+        :param attribute_ids: Dictionary mapping project Zoho ids to their attribute id
+        :return: Tuple of the ``{(attribute id, Zoho id): value id}`` map and the
+            number of values created
+        """
+        Value = self.env['product.attribute.value'].with_context(active_test=False)
+        zoho_ids = [zoho_id for project_units in units.values() for zoho_id in project_units]
+        names = list({unit['name'] for project_units in units.values() for unit in project_units.values()})
+        value_ids = {}
+        names_by_id = {}
+        holders = {}
+        for row in Value.search_read([
+            ('attribute_id', 'in', list(attribute_ids.values())),
+            '|', ('x_zoho_id', 'in', zoho_ids), ('name', 'in', names),
+        ], ['name', 'attribute_id', 'x_zoho_id'], order='id'):
+            attribute_id = row['attribute_id'][0]
+            if row['x_zoho_id']:
+                value_ids.setdefault((attribute_id, row['x_zoho_id']), row['id'])
+            names_by_id[row['id']] = row['name']
+            holders.setdefault((attribute_id, row['name']), row)
+
+        missing = []
+        for project_id, project_units in units.items():
+            attribute_id = attribute_ids[project_id]
+            for zoho_id, unit in project_units.items():
+                value_id = value_ids.get((attribute_id, zoho_id))
+                holder = holders.get((attribute_id, unit['name']))
+                if not value_id and holder and not holder['x_zoho_id']:
+                    # Value of the unit created before values were keyed by Zoho id
+                    Value.browse(holder['id']).write({'x_zoho_id': zoho_id})
+                    holder['x_zoho_id'] = zoho_id
+                    value_ids[attribute_id, zoho_id] = holder['id']
+                    continue
+                name = unit['name']
+                if holder and holder['id'] != value_id:
+                    name = f"{unit['name']} ({zoho_id})"
+                if not value_id:
+                    missing.append((attribute_id, zoho_id, name))
+                elif names_by_id[value_id] != name:
+                    Value.browse(value_id).write({'name': name})
+                holders.setdefault((attribute_id, name), {'id': value_id, 'x_zoho_id': zoho_id})
+        if missing:
+            created = Value.create([{'attribute_id': attribute_id, 'name': name, 'x_zoho_id': zoho_id}
+                                    for attribute_id, zoho_id, name in missing])
+            for value, (attribute_id, zoho_id, _name) in zip(created, missing):
+                value_ids[attribute_id, zoho_id] = value.id
+        return value_ids, len(missing)
+
+    def _get_unit_templates(self, projects):
+        """
+        Find the template and the attribute of every project of a chunk.
+
+        Templates are matched on the Zoho id of their project. A template created
+        before templates were linked to their project, named after the project and
+        holding a line of the attribute of the same name, is claimed by the project.
+        The attribute of a project is the one of its template line named after the
+        template, else the only line of a linked template, and a renamed project
+        renames both.
+        :param projects: Dictionary mapping project Zoho ids to their name
+        :return: Tuple of the dictionaries mapping project Zoho ids to their
+            template id and to their attribute id, for the projects having them
+        """
+        Template = self.env['product.template'].with_context(active_test=False)
+        Line = self.env['product.template.attribute.line'].with_context(active_test=False)
+        rows = Template.search_read([
+            '|', ('x_zoho_project_id', 'in', list(projects)),
+            '&', ('x_zoho_project_id', '=', False), ('name', 'in', list(set(projects.values()))),
+        ], ['name', 'x_zoho_project_id'], order='id')
+        template_attributes = {}
+        for line in Line.search_read([('product_tmpl_id', 'in', [row['id'] for row in rows])],
+                                     ['product_tmpl_id', 'attribute_id'], order='id'):
+            template_attributes.setdefault(line['product_tmpl_id'][0], []).append(line['attribute_id'])
+        project_attributes = {}
+        for row in rows:
+            attributes = template_attributes.get(row['id'], [])
+            named = [attribute_id for attribute_id, name in attributes if name == row['name']]
+            if named:
+                project_attributes[row['id']] = named[0]
+            elif row['x_zoho_project_id'] and len(attributes) == 1:
+                # Template renamed in Odoo: its only line still holds the units of the project
+                project_attributes[row['id']] = attributes[0][0]
+        linked = {}
+        legacy = {}
+        for row in rows:
+            if row['x_zoho_project_id']:
+                linked.setdefault(row['x_zoho_project_id'], row)
+            elif row['id'] in project_attributes:
+                legacy.setdefault(row['name'], row)
+
+        template_ids = {}
+        attribute_ids = {}
+        for project_id, project_name in projects.items():
+            row = linked.get(project_id) or legacy.pop(project_name, None)
+            if not row:
+                continue
+            template = Template.browse(row['id'])
+            if not row['x_zoho_project_id']:
+                # Template of the project created before templates were linked by Zoho id
+                template.write({'x_zoho_project_id': project_id})
+            attribute_id = project_attributes.get(row['id'])
+            if row['name'] != project_name:
+                template.write({'name': project_name})
+                if attribute_id:
+                    self.env['product.attribute'].browse(attribute_id).write({'name': project_name})
+            template_ids[project_id] = row['id']
+            if attribute_id:
+                attribute_ids[project_id] = attribute_id
+        return template_ids, attribute_ids
+
+    def _set_unit_attribute_lines(self, units, projects, template_ids, attribute_ids, value_ids):
+        """
+        Give every project template one attribute line holding all of its units.
+
+        Missing templates are created at once with their line, existing lines get
+        their missing values in a single write and missing lines are created in one
+        batch, so the variants of every template are generated once.
+        :param units: Units grouped by project and Zoho id, see :meth:`_write_zoho_unit_chunk`
+        :param projects: Dictionary mapping project Zoho ids to their name
+        :param template_ids: Dictionary mapping project Zoho ids to their template id,
+            completed with the created templates
+        :param attribute_ids: Dictionary mapping project Zoho ids to their attribute id
+        :param value_ids: Dictionary mapping ``(attribute id, Zoho id)`` to value ids
+        """
+        Template = self.env['product.template'].with_context(active_test=False)
+        Line = self.env['product.template.attribute.line'].with_context(active_test=False)
+        lines = {}
+        for row in Line.search_read([('product_tmpl_id', 'in', list(template_ids.values())),
+                                     ('attribute_id', 'in', list(attribute_ids.values()))],
+                                    ['product_tmpl_id', 'attribute_id', 'value_ids']):
+            lines[row['product_tmpl_id'][0], row['attribute_id'][0]] = row
+
+        projects_to_create = []
+        templates_to_create = []
+        lines_to_create = []
+        for project_id, project_units in units.items():
+            attribute_id = attribute_ids[project_id]
+            unit_value_ids = [value_ids[attribute_id, zoho_id] for zoho_id in project_units]
+            template_id = template_ids.get(project_id)
+            line = lines.get((template_id, attribute_id))
+            if not template_id:
+                projects_to_create.append(project_id)
+                templates_to_create.append({
+                    'name': projects[project_id],
+                    'x_zoho_project_id': project_id,
+                    'attribute_line_ids': [Command.create({
+                        'attribute_id': attribute_id,
+                        'value_ids': [Command.set(unit_value_ids)],
+                    })],
+                })
+            elif not line:
+                lines_to_create.append({
+                    'product_tmpl_id': template_id,
+                    'attribute_id': attribute_id,
+                    'value_ids': [Command.set(unit_value_ids)],
+                })
+            else:
+                missing = set(unit_value_ids) - set(line['value_ids'])
+                if missing:
+                    Line.browse(line['id']).write({'value_ids': [Command.link(value_id) for value_id in missing]})
+        if lines_to_create:
+            Line.create(lines_to_create)
+        if templates_to_create:
+            for template, project_id in zip(Template.create(templates_to_create), projects_to_create):
+                template_ids[project_id] = template.id
+
+    def _set_unit_template_values(self, units, template_ids):
+        """
+        Write the mapped template fields, and unarchive, once per project template, if they changed.
+
+        The units of a project share their template: the values of the last unit
+        of the chunk win.
+        :param units: Units grouped by project and Zoho id, see :meth:`_write_zoho_unit_chunk`
+        :param template_ids: Dictionary mapping project Zoho ids to their template id
+        """
+        vals_by_id = {}
+        for project_id, project_units in units.items():
+            template_vals = {}
+            for unit in project_units.values():
+                template_vals.update(unit['template_vals'])
+            if template_vals:
+                vals_by_id[template_ids[project_id]] = template_vals
+        if not vals_by_id:
+            return
+        Template = self.env['product.template'].with_context(active_test=False)
+        for template_id, vals in self._zoho_changed_values(Template.browse(list(vals_by_id)), vals_by_id).items():
+            if vals:
+                Template.browse(template_id).write(vals)
+
+    def _get_unit_variants(self, template_ids, value_ids):
+        """
+        Load the variant of every unit with one query on the template attribute values.
+        :param template_ids: Ids of the project templates
+        :param value_ids: Ids of the attribute values of the units
+        :return: Dictionary mapping ``(template id, value id)`` to a dictionary with
+            the ``ptav_id``, ``variant_id`` and ``price_extra`` of the unit
+        """
+        variants = {}
+        # Archived variants too, so units restored in Zoho are unarchived
+        PTAV = self.env['product.template.attribute.value'].with_context(active_test=False)
+        for row in PTAV.search_read([
+            ('product_tmpl_id', 'in', list(template_ids)),
+            ('product_attribute_value_id', 'in', list(value_ids)),
+            ('ptav_active', '=', True),
+        ], ['product_tmpl_id', 'product_attribute_value_id', 'ptav_product_variant_ids', 'price_extra']):
+            if row['ptav_product_variant_ids']:
+                variants[row['product_tmpl_id'][0], row['product_attribute_value_id'][0]] = {
+                    'ptav_id': row['id'],
+                    'variant_id': row['ptav_product_variant_ids'][0],
+                    'price_extra': row['price_extra'],
+                }
+        return variants
+
+    def _set_unit_prices(self, units, attribute_ids, value_ids, template_ids, variants):
+        """
+        Set the Zoho unit price as the price extra of every unit, in one write per price.
+        """
+        ptav_ids_by_price = {}
+        for project_id, project_units in units.items():
+            for zoho_id, unit in project_units.items():
+                if 'price' not in unit:
+                    continue
+                variant = variants.get((template_ids[project_id], value_ids[attribute_ids[project_id], zoho_id]))
+                if variant and variant['price_extra'] != unit['price']:
+                    ptav_ids_by_price.setdefault(unit['price'], []).append(variant['ptav_id'])
+        PTAV = self.env['product.template.attribute.value']
+        for price, ptav_ids in ptav_ids_by_price.items():
+            PTAV.browse(ptav_ids).write({'price_extra': price})
+
+    def _archive_zoho_units(self, variants):
+        """
+        Take the units deleted in Zoho off the attribute line of their project.
+
+        An archived variant whose value stays on the line would be reactivated the
+        next time the variants of its template are generated, so the values of the
+        units are removed from their line, with one write per line. A project
+        losing its last unit has its template archived instead, as a line needs
+        at least one value.
+        :param variants: Archived variants of the deleted units
         """
-        start_time = datetime.now()
-        initiated_at = start_time
-        # Step 1: Fetch all fields for the Products module from Zoho
-        all_fields = self.fetch_zoho_fields("Products")
-        if not all_fields:
-            raise UserError(_("No fields available to fetch products."))
-
-        # Batch size for Zoho API requests
-        batch_size = 50
-        products_combined = []
-
-        # Step 2: Fetch and combine product data from Zoho in batches
-        for i in range(0, len(all_fields), batch_size):
-            fields_batch = all_fields[i:i + batch_size]
-            print(f"Fetching batch: {fields_batch}")
-            page = 1
-
-            while True:
-                print(f"Fetching page {page} for fields batch")
-                batch_products, more_records = self.fetch_products_page(fields_batch, page)
-
-                # Merge product data from this batch with existing data
-                for product in batch_products:
-                    product_id = product.get('id')
-                    existing_product = next((p for p in products_combined if p.get('id') == product_id), None)
-
-                    if existing_product:
-                        existing_product.update(product)
-                    else:
-                        products_combined.append(product)
-
-                if not more_records:
-                    break
-                page += 1
-
-        print(f"Total products fetched: {len(products_combined)}")
-        print(products_combined)
-        # parent_product_name = ''
-        # for product in products_combined:
-        #     parent_ = product.get('Project_Name')
-        #     parent_product_name =parent_.get('name')
-        # print(parent_product_name)
-        #
-        # parent_product = self.env['product.template'].search([('name', '=', parent_product_name)], limit=1)
-        # if not parent_product:
-        #     parent_product = self.env['product.template'].create({
-        #         'name': parent_product_name,
-        #     })
-        #     print(f"Created parent product: {parent_product_name}")
-        # else:
-        #     print(f"Parent product already exists: {parent_product_name}")
-        #
-        # # Step 4: Fetch or create the "Variant" attribute
-        # attribute = self.env['product.attribute'].search([('name', '=', "Rove Home Dubai Marina")], limit=1)
-        # if not attribute:
-        #     attribute = self.env['product.attribute'].create({'name': "Rove Home Dubai Marina"})
-        #     print(f"Created attribute: Variant")
-        #
-        # # Step 5: Process each product as a variant
-        # for product in products_combined:
-        #     product_name = product.get('Product_Name')
-        #     product_code = product.get('Product_Code')
-        #     description = product.get('Description')
-        #
-        #     # Fetch or create the attribute value
-        #     attribute_value = self.env['product.attribute.value'].search([
-        #         ('name', '=', product_name),
-        #         ('attribute_id', '=', attribute.id)
-        #     ], limit=1)
-        #
-        #     if not attribute_value:
-        #         attribute_value = self.env['product.attribute.value'].create({
-        #             'name': product_name,
-        #             'attribute_id': attribute.id,
-        #         })
-        #         print(f"Created attribute value: {product_name}")
-        #     else:
-        #         print(f"Attribute value already exists: {product_name}")
-        #
-        #     # Check if the attribute line exists for the parent product
-        #     attribute_line = parent_product.attribute_line_ids.filtered(
-        #         lambda line: line.attribute_id.id == attribute.id)
-        #     if not attribute_line:
-        #         # Create a new attribute line with the attribute and value
-        #         attribute_line = self.env['product.template.attribute.line'].create({
-        #             'product_tmpl_id': parent_product.id,
-        #             'attribute_id': attribute.id,
-        #             'value_ids': [(4, attribute_value.id)],
-        #         })
-        #         print(f"Created attribute line with value: {product_name}")
-        #     else:
-        #         # Add the new value to the existing attribute line
-        #         attribute_line.write({'value_ids': [(4, attribute_value.id)]})
-        #         print(f"Updated attribute line with value: {product_name}")
-        #
-        # print(f"Successfully imported products and set up variants for {parent_product_name}.")
\ No newline at end of file
+        PTAV = self.env['product.template.attribute.value'].with_context(active_test=False)
+        values_by_line = {}
+        for row in PTAV.search_read([
+            ('ptav_product_variant_ids', 'in', variants.ids),
+            ('product_attribute_value_id.x_zoho_id', '!=', False),
+        ], ['attribute_line_id', 'product_attribute_value_id']):
+            values_by_line.setdefault(row['attribute_line_id'][0], set()).add(row['product_attribute_value_id'][0])
+        if not values_by_line:
+            return
+        Line = self.env['product.template.attribute.line'].with_context(active_test=False)
+        templates = self.env['product.template']
+        for line in Line.browse(list(values_by_line)):
+            value_ids = values_by_line[line.id]
+            if set(line.value_ids.ids) <= value_ids:
+                templates |= line.product_tmpl_id
+            else:
+                line.write({'value_ids': [Command.unlink(value_id) for value_id in value_ids]})
+        if templates:
+            templates.write({'active': False})
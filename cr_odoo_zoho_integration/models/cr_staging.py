@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import logging
+import psycopg2
+from odoo import models, fields, _
+from .cr_sync_job import REPLAY_JOB_PREFIX
+from .cr_zoho_staged_record import decode_payload, encode_payload
+
+_logger = logging.getLogger(__name__)
+
+
+class ZohoStaging(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Payload Staging'
+
+    cr_stage_payloads = fields.Boolean(
+        string="Stage Zoho Payloads",
+        help="Store every fetched Zoho record before transforming it, so a mapping fix or a "
+             "failed transform can be replayed from the staging table without fetching again")
+    cr_staged_record_count = fields.Integer(string="Staged Records", compute='_compute_staged_record_count')
+
+    def _compute_staged_record_count(self):
+        counts = dict(self.env['cr.zoho.staged.record']._read_group(
+            [('cr_configuration_id', 'in', self.ids)], ['cr_configuration_id'], ['__count']))
+        for config in self:
+            config.cr_staged_record_count = counts.get(config, 0)
+
+    def _stage_zoho_page(self, module, page_records, fetched_at):
+        """
+        Store a page of Zoho records in the staging table with one statement.
+
+        A record is keyed by its Modified_Time: fetching a version already staged
+        only refreshes its fetch time, and older versions of the records are dropped.
+        :param module: API name of the Zoho module
+        :param page_records: List of Zoho records
+        :param fetched_at: Fetch time stored on the records
+        """
+        if not page_records:
+            return
+        params = {
+            'config': self.id,
+            'module': module,
+            'ids': [str(record['id']) for record in page_records],
+            'times': [record.get('Modified_Time') or '' for record in page_records],
+            'payloads': [psycopg2.Binary(encode_payload(record)) for record in page_records],
+            'now': fetched_at,
+            'uid': self.env.uid,
+        }
+        self.env.cr.execute("""
+            INSERT INTO cr_zoho_staged_record (cr_configuration_id, cr_module, cr_zoho_id, cr_modified_time,
+                                               cr_payload, cr_fetched_at,
+                                               create_uid, create_date, write_uid, write_date)
+            SELECT %(config)s, %(module)s, zoho_id, modified_time, payload, %(now)s,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(ids)s::varchar[], %(times)s::varchar[], %(payloads)s::bytea[])
+                AS staged(zoho_id, modified_time, payload)
+            ON CONFLICT (cr_configuration_id, cr_module, cr_zoho_id, cr_modified_time)
+            DO UPDATE SET cr_fetched_at = EXCLUDED.cr_fetched_at, write_date = EXCLUDED.write_date
+        """, params)
+        self.env.cr.execute("""
+            DELETE FROM cr_zoho_staged_record record
+             USING unnest(%(ids)s::varchar[], %(times)s::varchar[]) AS staged(zoho_id, modified_time)
+             WHERE record.cr_configuration_id = %(config)s AND record.cr_module = %(module)s
+               AND record.cr_zoho_id = staged.zoho_id AND record.cr_modified_time != staged.modified_time
+        """, params)
+
+    def _fetch_and_stage_zoho_pages(self, module, field_names, modified_since, cursor, ids=None, coql_filters=None,
+                                    bulk_read=True):
+        """
+        Fetch stage of a staged sync: store every fetched page, then yield the
+        records of the run back from the staging table.
+
+        The fetch is committed and checkpointed page by page. A job resuming after
+        the fetch stage completed goes straight to the transform stage, from the
+        last staged record it had written.
+        :param module: API name of the Zoho module
+        :param field_names: Field api names to fetch; Modified_Time is added
+        :param modified_since: Only fetch records modified after this datetime
+        :param cursor: Checkpoint cursor of the sync job
+        :param ids: Optional list of Zoho record ids to fetch
+        :param coql_filters: Optional COQL filters, see :meth:`_iter_zoho_pages`
+        :param bulk_read: Allow the Bulk Read engine, see :meth:`_iter_zoho_pages`
+        :return: Generator of lists of staged Zoho records, one list per page
+        """
+        if not cursor.get('staged'):
+            job = self._get_zoho_sync_job()
+            fetched_at = fields.Datetime.now()
+            cursor.setdefault('staged_since', fields.Datetime.to_string(fetched_at))
+            if 'Modified_Time' not in field_names:
+                field_names = list(field_names) + ['Modified_Time']
+            pages = self._iter_zoho_pages(module, field_names, modified_since=modified_since,
+                                          cursor=cursor.setdefault('fetch', {}), ids=ids,
+                                          coql_filters=coql_filters, bulk_read=bulk_read)
+            for page_records in pages:
+                self._stage_zoho_page(module, page_records, fetched_at)
+                if job:
+                    job._save_checkpoint({'cursor': cursor}, 0)
+                else:
+                    self._zoho_commit()
+            cursor['staged'] = True
+        return self._iter_staged_pages(module, since=cursor['staged_since'], cursor=cursor)
+
+    def _iter_staged_pages(self, module, since=None, cursor=None, page_size=200):
+        """
+        Read the staged records of a module in batches, in staging order.
+        :param module: API name of the Zoho module
+        :param since: Only read the records fetched from this datetime on
+        :param cursor: Optional cursor holding the last ``staged_id`` read, kept up to date
+        :param page_size: Number of records per batch
+        :return: Generator of lists of Zoho records
+        """
+        last_id = (cursor or {}).get('staged_id', 0)
+        while True:
+            self.env.cr.execute("""
+                SELECT id, cr_payload FROM cr_zoho_staged_record
+                 WHERE cr_configuration_id = %s AND cr_module = %s AND id > %s
+                   AND (%s::timestamp IS NULL OR cr_fetched_at >= %s::timestamp)
+                 ORDER BY id
+                 LIMIT %s
+            """, [self.id, module, last_id, since, since, page_size])
+            rows = self.env.cr.fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            if cursor is not None:
+                cursor['staged_id'] = last_id
+            yield [decode_payload(payload) for _id, payload in rows]
+
+    def _replay_zoho_sync(self, sync_type):
+        """
+        Transform stage alone: write every staged record of a module again with the
+        current mapping, without calling Zoho.
+
+        Run as a background job, the replay is checkpointed like a sync and resumes
+        after the last staged record written.
+        :param sync_type: Key of ZOHO_SYNC_MODULES
+        :return: Dictionary with the ``created`` and ``updated`` counts
+        """
+        self.ensure_one()
+        spec = self._get_zoho_sync_spec(sync_type)
+        mapping = self._compile_zoho_sync_mapping(sync_type)
+        cursor = self._get_zoho_checkpoint().get('cursor', {})
+        result = self._write_zoho_sync_pages(spec, self._iter_staged_pages(spec['module'], cursor=cursor),
+                                             mapping, cursor)
+        _logger.info("%s replayed, created: %s, updated: %s, unchanged: %s", spec['label'],
+                     result.get('created', 0), result.get('updated', 0), result.get('unchanged', 0))
+        return result
+
+    def action_replay_zoho_sync(self):
+        """
+        Queue the replay of the sync given by the ``zoho_sync_type`` context key from the
+        staging table, as a background job logging its success or failure.
+        """
+        self.ensure_one()
+        sync_type = self.env.context.get('zoho_sync_type')
+        self.env['cr.zoho.sync.job']._enqueue(self, REPLAY_JOB_PREFIX + sync_type)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Zoho Sync"),
+                'message': _("%s replay from the staging table queued; its progress is shown in the "
+                             "Sync Jobs tab.") % self._get_zoho_sync_spec(sync_type)['label'],
+                'type': 'info',
+            },
+        }
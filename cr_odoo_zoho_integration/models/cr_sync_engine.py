@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import logging
+from odoo import models
+from ..tools.sync_metrics import SyncMetrics
+
+_logger = logging.getLogger(__name__)
+
+# Zoho modules synced by the generic engine, by sync type:
+#   label: Name of the sync shown to users
+#   module: API name of the Zoho CRM module
+#   model: Odoo model the records are written to
+#   key: Field of ``model`` matching Zoho records with Odoo records; when it is
+#       ``x_zoho_id`` the Zoho record id is written to it
+#   fallback_key: Optional field matching records imported before they had a key
+#   hash_field: Optional field of ``model`` storing the hash of the values last
+#       written, so records whose Zoho data did not change are not rewritten
+#   extra_fields: Zoho fields needed by ``prepare`` besides the mapped ones
+#   lookups: {argument of prepare: (model, key field)} maps built once per run
+#   coql: {Zoho field: (model, key field)} filters applied in Zoho when the COQL
+#       engine is selected, keeping the records whose field value is a key of the
+#       model; ``{}`` allows COQL without filters. Syncs without it use the REST API,
+#       e.g. because COQL only returns the id of lookup fields.
+#   prepare: zoho.config method ``(record, mapping, **lookups) -> values or None``
+#   bulk_read: False when ``prepare`` or ``writer`` read the name of a lookup
+#       field, which Bulk Read exports only give the id of; such syncs, like the
+#       ones mapping a lookup name, are fetched with the REST API instead
+#   writer: zoho.config method ``(spec, pages, mapping, cursor) -> result`` writing
+#       the pages itself instead of the bulk upsert
+#   archive: zoho.config method ``(records)`` run once records deleted in Zoho were
+#       archived, for models needing more than their ``active`` flag
+ZOHO_SYNC_MODULES = {
+    'contacts': {
+        'label': 'Contacts',
+        'module': 'Contacts',
+        'model': 'res.partner',
+        'key': 'x_zoho_id',
+        'fallback_key': 'email',
+        'hash_field': 'x_zoho_hash',
+    },
+    'products': {
+        'label': 'Properties',
+        'module': 'Products',
+        'model': 'product.product',
+        'key': 'x_zoho_id',
+        'hash_field': 'x_zoho_hash',
+        'extra_fields': ['Project_Name'],
+        'bulk_read': False,
+        'writer': '_write_zoho_products',
+        'archive': '_archive_zoho_units',
+    },
+    'property_project': {
+        'label': 'Property Projects',
+        'module': 'Property_Project',
+        'model': 'project.project',
+        'key': 'x_zoho_id',
+        'hash_field': 'x_zoho_hash',
+        'extra_fields': ['Organisation_ID', 'Description_of_Land'],
+        'lookups': {'company_ids': ('res.company', 'external_org_id')},
+        'coql': {'Organisation_ID': ('res.company', 'external_org_id')},
+        'prepare': '_prepare_project_record',
+    },
+}
+
+
+class ZohoSyncEngine(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Sync Engine'
+
+    def _get_zoho_sync_spec(self, sync_type):
+        """Return the registered spec of a sync type, see ZOHO_SYNC_MODULES."""
+        return ZOHO_SYNC_MODULES[sync_type]
+
+    def _get_zoho_sync_type(self, module):
+        """
+        Return the sync type registered for a Zoho module.
+        :param module: API name of the Zoho CRM module, e.g. ``Contacts``
+        :return: Key of ZOHO_SYNC_MODULES, or None when the module is not synced
+        """
+        for sync_type, spec in ZOHO_SYNC_MODULES.items():
+            if spec['module'] == module:
+                return sync_type
+        return None
+
+    def _compile_zoho_sync_mapping(self, sync_type):
+        """
+        Compile the field mapping of a registered sync.
+        :param sync_type: Key of ZOHO_SYNC_MODULES
+        :return: CompiledMapping
+        """
+        spec = self._get_zoho_sync_spec(sync_type)
+        return self._compile_zoho_mapping(spec['module'], spec['model'], extra_fields=spec.get('extra_fields', ()))
+
+    def _prepare_zoho_values(self, record, mapping, spec):
+        """
+        Default conversion of a Zoho record into values of the target model.
+        :param record: Merged Zoho record
+        :param mapping: Compiled mapping of the module
+        :param spec: Spec of the sync
+        :return: Dictionary of values
+        """
+        vals = mapping.convert(record)
+        if spec.get('key') == 'x_zoho_id':
+            vals['x_zoho_id'] = record.get('id')
+        return vals
+
+    def _run_zoho_sync(self, sync_type, ids=None):
+        """
+        Run a registered sync: fetch, merge, transform and bulk-write one Zoho module.
+
+        Every sync gets the same pipeline: the configured fetch engine (paged REST,
+        parallel, Bulk Read or COQL), delta sync from the module watermark, pages merged
+        across field batches, and chunked upserts checkpointing the sync job.
+        When record ids are given, only those records are fetched and the module
+        watermark is left untouched.
+        Syncs with filters fully sync the module when a filter accepts a new value.
+        When payload staging is enabled, the fetched records are first stored in
+        the staging table, then transformed from it.
+        :param sync_type: Key of ZOHO_SYNC_MODULES
+        :param ids: Optional list of Zoho record ids to sync
+        :return: Dictionary with the ``fetched``, ``created`` and ``updated`` counts
+        """
+        self.ensure_one()
+        if not self.env.context.get('zoho_sync_metrics'):
+            # Outside of a sync job, still count the records of this run
+            return self.with_context(zoho_sync_metrics=SyncMetrics())._run_zoho_sync(sync_type, ids=ids)
+        spec = self._get_zoho_sync_spec(sync_type)
+        module = spec['module']
+        self._check_access_token()
+        synced_at = self._get_zoho_sync_start()
+        modified_since = self._get_sync_watermark(module) if ids is None else None
+        filter_values = self._get_zoho_sync_filter_values(spec) if ids is None else None
+        if modified_since and filter_values and self._has_new_sync_filter_values(module, filter_values):
+            # Records of a newly accepted value, e.g. a new organisation, were skipped
+            # until now and may not have changed since the watermark
+            modified_since = None
+
+        mapping = self._compile_zoho_sync_mapping(sync_type)
+        field_names = mapping.zoho_fields
+        cursor = self._get_zoho_checkpoint().get('cursor', {})
+        metrics = self._get_zoho_sync_metrics()
+        fetched_before = metrics.snapshot()['records_fetched']
+        coql_filters = self._get_zoho_coql_filters(spec)
+        bulk_read = spec.get('bulk_read', True) and not mapping.lookup_names
+        if self.cr_stage_payloads:
+            pages = self._fetch_and_stage_zoho_pages(module, field_names, modified_since, cursor, ids=ids,
+                                                     coql_filters=coql_filters, bulk_read=bulk_read)
+        else:
+            pages = self._iter_zoho_pages(module, field_names, modified_since=modified_since, cursor=cursor,
+                                          ids=ids, coql_filters=coql_filters, bulk_read=bulk_read)
+
+        result = self._write_zoho_sync_pages(spec, pages, mapping, cursor)
+        result = dict(result, fetched=metrics.snapshot()['records_fetched'] - fetched_before)
+        _logger.info("%s fetched: %s, created: %s, updated: %s, unchanged: %s", spec['label'], result['fetched'],
+                     result.get('created', 0), result.get('updated', 0), result.get('unchanged', 0))
+
+        # COQL runs nothing when a filter accepts no value: advancing the watermark
+        # would lose records
+        if ids is None and not (coql_filters and not all(coql_filters.values())):
+            self._set_sync_watermark(module, synced_at, filter_values=filter_values)
+        return result
+
+    def _write_zoho_sync_pages(self, spec, pages, mapping, cursor):
+        """
+        Transform pages of Zoho records and write them as configured by the sync spec.
+        :param spec: Spec of the sync
+        :param pages: Iterator of lists of Zoho records, fetched or staged
+        :param mapping: Compiled mapping of the module
+        :param cursor: Checkpoint cursor kept up to date by the page iterator
+        :return: Dictionary with the ``created`` and ``updated`` counts
+        """
+        if spec.get('writer'):
+            return getattr(self, spec['writer'])(spec, pages, mapping, cursor)
+        # Records sent by Zoho exist there: a record restored in Zoho is unarchived
+        restore = spec.get('key') == 'x_zoho_id' and 'active' in self.env[spec['model']]._fields
+        lookups = {
+            name: self._zoho_id_map(model_name, key_field)
+            for name, (model_name, key_field) in spec.get('lookups', {}).items()
+        }
+        if spec.get('prepare'):
+            prepare_method = getattr(self, spec['prepare'])
+
+            def prepare_values(record):
+                return prepare_method(record, mapping, **lookups)
+        else:
+            def prepare_values(record):
+                return self._prepare_zoho_values(record, mapping, spec)
+
+        def prepare(record):
+            vals = prepare_values(record)
+            if vals and restore:
+                vals['active'] = True
+            return vals
+
+        return self._upsert_zoho_pages(
+            pages, spec['model'], spec['key'], prepare, cursor,
+            id_map=self._zoho_id_map(spec['model'], spec['key']),
+            fallback_key=spec.get('fallback_key'), hash_field=spec.get('hash_field'))
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import json
+import logging
+import time
+from datetime import timedelta
+from odoo import models, fields, api
+from ..tools.rate_limit import ZohoRateLimitError
+from ..tools.sync_metrics import SyncMetrics
+from .cr_sync_engine import ZOHO_SYNC_MODULES
+
+_logger = logging.getLogger(__name__)
+
+# Job type: zoho.config method running the sync; the other job types are the
+# Zoho modules registered in ZOHO_SYNC_MODULES, run by the sync engine
+SYNC_JOB_METHODS = {
+    'organizations': 'fetch_zoho_organizations',
+    'deletions': 'sync_zoho_deletions',
+}
+# Job type: zoho.config method run for the company of the job, so that every
+# Zoho Books organization is synced by its own job
+COMPANY_JOB_METHODS = {
+    'books': '_sync_zoho_books',
+}
+# Prefix of the job types replaying a module of ZOHO_SYNC_MODULES from the staging table
+REPLAY_JOB_PREFIX = 'replay_'
+
+MAX_ATTEMPTS = 3
+# Delay before retrying a failed job, doubled with every failed attempt
+RETRY_BACKOFF = timedelta(minutes=5)
+# Delay before retrying a job paused by the rate limiter when Zoho gave no reset time
+RATE_LIMIT_RETRY_DELAY = timedelta(hours=1)
+# Time a job runs before yielding its worker to jobs of other configurations or organizations
+SYNC_TIME_SLICE = timedelta(minutes=10)
+# Advisory lock serializing the dispatch of jobs to the cron workers
+SYNC_DISPATCH_LOCK = 52842
+# Namespace of the session advisory locks held by the workers for the whole run
+# of their job; a running job whose lock is free was left by a dead worker
+SYNC_JOB_LEASE_LOCK = 52843
+# Jobs of the same dispatch group as {job}: same configuration and same organization
+SAME_DISPATCH_GROUP = """
+    {other}.cr_configuration_id = {job}.cr_configuration_id
+    AND {other}.cr_company_id IS NOT DISTINCT FROM {job}.cr_company_id
+"""
+# Lease of a job, seen from any connection of the database
+JOB_LEASE_HELD = """
+    EXISTS (SELECT 1 FROM pg_locks lease
+             WHERE lease.locktype = 'advisory' AND lease.granted
+               AND lease.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+               AND lease.classid = %(lease_lock)s AND lease.objid = {job}.id AND lease.objsubid = 2)
+"""
+
+
+class ZohoSyncPreempted(Exception):
+    """Raised at a checkpoint when a job has used its time slice and other configurations or organizations wait."""
+
+
+class ZohoSyncJob(models.Model):
+    _name = 'cr.zoho.sync.job'
+    _description = 'Zoho Sync Job'
+    _order = 'id desc'
+    _rec_name = 'cr_job_type'
+
+    cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True, ondelete='cascade')
+    cr_job_type = fields.Selection(selection='_selection_job_type', string='Sync', required=True)
+    cr_company_id = fields.Many2one('res.company', string='Organization', ondelete='cascade',
+                                    help="Company of the Zoho Books organization synced by the job")
+    cr_full_sync = fields.Boolean('Full Resync')
+    cr_priority = fields.Selection([
+        ('high', 'High'),
+        ('low', 'Low'),
+    ], string='Priority', default='high', required=True,
+        help="Low priority jobs are paused when the daily API credits fall under the reserve")
+    cr_scheduled_at = fields.Datetime('Not Before', help="The job is not started before this time")
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ], default='pending', required=True, index=True)
+    cr_attempts = fields.Integer('Attempts')
+    cr_records_done = fields.Integer('Records Processed')
+    cr_checkpoint = fields.Text('Checkpoint', help="Position the sync resumes from after a crash, as JSON")
+    cr_started_at = fields.Datetime('Started At', help="Start of the first attempt; used as the sync watermark")
+    cr_heartbeat = fields.Datetime('Last Progress')
+    cr_dispatched_at = fields.Datetime('Dispatched At', help="When the job last got a worker")
+    cr_finished_at = fields.Datetime('Finished At')
+    cr_error_message = fields.Text('Error Message')
+
+    @api.model
+    def _selection_job_type(self):
+        """
+        Job types: the organizations, deletion and Books syncs, every module of the sync
+        engine, and the replay from the staging table of the modules written to Odoo.
+        """
+        return [('organizations', 'Organizations'), ('deletions', 'Deleted Records'), ('books', 'Zoho Books')] + [
+            (sync_type, spec['label']) for sync_type, spec in ZOHO_SYNC_MODULES.items()
+        ] + [
+            (REPLAY_JOB_PREFIX + sync_type, "%s (Replay)" % spec['label'])
+            for sync_type, spec in ZOHO_SYNC_MODULES.items()
+        ]
+
+    @api.model
+    def _enqueue(self, config, job_type, full_sync=False, priority=None, company=None):
+        """
+        Queue a sync job, unless the same sync is already waiting or running.
+
+        A full resync is not covered by an incremental job: an incremental job that
+        has not started yet is turned into a full resync, otherwise a full resync
+        job is queued after it.
+        :param config: zoho.config record
+        :param job_type: Key of SYNC_JOB_METHODS, COMPANY_JOB_METHODS or ZOHO_SYNC_MODULES,
+            the latter prefixed with REPLAY_JOB_PREFIX to replay it from the staging table
+        :param full_sync: Ignore the sync watermark
+        :param priority: ``high`` or ``low``; full resyncs, which spend the most
+            API credits, default to low
+        :param company: Company the job syncs, for the job types of COMPANY_JOB_METHODS
+        :return: cr.zoho.sync.job record
+        """
+        jobs = self.search([
+            ('cr_configuration_id', '=', config.id),
+            ('cr_job_type', '=', job_type),
+            ('cr_company_id', '=', company.id if company else False),
+            ('state', 'in', ('pending', 'running')),
+        ])
+        job = jobs.filtered(lambda j: j.cr_full_sync or not full_sync)[:1]
+        if not job and full_sync:
+            job = jobs.filtered(lambda j: j.state == 'pending' and not j.cr_checkpoint)[:1]
+            job.write({'cr_full_sync': True, 'cr_priority': priority or 'low'})
+        if not job:
+            job = self.create({
+                'cr_configuration_id': config.id,
+                'cr_job_type': job_type,
+                'cr_company_id': company.id if company else False,
+                'cr_full_sync': full_sync,
+                'cr_priority': priority or ('low' if full_sync else 'high'),
+            })
+        self._trigger_workers()
+        return job
+
+    def _get_checkpoint(self):
+        """Return the saved checkpoint of the job as a dictionary."""
+        self.ensure_one()
+        return json.loads(self.cr_checkpoint) if self.cr_checkpoint else {}
+
+    def _save_checkpoint(self, checkpoint, records_done):
+        """
+        Save the position of the job and commit it with the records written so far.
+        :param checkpoint: JSON serializable dictionary describing where to resume
+        :param records_done: Number of records written since the previous checkpoint
+        """
+        self.ensure_one()
+        self.write({
+            'cr_checkpoint': json.dumps(checkpoint),
+            'cr_records_done': self.cr_records_done + records_done,
+            'cr_heartbeat': fields.Datetime.now(),
+        })
+        self.cr_configuration_id._zoho_commit()
+        self.cr_configuration_id._save_zoho_api_usage()
+        if self._should_yield():
+            raise ZohoSyncPreempted()
+
+    def action_cancel(self):
+        self.filtered(lambda j: j.state in ('pending', 'failed')).write({'state': 'cancelled'})
+
+    def action_retry(self):
+        self.filtered(lambda j: j.state in ('failed', 'cancelled')).write({
+            'state': 'pending',
+            'cr_attempts': 0,
+            'cr_scheduled_at': False,
+            'cr_error_message': False,
+        })
+        self._trigger_workers()
+
+    @api.model
+    def _acquire_next_job(self):
+        """
+        Lease the next job to run: a pending one that is due, or a running one whose
+        worker died.
+
+        A worker holds the lease of its job, a session advisory lock of its cursor,
+        for the whole run: commits do not release it, and it is freed as soon as the
+        worker's connection is gone. A running job is thus only taken over once its
+        worker died, however long it goes without a checkpoint, e.g. while a Bulk
+        Read job is polled.
+
+        Jobs are dispatched fairly between dispatch groups, a configuration and one
+        of its Zoho Books organizations, or the configuration alone for the CRM
+        syncs: a group never runs more jobs at once than the parallel job limit,
+        the organization jobs of a configuration are further capped by its
+        parallel organization limit, and among the jobs of the same priority,
+        the group that was served the longest time ago goes first. High priority
+        jobs go first.
+
+        The job is claimed on a dedicated READ COMMITTED cursor, serialized by an
+        advisory lock: every query then sees the jobs other workers claimed just
+        before, which the snapshot of the cron cursor, taken before the lock was
+        granted, would not. The claim is committed before the job runs, and the
+        cron cursor starts a new transaction to see it.
+        :return: cr.zoho.sync.job record, possibly empty
+        """
+        now = fields.Datetime.now()
+        job = self.browse()
+        with self.env.registry.cursor() as dispatch_cr:
+            if not self.env.registry.in_test_mode():
+                dispatch_cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            dispatch_cr.execute("SELECT pg_advisory_xact_lock(%s)", [SYNC_DISPATCH_LOCK])
+            dispatch_cr.execute(f"""
+                SELECT job.id, job.cr_configuration_id
+                  FROM cr_zoho_sync_job job
+                  JOIN zoho_config config ON config.id = job.cr_configuration_id
+                 WHERE ((job.state = 'pending' AND (job.cr_scheduled_at IS NULL OR job.cr_scheduled_at <= %(now)s))
+                     OR (job.state = 'running' AND NOT {JOB_LEASE_HELD.format(job='job')}))
+                   AND (SELECT count(*) FROM cr_zoho_sync_job running
+                         WHERE {SAME_DISPATCH_GROUP.format(other='running', job='job')}
+                           AND running.state = 'running' AND {JOB_LEASE_HELD.format(job='running')}
+                       ) < GREATEST(config.cr_max_parallel_jobs, 1)
+                   AND (job.cr_company_id IS NULL
+                     OR (SELECT count(*) FROM cr_zoho_sync_job running
+                          WHERE running.cr_configuration_id = job.cr_configuration_id
+                            AND running.cr_company_id IS NOT NULL
+                            AND running.state = 'running' AND {JOB_LEASE_HELD.format(job='running')}
+                        ) < GREATEST(config.cr_max_parallel_org_jobs, 1))
+                 ORDER BY job.cr_priority = 'low',
+                          (SELECT max(served.cr_dispatched_at) FROM cr_zoho_sync_job served
+                            WHERE {SAME_DISPATCH_GROUP.format(other='served', job='job')}) NULLS FIRST,
+                          job.id
+                 LIMIT 10
+                   FOR UPDATE OF job SKIP LOCKED
+            """, {'now': now, 'lease_lock': SYNC_JOB_LEASE_LOCK})
+            for job_id, config_id in dispatch_cr.fetchall():
+                # The lease is taken on the cron cursor, which runs the job; a job
+                # that just ended may still be leased by its worker: skip it
+                self.env.cr.execute("SELECT pg_try_advisory_lock(%s, %s)", [SYNC_JOB_LEASE_LOCK, job_id])
+                if not self.env.cr.fetchone()[0]:
+                    continue
+                dispatch_cr.execute("""
+                    UPDATE cr_zoho_sync_job SET state = 'running', cr_heartbeat = %s, cr_dispatched_at = %s
+                     WHERE id = %s
+                """, [now, now, job_id])
+                dispatch_cr.execute("UPDATE zoho_config SET cr_last_dispatch = %s WHERE id = %s", [now, config_id])
+                job = self.browse(job_id)
+                break
+        if job:
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        return job
+
+    def _release_lease(self):
+        """Release the lease taken on the job by :meth:`_acquire_next_job`."""
+        self.ensure_one()
+        self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", [SYNC_JOB_LEASE_LOCK, self.id])
+
+    def _should_yield(self):
+        """
+        Tell whether the running job has used its time slice while due jobs of other
+        dispatch groups, configurations or organizations, are waiting for a worker.
+
+        Only jobs able to resume from their checkpoint yield; Bulk Read exports
+        would start over.
+        """
+        self.ensure_one()
+        slice_end = self.env.context.get('zoho_sync_slice_end')
+        if not slice_end or time.monotonic() < slice_end or self.cr_configuration_id.cr_fetch_engine == 'bulk':
+            return False
+        now = fields.Datetime.now()
+        return bool(self.search_count([
+            ('state', '=', 'pending'),
+            '|', ('cr_configuration_id', '!=', self.cr_configuration_id.id),
+            ('cr_company_id', '!=', self.cr_company_id.id),
+            '|', ('cr_scheduled_at', '=', False), ('cr_scheduled_at', '<=', now),
+        ], limit=1))
+
+    @api.model
+    def _get_worker_crons(self, active_test=True):
+        """Return the crons running sync jobs: the base cron and its worker copies."""
+        base = self.env.ref('cr_odoo_zoho_integration.ir_cron_zoho_sync_jobs')
+        return self.env['ir.cron'].sudo().with_context(active_test=active_test).search([
+            ('model_id', '=', base.model_id.id),
+            ('code', '=', base.code),
+        ], order='id')
+
+    @api.model
+    def _set_worker_count(self, count):
+        """
+        Set how many cron workers run sync jobs in parallel.
+
+        Every worker is a copy of the base cron; Odoo runs each cron on one worker at
+        a time, so jobs of several configurations run in parallel, each on its own
+        cursor, with its own token and rate limiter.
+        :param count: Number of workers, at least one
+        """
+        base = self.env.ref('cr_odoo_zoho_integration.ir_cron_zoho_sync_jobs')
+        crons = self._get_worker_crons(active_test=False)
+        for number in range(len(crons) + 1, count + 1):
+            crons |= base.copy({'name': "%s (worker %s)" % (base.name, number)})
+        for index, cron in enumerate(crons):
+            cron.active = cron == base or index < count
+
+    @api.model
+    def _trigger_workers(self, at=None):
+        """Wake up every sync job worker, now or at the given time."""
+        for cron in self._get_worker_crons():
+            cron._trigger(at=at)
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Run the next queued sync job, and re-trigger the workers while jobs remain."""
+        job = self._acquire_next_job()
+        if not job:
+            return
+        try:
+            job._run()
+        finally:
+            job._release_lease()
+            job.cr_configuration_id._save_zoho_api_usage()
+        now = fields.Datetime.now()
+        if self.search_count([('state', '=', 'pending'), '|',
+                              ('cr_scheduled_at', '=', False), ('cr_scheduled_at', '<=', now)]):
+            self._trigger_workers()
+        for scheduled_at in set(self.search([('state', '=', 'pending'), ('cr_scheduled_at', '>', now)])
+                                .mapped('cr_scheduled_at')):
+            self._trigger_workers(at=scheduled_at)
+
+    def _run(self):
+        """
+        Run the sync of the job, resuming from its checkpoint when it was interrupted.
+
+        The sync method commits its own chunks and checkpoints; a failure rolls back
+        the current chunk only and the job is retried up to MAX_ATTEMPTS times,
+        after a delay doubling with every attempt.
+        A job stopped by the Zoho rate limits does not use up an attempt; it is
+        paused until the limit resets and then resumes from its checkpoint. A job
+        that used its time slice while other configurations or organizations wait
+        yields its worker the same way and resumes when dispatched again.
+        Every attempt is logged with its metrics in cr.data.processing.log.
+        """
+        self.ensure_one()
+        now = fields.Datetime.now()
+        self.write({
+            'state': 'running',
+            'cr_attempts': self.cr_attempts + 1,
+            'cr_started_at': self.cr_started_at or now,
+            'cr_heartbeat': now,
+            'cr_scheduled_at': False,
+            'cr_error_message': False,
+        })
+        self.cr_configuration_id._zoho_commit()
+
+        metrics = SyncMetrics()
+        config = self.cr_configuration_id.with_context(
+            zoho_sync_job_id=self.id,
+            zoho_full_sync=self.cr_full_sync,
+            zoho_sync_priority=self.cr_priority,
+            zoho_sync_metrics=metrics,
+            zoho_sync_slice_end=time.monotonic() + SYNC_TIME_SLICE.total_seconds(),
+        )
+        run_start = time.perf_counter()
+        error_message = ''
+        message = ''
+        try:
+            if self.cr_job_type in COMPANY_JOB_METHODS:
+                getattr(config, COMPANY_JOB_METHODS[self.cr_job_type])(self.cr_company_id)
+            elif self.cr_job_type in SYNC_JOB_METHODS:
+                getattr(config, SYNC_JOB_METHODS[self.cr_job_type])()
+            elif self.cr_job_type.startswith(REPLAY_JOB_PREFIX):
+                config._replay_zoho_sync(self.cr_job_type[len(REPLAY_JOB_PREFIX):])
+            else:
+                config._run_zoho_sync(self.cr_job_type)
+        except ZohoSyncPreempted:
+            message = "Time slice used, paused for the other configurations and organizations"
+            self.write({
+                'state': 'pending',
+                'cr_attempts': self.cr_attempts - 1,
+                'cr_heartbeat': fields.Datetime.now(),
+            })
+        except ZohoRateLimitError as e:
+            error_message = str(e)
+            _logger.warning("Zoho sync job %s (%s) paused by rate limits: %s", self.id, self.cr_job_type, e)
+            self.env.cr.rollback()
+            self.write({
+                'state': 'pending',
+                'cr_attempts': self.cr_attempts - 1,
+                'cr_scheduled_at': e.retry_at or fields.Datetime.now() + RATE_LIMIT_RETRY_DELAY,
+                'cr_error_message': str(e),
+                'cr_heartbeat': fields.Datetime.now(),
+            })
+        except Exception as e:
+            error_message = str(e)
+            _logger.exception("Zoho sync job %s (%s) failed", self.id, self.cr_job_type)
+            self.env.cr.rollback()
+            retry = self.cr_attempts < MAX_ATTEMPTS
+            self.write({
+                'state': 'pending' if retry else 'failed',
+                'cr_scheduled_at': retry and fields.Datetime.now() + RETRY_BACKOFF * 2 ** (self.cr_attempts - 1),
+                'cr_error_message': str(e),
+                'cr_heartbeat': fields.Datetime.now(),
+            })
+        else:
+            self.write({
+                'state': 'done',
+                'cr_checkpoint': False,
+                'cr_finished_at': fields.Datetime.now(),
+            })
+        name = dict(self._selection_job_type())[self.cr_job_type]
+        if self.cr_company_id:
+            name = "%s (%s)" % (name, self.cr_company_id.name)
+        self.env['cr.data.processing.log']._log_data_processing(
+            self.cr_configuration_id,
+            name,
+            'failure' if error_message else 'success',
+            now,
+            duration=time.perf_counter() - run_start,
+            metrics=metrics.snapshot(),
+            job=self,
+            error_message=error_message,
+            message=message,
+        )
+        self.cr_configuration_id._zoho_commit()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields, api
+from .cr_sync_engine import ZOHO_SYNC_MODULES
+
+
+class ZohoSyncOrchestrator(models.Model):
+    _inherit = 'zoho.config'
+    _description = 'Zoho Sync Orchestrator'
+
+    cr_max_parallel_jobs = fields.Integer(
+        string="Max Parallel Jobs", default=1,
+        help="Maximum number of sync jobs running at once for the CRM modules of this configuration, "
+             "and for each of its Zoho Books organizations, so that one large organization cannot "
+             "take every worker from the others")
+    cr_max_parallel_org_jobs = fields.Integer(
+        string="Max Parallel Organizations", default=4,
+        help="Maximum number of Zoho Books organizations of this configuration synced at once; "
+             "organizations only run in parallel with enough sync workers")
+    cr_last_dispatch = fields.Datetime(
+        string="Last Job Dispatched", readonly=True, copy=False,
+        help="When a job of this configuration last got a worker; the configuration served "
+             "the longest time ago goes first")
+    cr_sync_workers = fields.Integer(
+        string="Parallel Sync Workers", compute='_compute_sync_workers', inverse='_inverse_sync_workers',
+        help="Number of cron workers running sync jobs, shared by all configurations")
+
+    def _compute_sync_workers(self):
+        count = len(self.env['cr.zoho.sync.job']._get_worker_crons())
+        for config in self:
+            config.cr_sync_workers = count
+
+    def _inverse_sync_workers(self):
+        for config in self[:1]:
+            self.env['cr.zoho.sync.job']._set_worker_count(max(config.cr_sync_workers, 1))
+
+    @api.model
+    def _cron_queue_zoho_syncs(self):
+        """
+        Queue the incremental sync of every synced module, and of every Books
+        organization, for every configuration.
+        """
+        job_model = self.env['cr.zoho.sync.job']
+        for config in self.search([('cr_refresh_token', '!=', False)]):
+            job_model._enqueue(config, 'organizations')
+            for sync_type in ZOHO_SYNC_MODULES:
+                job_model._enqueue(config, sync_type)
+            job_model._enqueue(config, 'deletions')
+            config.sync_zoho_books()
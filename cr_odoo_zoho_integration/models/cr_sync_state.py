@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields
+
+
+class ZohoSyncState(models.Model):
+    _name = 'cr.zoho.sync.state'
+    _description = 'Zoho Sync Watermark'
+    _rec_name = 'cr_module'
+
+    cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True, ondelete='cascade')
+    cr_module = fields.Char('Zoho Module', required=True)
+    cr_last_sync = fields.Datetime('Last Successful Sync',
+                                   help="Start time of the last successful sync; the next incremental "
+                                        "sync only fetches records modified since then.")
+    cr_filter_values = fields.Text('Filter Values',
+                                   help="JSON of the filter values, e.g. organisations, the last successful "
+                                        "sync kept; records of values added since are fetched in full.")
+
+    _sql_constraints = [
+        ('config_module_uniq', 'unique(cr_configuration_id, cr_module)',
+         'Only one sync watermark per configuration and module is allowed.'),
+    ]
@@ -1,10 +1,56 @@
 # -*- coding: utf-8 -*-
 # Part of Creyox Technologies.
 
+import json
+import logging
+import psycopg2
 import requests
 from datetime import timedelta
-from odoo import models, fields, _
+from itertools import islice
+from odoo import api, models, fields, SUPERUSER_ID, _
 from odoo.exceptions import UserError
+from odoo.tools import mute_logger
+from odoo.tools.misc import consteq, hmac
+from ..tools.bulk_read import ZohoBulkRead, ZohoBulkReadError
+from ..tools.json_stream import READ_CHUNK_SIZE, decode_records_page
+from ..tools.page_fetch import iter_pages, iter_pages_parallel
+from ..tools.record_merge import ZohoRecordMerger
+from ..tools.sync_metrics import SyncMetrics
+from ..tools.token_cache import is_token_fresh, token_cache
+from ..tools.zoho_client import drain_rate_limiter_stats, get_zoho_client
+
+_logger = logging.getLogger(__name__)
+
+# Namespace of the PostgreSQL advisory locks serializing token refreshes
+TOKEN_REFRESH_LOCK = 52841
+# Maximum number of record ids Zoho CRM accepts in one ``ids=`` call
+ZOHO_IDS_PER_CALL = 100
+
+
+def _load_access_token(registry, config_id, stale_token):
+    """
+    Return a valid access token of a configuration, refreshing it if needed.
+
+    Runs in its own transactions so that it can be called from fetch threads and
+    never holds a lock in the caller's transaction. An advisory lock makes sure a
+    single worker refreshes the token at a time; the others wait for it and then
+    read the token it committed instead of refreshing it again.
+    :param registry: Registry of the database
+    :param config_id: ID of the zoho.config record
+    :param stale_token: Token Zoho rejected, which must not be returned again
+    :return: Tuple (access token, expiry as naive UTC datetime)
+    """
+    with registry.cursor() as lock_cr:
+        lock_cr.execute("SELECT pg_advisory_xact_lock(%s, %s)", [TOKEN_REFRESH_LOCK, config_id])
+        # Read the token in a transaction started after the lock was granted, so
+        # a token committed by the previous lock holder is visible
+        with registry.cursor() as cr:
+            config = api.Environment(cr, SUPERUSER_ID, {})['zoho.config'].browse(config_id)
+            token, expiry = config.cr_access_token, config.cr_token_expiry
+            if not is_token_fresh(token, expiry) or token == stale_token:
+                token, expiry = config._zoho_refresh_tokens()
+            return token, expiry
+
 
 class ZohoConfig(models.Model):
     _name = 'zoho.config'
@@ -18,20 +64,187 @@ class ZohoConfig(models.Model):
     cr_access_token = fields.Text(string="Access Token" )
     cr_refresh_token = fields.Text(string="Refresh Token")
     cr_token_expiry = fields.Datetime(string="Token Expiry" )
+    cr_api_domain = fields.Char(
+        string="API Domain", default="https://www.zohoapis.com", required=True,
+        help="Base URL of the Zoho CRM and Books APIs, e.g. https://www.zohoapis.eu for the EU "
+             "data center, or a local stub server for benchmarks")
+    cr_accounts_url = fields.Char(
+        string="Accounts URL", default="https://accounts.zoho.com", required=True,
+        help="Base URL of the Zoho OAuth server of your data center")
     cr_data_logs_ids = fields.One2many(
         "cr.data.processing.log", "cr_configuration_id", string="Logs"
     )
+    cr_sync_state_ids = fields.One2many(
+        "cr.zoho.sync.state", "cr_configuration_id", string="Sync Watermarks"
+    )
+    cr_field_metadata_ids = fields.One2many(
+        "cr.zoho.field.metadata", "cr_configuration_id", string="Field Metadata Cache"
+    )
+    cr_sync_job_ids = fields.One2many(
+        "cr.zoho.sync.job", "cr_configuration_id", string="Sync Jobs"
+    )
+    cr_field_mapping_ids = fields.One2many(
+        "cr.zoho.field.mapping", "cr_configuration_id", string="Field Mappings"
+    )
+    cr_metadata_ttl = fields.Integer(
+        string="Field Metadata TTL (hours)", default=24,
+        help="How long fetched Zoho field definitions are reused before being revalidated")
+    cr_connect_timeout = fields.Integer(string="Connect Timeout (s)", default=10,
+                                        help="Seconds to wait for a connection to the Zoho API")
+    cr_read_timeout = fields.Integer(string="Read Timeout (s)", default=60,
+                                     help="Seconds to wait for a Zoho API response")
+    cr_pool_size = fields.Integer(string="Connection Pool Size", default=10,
+                                  help="Maximum number of keep-alive connections kept open to Zoho")
+    cr_max_concurrent_calls = fields.Integer(
+        string="Max Concurrent Calls", default=5,
+        help="Maximum number of Zoho API calls in flight at once for this configuration, in each "
+             "Odoo worker process. Workers do not share the limit: keep it times the number of "
+             "workers running syncs under the concurrency limit of your Zoho CRM edition.")
+    cr_requests_per_minute = fields.Integer(
+        string="Requests per Minute", default=100,
+        help="Sustained rate of Zoho API calls; calls beyond it wait for their turn")
+    cr_max_retries = fields.Integer(
+        string="Max Retries", default=5,
+        help="How many times a throttled (429) call is retried, with exponential backoff")
+    cr_max_backoff = fields.Integer(
+        string="Max Backoff (s)", default=60,
+        help="Longest wait a sync sleeps through when Zoho throttles it. When Zoho asks to "
+             "wait longer, the sync job is rescheduled instead.")
+    cr_daily_api_credits = fields.Integer(
+        string="Daily API Credits",
+        help="API credits of your Zoho CRM edition per day. Leave empty to use the limit "
+             "reported by Zoho in the X-RATELIMIT-LIMIT header.")
+    cr_credit_reserve = fields.Integer(
+        string="Credit Reserve (%)", default=20,
+        help="Share of the daily API credits kept for high priority syncs; low priority "
+             "syncs are paused when the remaining credits fall under it")
+    # API usage of every worker, added up by _save_zoho_api_usage
+    cr_api_requests = fields.Integer(string="Requests Sent", readonly=True, copy=False)
+    cr_api_throttled = fields.Integer(string="Throttled Responses", readonly=True, copy=False)
+    cr_api_retries = fields.Integer(string="Retries", readonly=True, copy=False)
+    cr_api_refused = fields.Integer(string="Low Priority Calls Paused", readonly=True, copy=False)
+    cr_api_wait_seconds = fields.Float(string="Time Spent Waiting (s)", readonly=True, copy=False)
+    cr_api_credits_remaining = fields.Integer(
+        string="API Credits Remaining", readonly=True, copy=False,
+        help="Daily API credits left, as last reported by Zoho in the X-RATELIMIT-REMAINING header")
+    cr_api_usage_date = fields.Datetime(string="API Usage Updated On", readonly=True, copy=False)
+    cr_fetch_engine = fields.Selection(
+        [('rest', 'Paged REST API'), ('bulk', 'Bulk Read Jobs')],
+        string="Fetch Engine", default='rest', required=True,
+        help="Bulk Read exports large modules as zipped CSV jobs instead of 200-record pages. "
+             "COQL queries filter records in Zoho, so the syncs supporting it only download "
+             "the records kept in Odoo, 2,000 at a time.")
+    cr_bulk_poll_interval = fields.Integer(string="Bulk Job Poll Interval (s)", default=5)
+    cr_parallel_fetch = fields.Boolean(
+        string="Parallel Fetch",
+        help="Fetch pages and field batches concurrently, up to the maximum number of concurrent calls")
+
+    def _get_zoho_client(self):
+        """
+        Return the pooled Zoho API client of this configuration.
+
+        One client is kept per database and configuration in each worker, so all
+        fetchers reuse the same keep-alive connections.
+        :return: ZohoClient authenticating through the shared token cache
+        """
+        self.ensure_one()
+        client = get_zoho_client(
+            (self.env.cr.dbname, self.id),
+            timeout=(self.cr_connect_timeout or 10, self.cr_read_timeout or 60),
+            pool_size=max(self.cr_pool_size or 10, self.cr_max_concurrent_calls or 1),
+            max_concurrency=self.cr_max_concurrent_calls or 5,
+            rate_limit={
+                'requests_per_minute': self.cr_requests_per_minute or 100,
+                'burst': self.cr_max_concurrent_calls or 5,
+                'max_retries': self.cr_max_retries,
+                'max_backoff': self.cr_max_backoff or 60,
+                'daily_credits': self.cr_daily_api_credits,
+                'credit_reserve': self.cr_credit_reserve,
+            },
+        )
+        client.token_provider = self._zoho_token_provider()
+        return client
+
+    def _save_zoho_api_usage(self):
+        """
+        Add the API usage this worker counted since its previous save to the stored counters.
+
+        Rate limiters live in each worker process, so their counters are drained
+        into the configuration, where the usage of every worker adds up. The
+        update runs on its own READ COMMITTED cursor and is committed at once:
+        workers add to the same row without serialization failures, and the
+        transaction of the sync is left alone.
+        """
+        usage = []
+        for config in self:
+            stats = drain_rate_limiter_stats((config.env.cr.dbname, config.id))
+            if stats:
+                usage.append(dict(stats, id=config.id))
+        if not usage:
+            return
+        with self.env.registry.cursor() as cr:
+            if not self.env.registry.in_test_mode():
+                cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            for stats in usage:
+                cr.execute("""
+                    UPDATE zoho_config
+                       SET cr_api_requests = COALESCE(cr_api_requests, 0) + %(requests)s,
+                           cr_api_throttled = COALESCE(cr_api_throttled, 0) + %(throttled)s,
+                           cr_api_retries = COALESCE(cr_api_retries, 0) + %(retries)s,
+                           cr_api_refused = COALESCE(cr_api_refused, 0) + %(refused)s,
+                           cr_api_wait_seconds = COALESCE(cr_api_wait_seconds, 0) + %(wait_seconds)s,
+                           cr_api_credits_remaining = COALESCE(%(credits_remaining)s, cr_api_credits_remaining),
+                           cr_api_usage_date = now() at time zone 'UTC'
+                     WHERE id = %(id)s
+                """, stats)
+        self.invalidate_recordset(['cr_api_requests', 'cr_api_throttled', 'cr_api_retries', 'cr_api_refused',
+                                   'cr_api_wait_seconds', 'cr_api_credits_remaining', 'cr_api_usage_date'])
+
+    def _get_zoho_sync_metrics(self):
+        """
+        Return the metrics collector of the current sync run.
+
+        Outside of a sync job, a collector that is simply discarded is returned.
+        """
+        return self.env.context.get('zoho_sync_metrics') or SyncMetrics()
+
+    def _get_zoho_sync_priority(self):
+        """Return the API priority (``high`` or ``low``) of the current sync."""
+        return self.env.context.get('zoho_sync_priority') or 'high'
+
+    def _zoho_token_provider(self):
+        """
+        Build the access token provider of this configuration.
+
+        Tokens are served from the worker's in-memory cache and refreshed a few
+        minutes before they expire. The provider does not use this record's
+        environment, so it can be called from fetch worker threads.
+        :return: Callable ``(force=False, stale_token=None) -> access token``
+        """
+        self.ensure_one()
+        key = (self.env.cr.dbname, self.id)
+        registry = self.env.registry
+        config_id = self.id
+
+        def loader(stale_token):
+            return _load_access_token(registry, config_id, stale_token)
+
+        def provider(force=False, stale_token=None):
+            return token_cache.get(key, loader, force=force, stale_token=stale_token)
 
+        return provider
 
     def generate_auth_url(self):
         """Generate the authorization URL to get the grant token."""
-        auth_url = "https://accounts.zoho.com/oauth/v2/auth"
+        auth_url = self._get_zoho_accounts_url("oauth/v2/auth")
         params = {
-            "scope": "ZohoCRM.users.ALL,ZohoCRM.modules.ALL,ZohoCRM.modules.leads.ALL,ZohoCRM.modules.deals.ALL,ZohoCRM.settings.ALL,ZohoBooks.fullaccess.all",
+            "scope": "ZohoCRM.users.ALL,ZohoCRM.modules.ALL,ZohoCRM.modules.leads.ALL,ZohoCRM.settings.ALL,"
+                     "ZohoCRM.notifications.ALL,ZohoBooks.fullaccess.all",
             "client_id": self.cr_client_id,
             "response_type": "code",
             "access_type": "offline",
             "redirect_uri": self.cr_redirect_uri,
+            "state": self._get_zoho_auth_state(),
         }
         url= f"{auth_url}?{requests.compat.urlencode(params)}"
         return {
@@ -40,9 +253,32 @@ class ZohoConfig(models.Model):
             "target": "self",
         }
 
+    def _get_zoho_auth_state(self):
+        """
+        Return the OAuth ``state`` identifying this configuration in the auth callback.
+        :return: Configuration id signed with the database secret
+        """
+        self.ensure_one()
+        return f"{self.id}.{hmac(self.env(su=True), 'zoho-auth-state', self.id)}"
+
+    @api.model
+    def _get_config_from_auth_state(self, state):
+        """
+        Return the configuration an OAuth callback is for.
+        :param state: ``state`` sent back by Zoho, see :meth:`_get_zoho_auth_state`
+        :return: zoho.config record, empty when the state is missing or forged
+        """
+        config_id, _sep, signature = (state or '').partition('.')
+        if not config_id.isdigit():
+            return self.browse()
+        expected = hmac(self.env(su=True), 'zoho-auth-state', int(config_id))
+        if not consteq(signature, expected):
+            return self.browse()
+        return self.browse(int(config_id)).exists()
+
     def exchange_grant_token(self, grant_token):
         """Exchange grant token for access and refresh tokens."""
-        token_url = "https://accounts.zoho.com/oauth/v2/token"
+        token_url = self._get_zoho_accounts_url("oauth/v2/token")
         payload = {
             "grant_type": "authorization_code",
             "client_id": self.cr_client_id,
@@ -51,21 +287,38 @@ class ZohoConfig(models.Model):
             "code": grant_token,
         }
         try:
-            response = requests.post(token_url, data=payload)
+            response = self._get_zoho_client().post(token_url, data=payload, authenticate=False)
             response.raise_for_status()
             tokens = response.json()
-            print(tokens)
+            # Never log the tokens themselves
+            _logger.info("Zoho grant token exchanged for configuration %s, access token valid for %ss",
+                         self.id, tokens.get('expires_in', 3600))
             self.write({
                 'cr_access_token': tokens.get('access_token'),
                 'cr_refresh_token': tokens.get('refresh_token'),
                 'cr_token_expiry': fields.Datetime.now() + timedelta(seconds=tokens.get('expires_in', 3600)),
             })
+            token_cache.store((self.env.cr.dbname, self.id), self.cr_access_token, self.cr_token_expiry)
         except requests.RequestException as e:
             raise UserError(_("Error exchanging grant token: %s") % e)
 
     def refresh_access_token(self):
         """Refresh the access token using the refresh token."""
-        token_url = "https://accounts.zoho.com/oauth/v2/token"
+        for config in self:
+            key = (config.env.cr.dbname, config.id)
+            token_cache.invalidate(key)
+            config._zoho_token_provider()(force=True, stale_token=config.cr_access_token)
+        self.invalidate_recordset(['cr_access_token', 'cr_token_expiry'])
+
+    def _zoho_refresh_tokens(self):
+        """
+        Request a new access token from Zoho and store it on the configuration.
+
+        Callers must hold the token refresh lock, see ``_load_access_token``.
+        :return: Tuple (access token, expiry)
+        """
+        self.ensure_one()
+        token_url = self._get_zoho_accounts_url("oauth/v2/token")
         payload = {
             "grant_type": "refresh_token",
             "client_id": self.cr_client_id,
@@ -73,124 +326,397 @@ class ZohoConfig(models.Model):
             "refresh_token": self.cr_refresh_token,
         }
         try:
-            response = requests.post(token_url, data=payload)
+            response = self._get_zoho_client().post(token_url, data=payload, authenticate=False)
             response.raise_for_status()
             tokens = response.json()
-            print(tokens)
-            self.write({
-                'cr_access_token': tokens.get('access_token'),
-                'cr_token_expiry': fields.Datetime.now() + timedelta(seconds=tokens.get('expires_in', 3600)),
-            })
         except requests.RequestException as e:
             raise UserError(_("Error refreshing access token: %s") % e)
-    
-    def fetch_zoho_fields(self,module):
+        if not tokens.get('access_token'):
+            raise UserError(_("Error refreshing access token: %s") % tokens.get('error', tokens))
+        self.write({
+            'cr_access_token': tokens['access_token'],
+            'cr_token_expiry': fields.Datetime.now() + timedelta(seconds=tokens.get('expires_in', 3600)),
+        })
+        return self.cr_access_token, self.cr_token_expiry
+
+    def fetch_zoho_fields(self, module):
         """
-        Fetch available fields for the Contacts module from Zoho CRM.
+        Fetch the api names of the available fields of a Zoho CRM module.
+        :param module: API name of the Zoho module
+        :return: List of field api names
         """
-        print('called')
-        fields_url = "https://www.zohoapis.com/crm/v7/settings/fields"
-        params = {"module": module}
-        headers = {"Authorization": f"Zoho-oauthtoken {self.cr_access_token}"}
+        field_names = [field['api_name'] for field in self._get_zoho_field_definitions(module)]
+        if not field_names:
+            raise UserError(_("No fields data found in Zoho response."))
+        return field_names
 
-        try:
-            response = requests.get(fields_url, headers=headers, params=params)
-
-            data = response.json()
+    def _get_zoho_field_definitions(self, module):
+        """
+        Return the field definitions of a Zoho CRM module, using the metadata cache.
 
-            if 'fields' in data:
-                field_names = [field['api_name'] for field in data['fields']]
-                print(f"Fetched fields: {field_names}")
-                return field_names
-            else:
-                raise UserError(_("No fields data found in Zoho response."))
+        Cached definitions are returned as is while younger than the configured TTL.
+        Once expired they are revalidated with their ETag, so an unchanged layout
+        only costs a "304 Not Modified" round-trip. When another sync caches the
+        same module at once, its row is kept and this fetch is simply not cached.
+        :param module: API name of the Zoho module
+        :return: List of field definition dictionaries (api_name, data_type, read_only, ...)
+        """
+        self.ensure_one()
+        metadata = self.cr_field_metadata_ids.filtered(lambda m: m.cr_module == module)[:1]
+        now = fields.Datetime.now()
+        if metadata and metadata.cr_fetched_at and \
+                now - metadata.cr_fetched_at < timedelta(hours=self.cr_metadata_ttl):
+            return metadata._get_field_definitions()
 
+        fields_url = self._get_zoho_api_url("crm/v7/settings/fields")
+        headers = {"If-None-Match": metadata.cr_etag} if metadata.cr_etag else {}
+        try:
+            response = self._get_zoho_client().get(fields_url, params={"module": module}, headers=headers)
+            response.raise_for_status()
         except requests.RequestException as e:
             raise UserError(_("Error fetching Zoho fields: %s") % e)
 
-    def _get_zoho_api_url(self, endpoint):
-        """Helper method to build the Zoho API URL."""
-        base_url = "https://www.zohoapis.com/crm/v2"
-        return f"{base_url}/{endpoint}"
+        if response.status_code == 304:
+            metadata.cr_fetched_at = now
+            return metadata._get_field_definitions()
 
-    def _check_access_token(self):
-        """Ensure the access token is valid, refreshing it if necessary."""
-        if not self.cr_access_token or fields.Datetime.now() >= self.cr_token_expiry:
-            self.refresh_access_token()
+        field_definitions = response.json().get('fields', [])
+        vals = {
+            'cr_fields_json': json.dumps(field_definitions),
+            'cr_etag': response.headers.get('ETag'),
+            'cr_fetched_at': now,
+        }
+        if metadata:
+            metadata.write(vals)
+        else:
+            try:
+                with mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+                    self.env['cr.zoho.field.metadata'].create(
+                        dict(vals, cr_configuration_id=self.id, cr_module=module))
+            except psycopg2.IntegrityError:
+                # Created by a concurrent sync since this transaction started: the
+                # row may not be visible to it, and updating it would conflict
+                _logger.info("Field metadata of %s already cached by a concurrent sync", module)
+        return field_definitions
 
-    def fetch_zoho_deals(self):
-        """Fetch all fields for deals from Zoho CRM v7."""
-        self._check_access_token()
+    def _invalidate_zoho_field_metadata(self, module=None):
+        """
+        Drop cached field metadata so the next sync fetches it again.
+        :param module: API name of the Zoho module, or None for every module
+        """
+        metadata = self.cr_field_metadata_ids
+        if module:
+            metadata = metadata.filtered(lambda m: m.cr_module == module)
+        metadata.unlink()
 
-        # Define the API endpoints
-        fields_metadata_url = "https://www.zohoapis.com/crm/v7/settings/fields"
-        deals_api_url = "https://www.zohoapis.com/crm/v7/Deals"
+    def action_clear_zoho_metadata_cache(self):
+        """Clear the field metadata cache of the configuration."""
+        self._invalidate_zoho_field_metadata()
 
-        # Set up the request headers
-        headers = {
-            "Authorization": f"Zoho-oauthtoken {self.cr_access_token}",
+    def _compile_zoho_mapping(self, module, model_name, extra_fields=()):
+        """
+        Compile the field mapping of a Zoho module for the current sync run.
+        :param module: API name of the Zoho module
+        :param model_name: Name of the Odoo model the records are written to
+        :param extra_fields: Zoho fields the importer needs besides the mapped ones
+        :return: CompiledMapping with the fields to request and the record converter
+        """
+        self.ensure_one()
+        mapping = self.env['cr.zoho.field.mapping']._compile_mapping(self, module, model_name, extra_fields)
+        if not mapping.zoho_fields:
+            raise UserError(_("No mapped fields available to fetch from the Zoho module %s.") % module)
+        return mapping
+
+    def action_load_default_zoho_mappings(self):
+        """Create the default field mappings for the modules that have none yet."""
+        for config in self:
+            self.env['cr.zoho.field.mapping']._load_default_mappings(config)
+
+    def _split_fields(self, fields, chunk_size=50):
+        """
+        Split a list of field api names into chunks accepted by the Zoho API.
+        :param fields: List of field api names
+        :param chunk_size: Maximum number of fields per request
+        :return: List of field batches
+        """
+        return [fields[i:i + chunk_size] for i in range(0, len(fields), chunk_size)]
+
+    def action_queue_zoho_sync(self):
+        """
+        Queue the sync given by the ``zoho_sync_type`` context key as a background job.
+        """
+        self.ensure_one()
+        sync_type = self.env.context.get('zoho_sync_type')
+        job = self.env['cr.zoho.sync.job']._enqueue(self, sync_type, full_sync=self._is_zoho_full_sync())
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Zoho Sync"),
+                'message': _("%s sync queued; its progress is shown in the Sync Jobs tab.")
+                           % dict(job._selection_job_type())[job.cr_job_type],
+                'type': 'info',
+            },
         }
 
-        try:
-            # Step 1: Fetch metadata to get all fields
-            metadata_params = {"module": "Deals"}
-            metadata_response = requests.get(fields_metadata_url, headers=headers, params=metadata_params)
-            metadata_response.raise_for_status()
-            metadata = metadata_response.json()
+    def _get_zoho_sync_job(self):
+        """Return the background job running the current sync, if any."""
+        job_id = self.env.context.get('zoho_sync_job_id')
+        return self.env['cr.zoho.sync.job'].browse(job_id) if job_id else self.env['cr.zoho.sync.job']
 
-            # Extract all field names
-            fields = [field["api_name"] for field in metadata.get("fields", [])]
-            fields_param = ",".join(fields)  # Convert list to comma-separated string
+    def _get_zoho_checkpoint(self):
+        """Return the checkpoint the current sync resumes from, if any."""
+        job = self._get_zoho_sync_job()
+        return job._get_checkpoint() if job else {}
 
-            # Step 2: Fetch deals with all fields
-            deals_params = {"fields": fields_param}
-            deals_response = requests.get(deals_api_url, headers=headers, params=deals_params)
-            deals_response.raise_for_status()
-            deals = deals_response.json()
+    def _get_zoho_sync_start(self):
+        """
+        Return the start time of the current sync.
 
-            # Debugging: Print the full JSON response
-            print("Deals Response:", deals)
+        A resumed background job keeps the start of its first attempt, so records
+        modified while it was interrupted are picked up by the next sync.
+        """
+        job = self._get_zoho_sync_job()
+        return job.cr_started_at or fields.Datetime.now()
 
-            return deals
+    def _is_zoho_full_sync(self):
+        """Whether the current sync was explicitly requested as a full resync."""
+        return bool(self.env.context.get('zoho_full_sync'))
 
-        except requests.RequestException as e:
-            error_message = e.response.text if e.response else str(e)
-            raise UserError(_("Error fetching deals from Zoho: %s") % error_message)
-
-    def fetch_zoho_companies(self):
-        """Fetch companies from Zoho CRM."""
-        self._check_access_token()
-        companies_api_url = "https://www.zohoapis.com/crm/v7/Accounts"
-        fields_metadata_url = "https://www.zohoapis.com/crm/v7/settings/fields"
-        headers = {
-            "Authorization": f"Zoho-oauthtoken {self.cr_access_token}",
-        }
+    def _get_sync_watermark(self, module):
+        """
+        Return the start time of the last successful sync of a module.
+        :param module: API name of the Zoho module
+        :return: Datetime, or None when the module must be fully synced
+        """
+        self.ensure_one()
+        if self._is_zoho_full_sync():
+            return None
+        state = self.cr_sync_state_ids.filtered(lambda s: s.cr_module == module)[:1]
+        return state.cr_last_sync or None
 
-        try:
-            # Step 1: Fetch metadata to get all available fields
-            metadata_params = {"module": "Accounts"}  # 'Accounts' is the Zoho module for companies
-            metadata_response = requests.get(fields_metadata_url, headers=headers, params=metadata_params)
-            metadata_response.raise_for_status()
-            all_fields = [field["api_name"] for field in metadata_response.json().get("fields", [])]
-
-            # Step 2: Split fields into manageable chunks
-            def split_fields(fields, chunk_size=50):
-                for i in range(0, len(fields), chunk_size):
-                    yield fields[i:i + chunk_size]
-
-            # Step 3: Fetch companies in chunks
-            all_companies = []
-            for field_chunk in split_fields(all_fields, chunk_size=50):
-                field_params = ",".join(field_chunk)
-                params = {"fields": field_params, "per_page": 200}  # Adjust per_page as needed
-                response = requests.get(companies_api_url, headers=headers, params=params)
+    def _set_sync_watermark(self, module, synced_at, filter_values=None):
+        """
+        Advance the sync watermark of a module and commit it.
+
+        Must only be called once the synced records have been committed, so a
+        failed run is fetched again by the next incremental sync.
+        :param module: API name of the Zoho module
+        :param synced_at: Start time of the successful sync
+        :param filter_values: Optional filter values the sync kept, see
+            :meth:`_get_zoho_sync_filter_values`
+        """
+        self.ensure_one()
+        vals = {'cr_last_sync': synced_at}
+        if filter_values is not None:
+            vals['cr_filter_values'] = json.dumps(filter_values)
+        state = self.cr_sync_state_ids.filtered(lambda s: s.cr_module == module)[:1]
+        if state:
+            state.write(vals)
+        else:
+            self.env['cr.zoho.sync.state'].create(dict(vals, cr_configuration_id=self.id, cr_module=module))
+        self._zoho_commit()
+
+    def _has_new_sync_filter_values(self, module, filter_values):
+        """
+        Whether filters of a module accept values the last successful sync did not keep.
+
+        The records of such values, e.g. of a new organisation, were skipped by
+        the previous syncs and are not fetched again by a delta sync unless they change.
+        :param module: API name of the Zoho module
+        :param filter_values: Dictionary {Zoho field: accepted values}
+        :return: True when the module must be fully synced
+        """
+        self.ensure_one()
+        state = self.cr_sync_state_ids.filtered(lambda s: s.cr_module == module)[:1]
+        if not state.cr_filter_values:
+            return True
+        kept = json.loads(state.cr_filter_values)
+        return any(set(values) - set(kept.get(zoho_field, ())) for zoho_field, values in filter_values.items())
+
+    def _zoho_modified_since_headers(self, modified_since):
+        """
+        Build the ``If-Modified-Since`` header for an incremental fetch.
+        :param modified_since: Datetime (UTC) or None for a full fetch
+        :return: Dictionary of request headers
+        """
+        if not modified_since:
+            return {}
+        return {"If-Modified-Since": modified_since.strftime('%Y-%m-%dT%H:%M:%S+00:00')}
+
+    def _zoho_page_fetcher(self, module, per_page=200, modified_since=None, ids=None):
+        """
+        Build a page fetcher for a Zoho CRM module.
+
+        The returned callable only uses the pooled client captured here and never
+        touches the ORM, so it can run in fetch worker threads. When a page token
+        is given it is sent instead of the page number, which is required to read
+        past the first 2,000 records of a module. Pages are decoded as they are
+        downloaded and only the requested fields of each record are kept.
+        :param module: API name of the Zoho module
+        :param per_page: Number of records per page (200 at most)
+        :param modified_since: Only fetch records modified after this datetime
+        :param ids: Only fetch these record ids, at most ZOHO_IDS_PER_CALL
+        :return: Callable ``(fields_batch, page, page_token=None) -> (records, info)``
+        """
+        client = self._get_zoho_client()
+        module_url = self._get_zoho_api_url(f"crm/v7/{module}")
+        headers = self._zoho_modified_since_headers(modified_since)
+        priority = self._get_zoho_sync_priority()
+        metrics = self._get_zoho_sync_metrics()
+
+        def fetch_page(fields_batch, page, page_token=None):
+            params = {
+                "fields": ",".join(fields_batch),
+                "per_page": per_page,
+            }
+            if ids:
+                params["ids"] = ",".join(ids)
+            elif page_token:
+                params["page_token"] = page_token
+            else:
+                params["page"] = page
+            metrics.add('pages_fetched')
+            with metrics.timer('http_time'), client.get(
+                    module_url, params=params, headers=headers, priority=priority,
+                    metrics=metrics, stream=True) as response:
                 response.raise_for_status()
-                companies = response.json().get("data", [])
-                all_companies.extend(companies)
+                if response.status_code in (204, 304):
+                    # Zoho answers "No Content" past the last page and "Not Modified"
+                    # when nothing changed since the If-Modified-Since watermark
+                    return [], {}
+                try:
+                    return decode_records_page(
+                        metrics.count_bytes(response.iter_content(READ_CHUNK_SIZE)), fields_batch)
+                except ValueError as e:
+                    raise requests.RequestException(f"Invalid Zoho response: {e}")
+
+        return fetch_page
 
-            print("Fetched Companies:", all_companies)  # Process or store fetched companies
+    def _iter_merged_pages(self, fetch_page, all_fields, batch_size=50, cursor=None, per_page=200):
+        """
+        Fetch every page of a module for all field batches and yield pages of complete records.
 
+        Pages are walked in the outer loop and field batches in the inner one, so
+        every record is complete once its page was fetched for each batch and can
+        be handed off immediately instead of being kept until the end of the run.
+        When parallel fetch is enabled, pages x field batches are requested on a
+        thread pool bounded by the concurrent call limit; records are still
+        yielded to the caller, and written to the ORM, on the current thread.
+        :param fetch_page: Callable ``(fields_batch, page, page_token) -> (records, info)``,
+            which must not use the ORM when parallel fetch is enabled
+        :param all_fields: List of field api names to fetch
+        :param batch_size: Maximum number of fields per request
+        :param cursor: Optional resume cursor (page and page tokens), kept up to date
+            with the page following the last yielded one
+        :param per_page: Number of records per page returned by ``fetch_page``
+        :return: Generator of lists of merged record dictionaries, one list per page
+        """
+        field_batches = self._split_fields(all_fields, batch_size)
+        merger = ZohoRecordMerger(batch_count=len(field_batches))
+        if self.cr_parallel_fetch and self.cr_max_concurrent_calls > 1:
+            pages = iter_pages_parallel(fetch_page, field_batches, self.cr_max_concurrent_calls,
+                                        per_page=per_page, cursor=cursor)
+        else:
+            pages = iter_pages(fetch_page, field_batches, cursor=cursor)
+        try:
+            for batch_results in pages:
+                for batch_records in batch_results:
+                    merger.add(batch_records)
+                yield list(merger.pop_complete())
         except requests.RequestException as e:
-            error_message = e.response.text if e.response else str(e)
-            raise UserError(_("Error fetching companies from Zoho: %s") % error_message)
+            raise UserError(_("Error fetching data from Zoho: %s") % e)
+        incomplete = list(merger.drain())
+        if incomplete:
+            yield incomplete
+
+    def _iter_zoho_pages(self, module, field_names, modified_since=None, cursor=None, ids=None, coql_filters=None,
+                         bulk_read=True):
+        """
+        Lazily paginate any Zoho CRM module with the configured fetch engine.
+
+        With the REST engine, field lists wider than 50 columns are fetched in
+        batches and merged per page, and deep pagination follows Zoho's page_token.
+        Bulk Read exports are cut into pages of the same size. With the COQL engine,
+        syncs giving ``coql_filters`` only download the matching records; the
+        others are fetched with the REST API. Pages are yielded as
+        soon as they are downloaded, so callers can process them while the next
+        ones are still being fetched.
+        :param module: API name of the Zoho module
+        :param field_names: Field api names to fetch
+        :param modified_since: Only fetch records modified after this datetime
+        :param cursor: Optional resume cursor, see :meth:`_iter_merged_pages`;
+            Bulk Read exports cannot be resumed and ignore it
+        :param ids: Only fetch these record ids, e.g. the ones Zoho notified as
+            changed; they are requested ZOHO_IDS_PER_CALL at a time with the REST API
+        :param coql_filters: Dictionary {Zoho field: accepted values} applied in Zoho
+            by the COQL engine, see :meth:`_get_zoho_coql_filters`
+        :param bulk_read: Allow the Bulk Read engine; syncs reading lookup names pass
+            False and are fetched with the REST API, as Bulk Read only exports lookup ids
+        :return: Generator of lists of record dictionaries, one list per page
+        """
+        metrics = self._get_zoho_sync_metrics()
+        if ids is not None:
+            pages = (
+                page_records
+                for start in range(0, len(ids), ZOHO_IDS_PER_CALL)
+                for page_records in self._iter_merged_pages(
+                    self._zoho_page_fetcher(module, ids=ids[start:start + ZOHO_IDS_PER_CALL]), field_names)
+            )
+        elif self.cr_fetch_engine == 'bulk' and bulk_read:
+            rows = self._iter_bulk_read_records(module, field_names, modified_since)
+            pages = iter(lambda: list(islice(rows, 200)), [])
+        elif self.cr_fetch_engine == 'coql' and coql_filters is not None:
+            pages = self._iter_coql_pages(module, field_names, modified_since, coql_filters, cursor=cursor)
+        else:
+            fetch_page = self._zoho_page_fetcher(module, modified_since=modified_since)
+            pages = self._iter_merged_pages(fetch_page, field_names, cursor=cursor)
+        for page_records in pages:
+            metrics.add('records_fetched', len(page_records))
+            yield page_records
+
+    def _iter_bulk_read_records(self, module, zoho_fields, modified_since=None):
+        """
+        Export a Zoho CRM module through Bulk Read jobs and yield its rows.
+        :param module: API name of the Zoho module
+        :param zoho_fields: Field api names to export
+        :param modified_since: Only export records modified after this datetime
+        :return: Generator of record dictionaries
+        """
+        criteria = None
+        if modified_since:
+            criteria = {
+                "api_name": "Modified_Time",
+                "comparator": "greater_than",
+                "value": modified_since.strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+            }
+        bulk_read = ZohoBulkRead(self._get_zoho_client(), api_domain=self._get_zoho_api_url(''),
+                                 poll_interval=self.cr_bulk_poll_interval or 5,
+                                 priority=self._get_zoho_sync_priority(),
+                                 metrics=self._get_zoho_sync_metrics())
+        try:
+            yield from bulk_read.iter_records(module, zoho_fields, criteria=criteria)
+        except (requests.RequestException, ZohoBulkReadError) as e:
+            raise UserError(_("Error exporting %s with Zoho Bulk Read: %s") % (module, e))
+
+    def _get_zoho_api_url(self, endpoint):
+        """
+        Helper method to build a Zoho API URL on the configured API domain.
+        :param endpoint: Path of the endpoint, e.g. ``crm/v7/Contacts``
+        :return: Absolute URL
+        """
+        base_url = (self.cr_api_domain or "https://www.zohoapis.com").rstrip('/')
+        return f"{base_url}/{endpoint}"
 
+    def _get_zoho_accounts_url(self, endpoint):
+        """
+        Helper method to build a Zoho OAuth URL on the configured accounts server.
+        :param endpoint: Path of the endpoint, e.g. ``oauth/v2/token``
+        :return: Absolute URL
+        """
+        base_url = (self.cr_accounts_url or "https://accounts.zoho.com").rstrip('/')
+        return f"{base_url}/{endpoint}"
+
+    def _check_access_token(self):
+        """Ensure the access token is valid, refreshing it if necessary."""
+        self._zoho_token_provider()()
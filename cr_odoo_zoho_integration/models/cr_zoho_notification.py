@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import logging
+import time
+from datetime import timedelta
+from odoo import models, fields, api
+from ..tools.sync_metrics import SyncMetrics
+
+_logger = logging.getLogger(__name__)
+
+# Notifications received within this delay are fetched together
+NOTIFY_COALESCE_DELAY = timedelta(seconds=5)
+# Maximum number of queued record ids handled by one run of the cron
+NOTIFY_BATCH_SIZE = 1000
+
+
+class ZohoNotification(models.Model):
+    _name = 'cr.zoho.notification'
+    _description = 'Zoho Changed Record'
+    _order = 'id'
+    _rec_name = 'cr_record_id'
+
+    cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True,
+                                          ondelete='cascade', index=True)
+    cr_module = fields.Char('Zoho Module', required=True)
+    cr_record_id = fields.Char('Zoho Record ID', required=True)
+    cr_received_at = fields.Datetime('Received At')
+
+    _sql_constraints = [
+        ('config_module_record_uniq', 'unique(cr_configuration_id, cr_module, cr_record_id)',
+         'A changed record is only queued once.'),
+    ]
+
+    @api.model
+    def _enqueue(self, config, module, record_ids, trigger=True):
+        """
+        Queue changed Zoho records to be fetched by the notification cron.
+
+        A record already waiting in the queue is not queued twice: any number of
+        notifications for it until the cron runs cost a single fetch.
+        :param config: zoho.config record the notification was sent to
+        :param module: API name of the Zoho CRM module
+        :param record_ids: Zoho ids of the changed records
+        :param trigger: Run the cron once the coalescing delay has passed
+        """
+        if not record_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO cr_zoho_notification (cr_configuration_id, cr_module, cr_record_id, cr_received_at,
+                                              create_uid, create_date, write_uid, write_date)
+            SELECT %(config)s, %(module)s, record_id, %(now)s, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(record_ids)s::varchar[]) AS record_id
+            ON CONFLICT (cr_configuration_id, cr_module, cr_record_id) DO NOTHING
+        """, {
+            'config': config.id,
+            'module': module,
+            'record_ids': list(record_ids),
+            'now': fields.Datetime.now(),
+            'uid': self.env.uid,
+        })
+        if trigger:
+            self.env.ref('cr_odoo_zoho_integration.ir_cron_zoho_notifications')._trigger(
+                at=fields.Datetime.now() + NOTIFY_COALESCE_DELAY)
+
+    @api.model
+    def _claim_group(self, limit=NOTIFY_BATCH_SIZE):
+        """
+        Take the oldest queued records of one configuration and module out of the queue.
+
+        A single group is claimed per transaction, which its sync commits: when the
+        sync fails, the rollback only brings back the records of that group, never
+        the ones of groups already synced. The row locks (``SKIP LOCKED``) keep
+        concurrent cron workers from claiming the same records.
+        :param limit: Maximum number of records to claim
+        :return: Tuple (config id, module, list of record ids), or None when the queue is empty
+        """
+        self.env.cr.execute("""
+            SELECT cr_configuration_id, cr_module
+              FROM cr_zoho_notification
+             ORDER BY id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """)
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        config_id, module = row
+        self.env.cr.execute("""
+            DELETE FROM cr_zoho_notification
+             WHERE id IN (SELECT id FROM cr_zoho_notification
+                           WHERE cr_configuration_id = %s AND cr_module = %s
+                           ORDER BY id
+                           LIMIT %s
+                             FOR UPDATE SKIP LOCKED)
+         RETURNING cr_record_id
+        """, [config_id, module, limit])
+        return config_id, module, [record_id for record_id, in self.env.cr.fetchall()]
+
+    @api.model
+    def _cron_process_notifications(self):
+        """Fetch and write the queued records, one group at a time, and re-trigger the cron while records remain."""
+        claimed = 0
+        while claimed < NOTIFY_BATCH_SIZE:
+            group = self._claim_group(NOTIFY_BATCH_SIZE - claimed)
+            if not group:
+                break
+            config_id, module, record_ids = group
+            claimed += len(record_ids)
+            if not self._sync_records(self.env['zoho.config'].browse(config_id), module, record_ids):
+                # The failed group is back at the head of the queue: leave it to the next run
+                break
+        if self.search_count([], limit=1):
+            self.env.ref('cr_odoo_zoho_integration.ir_cron_zoho_notifications')._trigger()
+
+    def _sync_records(self, config, module, record_ids):
+        """
+        Sync the given records of a module with ``ids=`` calls, and log the run.
+
+        On failure the records are queued again and retried by the next scheduled
+        run of the cron, not immediately.
+        :param config: zoho.config record
+        :param module: API name of the Zoho CRM module
+        :param record_ids: Zoho ids of the records to fetch
+        :return: False when the sync failed
+        """
+        sync_type = config._get_zoho_sync_type(module)
+        if not sync_type:
+            # Not synced any more: drop the claimed records
+            config._zoho_commit()
+            return True
+        metrics = SyncMetrics()
+        started_at = fields.Datetime.now()
+        run_start = time.perf_counter()
+        error_message = ''
+        try:
+            config.with_context(zoho_sync_metrics=metrics, zoho_sync_priority='high')._run_zoho_sync(
+                sync_type, ids=record_ids)
+        except Exception as e:
+            error_message = str(e)
+            _logger.exception("Zoho notification sync of %s %s records failed", len(record_ids), module)
+            self.env.cr.rollback()
+            self._enqueue(config, module, record_ids, trigger=False)
+        self.env['cr.data.processing.log']._log_data_processing(
+            config,
+            "%s (Notifications)" % config._get_zoho_sync_spec(sync_type)['label'],
+            'failure' if error_message else 'success',
+            started_at,
+            duration=time.perf_counter() - run_start,
+            metrics=metrics.snapshot(),
+            error_message=error_message,
+        )
+        config._zoho_commit()
+        config._save_zoho_api_usage()
+        return not error_message
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 # Part of Creyox Technologies.
 
+import logging
 import requests
-from odoo import models, fields, _
+from odoo import models, _
 from odoo.exceptions import UserError
 
+_logger = logging.getLogger(__name__)
+
+
 class ZohoOrganizations(models.Model):
     _inherit = 'zoho.config'
     _description = 'Zoho Organizations'
@@ -15,16 +19,13 @@ class ZohoOrganizations(models.Model):
         self._check_access_token()
 
         # Define the API endpoint for fetching organizations
-        organizations_api_url = "https://www.zohoapis.com/books/v3/organizations"
+        organizations_api_url = self._get_zoho_api_url("books/v3/organizations")
 
-        # Set up the request headers
-        headers = {
-            "Authorization": f"Zoho-oauthtoken {self.cr_access_token}",
-        }
+        client = self._get_zoho_client()
 
         try:
             # Fetch the organizations
-            response = requests.get(organizations_api_url, headers=headers)
+            response = client.get(organizations_api_url, metrics=self._get_zoho_sync_metrics())
             response.raise_for_status()  # Raise an exception for 4xx/5xx responses
             organizations_data = response.json()
 
@@ -35,20 +36,10 @@ class ZohoOrganizations(models.Model):
 
             # Extract the organization details
             organizations = organizations_data.get("organizations", [])
+            self._get_zoho_sync_metrics().add('records_fetched', len(organizations))
 
-            # Iterate through each organization and process it
-            for org in organizations:
-                org_id = org.get("organization_id")
-                org_name = org.get("name")
-                org_contact_name = org.get("contact_name")
-                org_email = org.get("email")
-                org_currency = org.get("currency_code")
-                org_timezone = org.get("time_zone")
-                org_phone = org.get("phone")
-
-                # Process the organization data (you can create/update in Odoo's res.company here)
-                self.create_or_update_organization(org_id, org_name, org_contact_name, org_email, org_currency,
-                                                   org_timezone, org_phone)
+            # Create or update all organizations in Odoo's res.company at once
+            self.create_or_update_organization(organizations)
 
             return organizations  # Return the fetched organizations data
 
@@ -56,48 +47,34 @@ class ZohoOrganizations(models.Model):
             error_message = e.response.text if e.response else str(e)
             raise UserError(_("Error fetching organizations from Zoho Books: %s") % error_message)
 
-    def create_or_update_organization(self, org_id, org_name, org_contact_name, org_email, org_currency, org_timezone, org_phone):
+    def create_or_update_organization(self, organizations):
         """
-        Create or update the organization in Odoo's res.company model.
+        Create or update the organizations in Odoo's res.company model.
 
         Args:
-            org_id (int): The ID of the organization.
-            org_name (str): The name of the organization.
-            org_contact_name (str): The contact name of the organization.
-            org_email (str): The email address of the organization.
-            org_currency (str): The currency code of the organization.
-            org_timezone (str): The timezone of the organization.
+            organizations (list): Organization dictionaries returned by Zoho Books,
+                with their organization_id, name, contact_name, email and phone.
         """
-        # Step 1: Find or create the associated partner
-        partner = self.env['res.partner'].search([('name', '=', org_contact_name)], limit=1)
-        if not partner:
-            partner = self.env['res.partner'].create({
-                'name': org_contact_name,
-                'email': org_email,
-                'phone': org_phone,
-            })
-        # Check if the organization already exists in Odoo
-        company = self.env['res.company'].search([('external_org_id', '=', org_id)], limit=1)
-        if company:
-            # Update existing organization
-            company.write({
-                'name': org_name,
-                'partner_id': partner.id,
-                'email': org_email,
-                'phone': org_phone,
-                # 'currency_id': org_currency,  # You may need to map this to Odoo's currency model
-                # 'timezone': org_timezone,  # You may need to map this to Odoo's timezone model
-            })
-            print(f"Updated existing organization: {company.name}")
-        else:
-            # Create a new organization
-            self.env['res.company'].create({
-                'name': org_name,
-                'external_org_id': org_id,  # Store the external Org ID
-                'partner_id': partner.id,
-                'email': org_email,
-                'phone': org_phone,
-                # 'currency_id': org_currency,  # You may need to map this to Odoo's currency model
-                # 'timezone': org_timezone,  # You may need to map this to Odoo's timezone model
-            })
-            print(f"Created new organization: {org_name}")
\ No newline at end of file
+        # Step 1: Find or create the associated partners, matched on their name
+        partners = self._zoho_bulk_upsert('res.partner', 'name', (
+            {
+                'name': org.get("contact_name"),
+                'email': org.get("email"),
+                'phone': org.get("phone"),
+            } for org in organizations
+        ), update_existing=False)
+
+        # Step 2: Create or update the organizations, matched on the external Org ID
+        companies = self._zoho_bulk_upsert('res.company', 'external_org_id', (
+            {
+                'name': org.get("name"),
+                'external_org_id': org.get("organization_id"),  # Store the external Org ID
+                'partner_id': partners['ids'].get(org.get("contact_name")),
+                'email': org.get("email"),
+                'phone': org.get("phone"),
+                # 'currency_id': org.get("currency_code"),  # You may need to map this to Odoo's currency model
+                # 'timezone': org.get("time_zone"),  # You may need to map this to Odoo's timezone model
+            } for org in organizations
+        ))
+        _logger.info("Organizations created: %s, updated: %s", companies['created'], companies['updated'])
+        return companies
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import json
+import zlib
+from odoo import models, fields
+
+
+def encode_payload(record):
+    """Serialize a Zoho record for the staging table."""
+    return zlib.compress(json.dumps(record, separators=(',', ':'), default=str).encode())
+
+
+def decode_payload(payload):
+    """Load a Zoho record from its staged payload."""
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+class ZohoStagedRecord(models.Model):
+    _name = 'cr.zoho.staged.record'
+    _description = 'Zoho Staged Record'
+    _order = 'id'
+    _rec_name = 'cr_zoho_id'
+
+    cr_configuration_id = fields.Many2one('zoho.config', string='Zoho Config', required=True, ondelete='cascade')
+    cr_module = fields.Char('Zoho Module', required=True)
+    cr_zoho_id = fields.Char('Zoho Record ID', required=True)
+    cr_modified_time = fields.Char('Modified Time', help="Modified_Time of the record in Zoho, as sent by Zoho")
+    cr_payload = fields.Binary('Payload', attachment=False, help="Zoho record as zlib-compressed JSON")
+    cr_payload_json = fields.Text('Zoho Record', compute='_compute_payload_json')
+    cr_fetched_at = fields.Datetime('Fetched At', index=True)
+
+    _sql_constraints = [
+        ('config_module_record_version_uniq',
+         'unique(cr_configuration_id, cr_module, cr_zoho_id, cr_modified_time)',
+         'A version of a Zoho record is only staged once.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS cr_zoho_staged_record_config_module_id_idx
+                ON cr_zoho_staged_record (cr_configuration_id, cr_module, id)
+        """)
+
+    def _compute_payload_json(self):
+        self.env.cr.execute("SELECT id, cr_payload FROM cr_zoho_staged_record WHERE id IN %s",
+                            [tuple(self.ids) or (0,)])
+        payloads = dict(self.env.cr.fetchall())
+        for record in self:
+            payload = payloads.get(record.id)
+            record.cr_payload_json = (json.dumps(decode_payload(payload), indent=2, ensure_ascii=False)
+                                      if payload else False)
+
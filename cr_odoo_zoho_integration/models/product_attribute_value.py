@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields
+
+class ProductAttributeValue(models.Model):
+    _inherit = 'product.attribute.value'
+
+    x_zoho_id = fields.Char(string='Zoho ID', index=True, copy=False,
+                            help="ID of the Zoho CRM product this value stands for in its project")
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    x_zoho_id = fields.Char(string='Zoho ID', index=True, copy=False, help="ID of the Zoho CRM product")
+    x_zoho_hash = fields.Char(string='Zoho Data Hash', copy=False,
+                              help="Hash of the Zoho values last written; unchanged records are not rewritten")
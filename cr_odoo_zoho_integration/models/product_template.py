@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    x_zoho_project_id = fields.Char(string='Zoho Project ID', index=True, copy=False,
+                                    help="ID of the Zoho CRM project whose units are the variants of this product")
@@ -5,4 +5,11 @@ class ProjectProject(models.Model):
     _inherit = 'project.project'
 
     # Define the custom field to store the Zoho ID
-    x_zoho_id = fields.Char(string='Zoho ID')
+    x_zoho_id = fields.Char(string='Zoho ID', index=True, copy=False)
+    x_zoho_hash = fields.Char(string='Zoho Data Hash', copy=False,
+                              help="Hash of the Zoho values last written; unchanged records are not rewritten")
+
+    _sql_constraints = [
+        ('x_zoho_id_company_uniq', 'unique(x_zoho_id, company_id)',
+         'A Zoho record can only be linked to one project per company.'),
+    ]
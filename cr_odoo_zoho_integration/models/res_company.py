@@ -7,4 +7,10 @@ from odoo import models, fields
 class ResCompany(models.Model):
     _inherit = 'res.company'
 
-    external_org_id = fields.Char(string='External Organization ID', help="Store Zoho Books Organization ID")
+    external_org_id = fields.Char(string='External Organization ID', index=True, copy=False,
+                                  help="Store Zoho Books Organization ID")
+
+    _sql_constraints = [
+        ('external_org_id_uniq', 'unique(external_org_id)',
+         'A Zoho Books organization can only be linked to one company.'),
+    ]
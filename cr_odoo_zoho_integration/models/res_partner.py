@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import models, fields
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    x_zoho_id = fields.Char(string='Zoho ID', index=True, copy=False, help="ID of the Zoho CRM contact")
+    x_zoho_hash = fields.Char(string='Zoho Data Hash', copy=False,
+                              help="Hash of the Zoho values last written; unchanged records are not rewritten")
+    x_zoho_books_id = fields.Char(string='Zoho Books ID', index=True, copy=False,
+                                  help="ID of the Zoho Books contact")
+    x_zoho_books_hash = fields.Char(string='Zoho Books Data Hash', copy=False,
+                                    help="Hash of the Zoho Books values last written; "
+                                         "unchanged records are not rewritten")
+
+    _sql_constraints = [
+        ('x_zoho_id_company_uniq', 'unique(x_zoho_id, company_id)',
+         'A Zoho contact can only be linked to one partner per company.'),
+        ('x_zoho_books_id_company_uniq', 'unique(x_zoho_books_id, company_id)',
+         'A Zoho Books contact can only be linked to one partner per company.'),
+    ]
+
+    def init(self):
+        # NULLs are distinct in unique constraints: partners shared between companies
+        # need their own index to be unique per Zoho contact
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS res_partner_x_zoho_id_no_company_uniq
+                ON res_partner (x_zoho_id)
+             WHERE company_id IS NULL AND x_zoho_id IS NOT NULL
+        """)
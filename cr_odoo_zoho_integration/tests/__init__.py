@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from . import test_page_fetch
+from . import test_json_stream
+from . import test_rate_limit
+from . import test_coql
+from . import test_products
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from datetime import datetime
+
+from odoo.tests.common import TransactionCase, tagged
+from odoo.addons.cr_odoo_zoho_integration.models.cr_coql import COQL_MAX_IN_VALUES, coql_literal
+
+
+@tagged('post_install', '-at_install')
+class TestCoqlWhere(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['zoho.config']
+
+    def test_literal(self):
+        self.assertEqual(coql_literal(42), "'42'")
+        self.assertEqual(coql_literal("O'Brien \\ Co"), "'O\\'Brien \\\\ Co'")
+
+    def test_base_clause(self):
+        self.assertEqual(self.config._zoho_coql_where_clauses(), ["id is not null"])
+        self.assertEqual(self.config._zoho_coql_where_clauses(datetime(2024, 1, 2, 3, 4, 5)),
+                         ["Modified_Time > '2024-01-02T03:04:05+00:00'"])
+
+    def test_in_list_chunks(self):
+        values = [str(value) for value in range(2 * COQL_MAX_IN_VALUES + 20)]
+        clauses = self.config._zoho_coql_where_clauses(filters={'Organisation': values})
+
+        self.assertEqual(len(clauses), 3)
+        for clause, chunk in zip(clauses, (values[:50], values[50:100], values[100:])):
+            self.assertEqual(clause, "id is not null and Organisation in (%s)"
+                             % ', '.join("'%s'" % value for value in chunk))
+
+    def test_several_filters(self):
+        """One clause is built per combination of value chunks of the filters."""
+        clauses = self.config._zoho_coql_where_clauses(
+            datetime(2024, 1, 2), {'Organisation': list(range(COQL_MAX_IN_VALUES + 1)), 'Stage': ['Won', 'Lost']})
+
+        self.assertEqual(len(clauses), 2)
+        self.assertTrue(all(clause.startswith("Modified_Time > '2024-01-02T00:00:00+00:00' and Organisation in (")
+                            for clause in clauses))
+        self.assertTrue(all(clause.endswith(" and Stage in ('Won', 'Lost')") for clause in clauses))
+        self.assertIn("Organisation in ('50') and", clauses[1])
+
+    def test_empty_filter(self):
+        """A filter accepting no value selects nothing: no query is run."""
+        self.assertEqual(self.config._zoho_coql_where_clauses(filters={'Organisation': []}), [])
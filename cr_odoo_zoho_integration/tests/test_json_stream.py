@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import json
+
+from odoo.tests.common import BaseCase, tagged
+from odoo.addons.cr_odoo_zoho_integration.tools.json_stream import decode_records_page, iter_array_items
+
+PAGE = {
+    'data': [
+        {'id': '4000000000000000001', 'Last_Name': 'Müller', 'Amount': 1234.5678,
+         '$approval': {'delegate': False}, 'Tags': ['é', '日本'], 'Owner': {'id': '1', 'name': 'Zoë'}},
+        {'id': '4000000000000000002', 'Last_Name': 'O"Brien \\ ✓', 'Amount': -7e-3,
+         '$currency_symbol': '€', 'Tags': [], 'Owner': None},
+        {'id': '4000000000000000003', 'Last_Name': '', 'Amount': 123456789012345678, 'Tags': [True],
+         'Owner': {}},
+    ],
+    'info': {'per_page': 3, 'count': 3, 'page': 1, 'more_records': True, 'next_page_token': 'abc'},
+}
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@tagged('post_install', '-at_install')
+class TestJsonStream(BaseCase):
+
+    def test_chunk_boundaries(self):
+        """Values split anywhere, multi-byte characters and numbers included, decode unchanged."""
+        for indent in (None, 2):
+            body = json.dumps(PAGE, ensure_ascii=False, indent=indent).encode()
+            for size in (1, 2, 3, 7, 64, len(body)):
+                with self.subTest(indent=indent, size=size):
+                    extra = {}
+                    items = list(iter_array_items(chunked(body, size), 'data', extra))
+                    self.assertEqual(items, PAGE['data'])
+                    self.assertEqual(extra, {'info': PAGE['info']})
+
+    def test_array_after_other_keys(self):
+        body = json.dumps({'info': PAGE['info'], 'data': PAGE['data'][:1], 'status': 'ok'}).encode()
+        extra = {}
+        self.assertEqual(list(iter_array_items(chunked(body, 5), 'data', extra)), PAGE['data'][:1])
+        self.assertEqual(extra, {'info': PAGE['info'], 'status': 'ok'})
+
+    def test_empty_bodies(self):
+        self.assertEqual(decode_records_page([]), ([], {}))
+        self.assertEqual(decode_records_page([b'{', b'}']), ([], {}))
+        self.assertEqual(decode_records_page([b'{"data": [', b'  ]}']), ([], {}))
+
+    def test_decode_records_page(self):
+        body = json.dumps(PAGE, ensure_ascii=False).encode()
+        records, info = decode_records_page(chunked(body, 3), keep_fields=['Last_Name', 'Amount'])
+        self.assertEqual(info, PAGE['info'])
+        self.assertEqual(records, [
+            {'id': record['id'], 'Last_Name': record['Last_Name'], 'Amount': record['Amount']}
+            for record in PAGE['data']
+        ])
+        records, _info = decode_records_page(chunked(body, 3))
+        self.assertEqual(records, PAGE['data'])
+
+    def test_truncated_body(self):
+        body = json.dumps(PAGE).encode()[:-20]
+        with self.assertRaises(ValueError):
+            decode_records_page(chunked(body, 16))
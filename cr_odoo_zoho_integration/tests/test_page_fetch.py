@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import threading
+
+from odoo.tests.common import BaseCase, tagged
+from odoo.addons.cr_odoo_zoho_integration.tools.page_fetch import iter_pages, iter_pages_parallel
+
+
+class FakeModule:
+    """
+    Zoho module of ``pages`` pages of one record, recording the calls made.
+
+    Pages past ``last_numbered_page`` are only served with the ``next_page_token``
+    returned with the previous page of the same field batch.
+    """
+
+    def __init__(self, pages, last_numbered_page=None):
+        self.pages = pages
+        self.last_numbered_page = last_numbered_page or pages
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch_page(self, fields_batch, page, page_token):
+        with self._lock:
+            self.calls.append((fields_batch[0], page, page_token))
+        if page > self.last_numbered_page and page_token != f'{fields_batch[0]}-{page - 1}':
+            raise AssertionError(f"Page {page} requested without the token of page {page - 1}")
+        records = [dict({name: f'{name} {page}' for name in fields_batch}, id=str(page))]
+        return records, {'more_records': page < self.pages, 'next_page_token': f'{fields_batch[0]}-{page}'}
+
+
+@tagged('post_install', '-at_install')
+class TestPageFetch(BaseCase):
+
+    field_batches = [['Name', 'Email'], ['Phone']]
+
+    def test_iter_pages(self):
+        module = FakeModule(pages=3)
+        cursor = {}
+        pages = []
+        for batch_results in iter_pages(module.fetch_page, self.field_batches, cursor):
+            # The cursor points after the page being yielded
+            self.assertEqual(cursor['page'], len(pages) + 2)
+            pages.append(batch_results)
+
+        self.assertEqual([[records[0]['id'] for records in page] for page in pages],
+                         [['1', '1'], ['2', '2'], ['3', '3']])
+        self.assertEqual(pages[0][0], [{'id': '1', 'Name': 'Name 1', 'Email': 'Email 1'}])
+        self.assertEqual(module.calls[:4], [
+            ('Name', 1, None), ('Phone', 1, None), ('Name', 2, 'Name-1'), ('Phone', 2, 'Phone-1'),
+        ])
+        self.assertEqual(cursor, {'page': 4, 'page_tokens': ['Name-3', 'Phone-3']})
+
+    def test_iter_pages_resume(self):
+        module = FakeModule(pages=4, last_numbered_page=1)
+        cursor = {'page': 3, 'page_tokens': ['Name-2', 'Phone-2']}
+        pages = list(iter_pages(module.fetch_page, self.field_batches, cursor))
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(module.calls[:2], [('Name', 3, 'Name-2'), ('Phone', 3, 'Phone-2')])
+        self.assertEqual(cursor['page'], 5)
+
+    def test_iter_pages_changed_batches(self):
+        """A cursor saved for other field batches is discarded."""
+        module = FakeModule(pages=2)
+        cursor = {'page': 2, 'page_tokens': ['Name-1']}
+        pages = list(iter_pages(module.fetch_page, self.field_batches, cursor))
+
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(module.calls[0], ('Name', 1, None))
+
+    def test_iter_pages_parallel(self):
+        # 2 pages of 1,000 records are addressable by number, the next ones by token only
+        module = FakeModule(pages=5, last_numbered_page=2)
+        cursor = {}
+        pages = list(iter_pages_parallel(module.fetch_page, self.field_batches, max_workers=4,
+                                         per_page=1000, cursor=cursor))
+
+        self.assertEqual([[records[0]['id'] for records in page] for page in pages],
+                         [[str(page)] * 2 for page in range(1, 6)])
+        self.assertEqual(sorted(call for call in module.calls if call[1] <= 2), [
+            ('Name', 1, None), ('Name', 2, None), ('Phone', 1, None), ('Phone', 2, None),
+        ])
+        self.assertEqual(sorted(call for call in module.calls if call[1] > 2), [
+            ('Name', 3, 'Name-2'), ('Name', 4, 'Name-3'), ('Name', 5, 'Name-4'),
+            ('Phone', 3, 'Phone-2'), ('Phone', 4, 'Phone-3'), ('Phone', 5, 'Phone-4'),
+        ])
+        self.assertEqual(cursor, {'page': 6, 'page_tokens': ['Name-5', 'Phone-5']})
+
+    def test_iter_pages_parallel_resume(self):
+        module = FakeModule(pages=4, last_numbered_page=2)
+        cursor = {'page': 3, 'page_tokens': ['Name-2', 'Phone-2']}
+        pages = list(iter_pages_parallel(module.fetch_page, self.field_batches, max_workers=4,
+                                         per_page=1000, cursor=cursor))
+
+        self.assertEqual([page[0][0]['id'] for page in pages], ['3', '4'])
+        self.assertNotIn(1, [page for _field, page, _token in module.calls])
+        self.assertEqual(cursor['page'], 5)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from odoo import Command
+from odoo.tests.common import TransactionCase, tagged
+from odoo.addons.cr_odoo_zoho_integration.models.cr_sync_engine import ZOHO_SYNC_MODULES
+
+
+@tagged('post_install', '-at_install')
+class TestProductUnits(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['zoho.config'].create({
+            'cr_client_id': 'client',
+            'cr_client_secret': 'secret',
+            'cr_redirect_uri': 'https://example.com/zoho/callback',
+        })
+        cls.spec = ZOHO_SYNC_MODULES['products']
+
+    def write_units(self, project_id, project_name, unit_ids):
+        units = [{
+            'project_id': project_id,
+            'project': project_name,
+            'name': f'Unit {zoho_id}',
+            'template_vals': {'active': True},
+            'vals': {'x_zoho_id': zoho_id, 'active': True},
+        } for zoho_id in unit_ids]
+        return self.config._write_zoho_unit_chunk(units, self.spec)
+
+    def get_template(self, project_id):
+        return self.env['product.template'].search([('x_zoho_project_id', '=', project_id)])
+
+    def test_projects_sharing_a_name(self):
+        """Projects are told apart by Zoho id, not by name."""
+        self.write_units('P1', 'Tower', ['U1', 'U2'])
+        self.write_units('P2', 'Tower', ['U3'])
+
+        first, second = self.get_template('P1'), self.get_template('P2')
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(first.attribute_line_ids), 1)
+        self.assertEqual(sorted(first.product_variant_ids.mapped('x_zoho_id')), ['U1', 'U2'])
+        self.assertEqual(second.product_variant_ids.mapped('x_zoho_id'), ['U3'])
+
+    def test_renamed_project(self):
+        self.write_units('P1', 'Tower', ['U1'])
+        template = self.get_template('P1')
+        variant = template.product_variant_ids
+
+        self.write_units('P1', 'Tower A', ['U1', 'U2'])
+        self.assertEqual(self.get_template('P1'), template)
+        self.assertEqual(template.name, 'Tower A')
+        self.assertEqual(template.attribute_line_ids.attribute_id.name, 'Tower A')
+        self.assertEqual(len(template.attribute_line_ids), 1)
+        self.assertIn(variant, template.product_variant_ids)
+        self.assertEqual(len(template.product_variant_ids), 2)
+
+    def test_legacy_template(self):
+        """A template built by name before templates were linked is claimed by its project."""
+        attribute = self.env['product.attribute'].create({'name': 'Tower', 'value_ids': [
+            Command.create({'name': 'Unit U1'}),
+        ]})
+        legacy = self.env['product.template'].create({'name': 'Tower', 'attribute_line_ids': [Command.create({
+            'attribute_id': attribute.id, 'value_ids': [Command.set(attribute.value_ids.ids)],
+        })]})
+        unrelated = self.env['product.template'].create({'name': 'Tower'})
+
+        self.write_units('P1', 'Tower', ['U1'])
+        self.assertEqual(self.get_template('P1'), legacy)
+        self.assertFalse(unrelated.x_zoho_project_id)
+        self.assertEqual(legacy.product_variant_ids.x_zoho_id, 'U1')
+        self.assertEqual(attribute.value_ids.x_zoho_id, 'U1')
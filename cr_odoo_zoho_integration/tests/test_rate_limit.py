@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import time
+
+from odoo.tests.common import BaseCase, tagged
+from odoo.addons.cr_odoo_zoho_integration.tools.rate_limit import (
+    ZohoCreditBudgetExceeded, ZohoRateLimitError, ZohoRateLimiter, PRIORITY_HIGH, PRIORITY_LOW,
+)
+
+
+class FakeResponse:
+
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@tagged('post_install', '-at_install')
+class TestRateLimit(BaseCase):
+
+    def rate_limiter(self, **kwargs):
+        # Fast enough for acquire() never to wait on the token bucket
+        return ZohoRateLimiter(**dict({'requests_per_minute': 60000, 'burst': 100}, **kwargs))
+
+    def paused_for(self, limiter):
+        return limiter._paused_until - time.monotonic()
+
+    def test_throttled_retry_after(self):
+        limiter = self.rate_limiter()
+        self.assertTrue(limiter.after_response('POST', FakeResponse(429, {'Retry-After': '5'}), 0))
+        # Every thread pauses for the announced delay, plus at most one second of jitter
+        self.assertTrue(4 < self.paused_for(limiter) <= 6)
+        self.assertEqual(limiter.counters['throttled'], 1)
+        self.assertEqual(limiter.counters['retries'], 1)
+
+    def test_throttled_ratelimit_reset(self):
+        limiter = self.rate_limiter()
+        reset = str(int((time.time() + 10) * 1000))
+        self.assertTrue(limiter.after_response('GET', FakeResponse(429, {'X-RATELIMIT-RESET': reset}), 0))
+        self.assertTrue(8 < self.paused_for(limiter) <= 11)
+
+    def test_throttled_backoff(self):
+        """Without any delay from Zoho, the backoff grows with the attempts up to max_backoff."""
+        limiter = self.rate_limiter(max_retries=10, max_backoff=8)
+        for attempt, ceiling in ((0, 1), (2, 4), (6, 8)):
+            limiter._paused_until = 0.0
+            self.assertTrue(limiter.after_response('GET', FakeResponse(429), attempt))
+            self.assertLessEqual(self.paused_for(limiter), ceiling)
+
+    def test_throttled_gives_up(self):
+        limiter = self.rate_limiter(max_retries=2, max_backoff=30)
+        with self.assertRaises(ZohoRateLimitError) as error:
+            limiter.after_response('GET', FakeResponse(429, {'Retry-After': '1'}), 2)
+        self.assertTrue(error.exception.retry_at)
+        with self.assertRaises(ZohoRateLimitError):
+            limiter.after_response('GET', FakeResponse(429, {'Retry-After': '120'}), 0)
+        self.assertEqual(limiter.counters['retries'], 0)
+
+    def test_transient_errors(self):
+        """Gateway errors are only retried for idempotent calls, and reported after the last retry."""
+        limiter = self.rate_limiter(max_retries=2)
+        self.assertTrue(limiter.after_response('GET', FakeResponse(503, {'Retry-After': '0'}), 0))
+        self.assertFalse(limiter.after_response('GET', FakeResponse(503), 2))
+        self.assertFalse(limiter.after_response('POST', FakeResponse(503), 0))
+        self.assertFalse(limiter.after_response('GET', FakeResponse(200), 0))
+        self.assertEqual(limiter.counters['transient_errors'], 2)
+
+    def test_credit_budget_from_headers(self):
+        limiter = self.rate_limiter(credit_reserve=20)
+        limiter.after_response('GET', FakeResponse(200, {'X-RATELIMIT-LIMIT': '1000',
+                                                         'X-RATELIMIT-REMAINING': '201'}), 0)
+        self.assertEqual(limiter.credits_remaining(), 201)
+        limiter.acquire(PRIORITY_LOW)
+
+        # Without a header, the remaining credits are counted down locally
+        limiter.after_response('GET', FakeResponse(200), 0)
+        self.assertEqual(limiter.credits_remaining(), 200)
+        with self.assertRaises(ZohoCreditBudgetExceeded):
+            limiter.acquire(PRIORITY_LOW)
+        limiter.acquire(PRIORITY_HIGH)
+        self.assertEqual(limiter.counters['refused'], 1)
+        self.assertEqual(limiter.counters['requests'], 2)
+
+    def test_credit_budget_configured(self):
+        limiter = self.rate_limiter(daily_credits=10, credit_reserve=50)
+        for _i in range(5):
+            limiter.acquire(PRIORITY_LOW)
+            limiter.after_response('GET', FakeResponse(200), 0)
+        self.assertEqual(limiter.credits_remaining(), 5)
+        with self.assertRaises(ZohoCreditBudgetExceeded):
+            limiter.acquire(PRIORITY_LOW)
+
+    def test_drain_counters(self):
+        limiter = self.rate_limiter()
+        limiter.acquire()
+        self.assertEqual(limiter.drain_counters()['requests'], 1)
+        self.assertEqual(limiter.drain_counters()['requests'], 0)
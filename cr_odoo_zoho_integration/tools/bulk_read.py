@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import csv
+import io
+import tempfile
+import time
+import zipfile
+
+DEFAULT_API_DOMAIN = 'https://www.zohoapis.com'
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class ZohoBulkReadError(Exception):
+    """Raised when a Zoho Bulk Read job cannot be created or fails."""
+
+
+class ZohoBulkRead:
+    """
+    Export a Zoho CRM module through Bulk Read jobs.
+
+    A job is created for the requested fields, polled until Zoho reports it
+    completed, and its zipped CSV result is downloaded to a spooled temporary
+    file. Rows are then parsed one at a time straight out of the archive, so
+    the export is never fully unpacked in memory. A job returns at most
+    200,000 records; further pages are exported by follow-up jobs.
+    """
+
+    def __init__(self, client, api_domain=DEFAULT_API_DOMAIN, poll_interval=5, timeout=3600, priority='high',
+                 metrics=None):
+        """
+        :param client: ZohoClient used for every call
+        :param api_domain: Base URL of the Zoho API, e.g. a local stub server
+        :param poll_interval: Seconds between two job status checks
+        :param timeout: Seconds after which a job that is not completed is given up
+        :param priority: API priority of the calls, see ``ZohoClient.request``
+        :param metrics: Optional ``SyncMetrics`` collecting the calls and downloaded bytes
+        """
+        self.client = client
+        self.api_domain = api_domain.rstrip('/')
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.priority = priority
+        self.metrics = metrics
+
+    def _get(self, path, **kwargs):
+        return self.client.get(self._url(path), priority=self.priority, metrics=self.metrics, **kwargs)
+
+    def _url(self, path):
+        return path if path.startswith('http') else f"{self.api_domain}{path}"
+
+    def create_job(self, module, fields, page=1, criteria=None):
+        """
+        Create a Bulk Read job.
+        :param module: API name of the Zoho module
+        :param fields: Field api names to export
+        :param page: Page of the export, 200,000 records each
+        :param criteria: Optional Bulk Read criteria dictionary
+        :return: Job id
+        """
+        query = {'module': {'api_name': module}, 'fields': list(fields), 'page': page}
+        if criteria:
+            query['criteria'] = criteria
+        response = self.client.post(self._url('/crm/bulk/v7/read'), json={'query': query},
+                                    priority=self.priority, metrics=self.metrics)
+        response.raise_for_status()
+        try:
+            return response.json()['data'][0]['details']['id']
+        except (KeyError, IndexError, ValueError):
+            raise ZohoBulkReadError(f"Unexpected Bulk Read job response: {response.text}")
+
+    def wait_for_job(self, job_id):
+        """
+        Poll a Bulk Read job until it is completed.
+        :param job_id: Job id returned by :meth:`create_job`
+        :return: ``result`` dictionary of the job (download_url, more_records, ...)
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            response = self._get(f'/crm/bulk/v7/read/{job_id}')
+            response.raise_for_status()
+            job = response.json()['data'][0]
+            state = job.get('state')
+            if state == 'COMPLETED':
+                return job.get('result') or {}
+            if state == 'FAILURE':
+                raise ZohoBulkReadError(f"Bulk Read job {job_id} failed: {job}")
+            if time.monotonic() > deadline:
+                raise ZohoBulkReadError(f"Bulk Read job {job_id} did not complete in time (state {state})")
+            time.sleep(self.poll_interval)
+
+    def iter_result_rows(self, download_url):
+        """
+        Download the zipped CSV result of a job and yield its rows as dictionaries.
+        :param download_url: Download URL from the job result
+        :return: Generator of row dictionaries
+        """
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as archive_file:
+            with self._get(download_url, stream=True) as response:
+                response.raise_for_status()
+                chunks = response.iter_content(DOWNLOAD_CHUNK_SIZE)
+                if self.metrics is not None:
+                    chunks = self.metrics.count_bytes(chunks)
+                for chunk in chunks:
+                    archive_file.write(chunk)
+            archive_file.seek(0)
+            with zipfile.ZipFile(archive_file) as archive:
+                for name in archive.namelist():
+                    if not name.lower().endswith('.csv'):
+                        continue
+                    with archive.open(name) as member:
+                        text = io.TextIOWrapper(member, encoding='utf-8-sig', newline='')
+                        yield from csv.DictReader(text)
+
+    def iter_records(self, module, fields, criteria=None):
+        """
+        Export a module and yield its records, creating one job per result page.
+        :param module: API name of the Zoho module
+        :param fields: Field api names to export
+        :param criteria: Optional Bulk Read criteria dictionary
+        :return: Generator of record dictionaries
+        """
+        page = 1
+        while True:
+            job_id = self.create_job(module, fields, page=page, criteria=criteria)
+            result = self.wait_for_job(job_id)
+            if result.get('download_url'):
+                for row in self.iter_result_rows(result['download_url']):
+                    # The CSV export names the record id column "Id"
+                    if 'id' not in row and 'Id' in row:
+                        row['id'] = row.pop('Id')
+                    yield row
+            if not result.get('more_records'):
+                break
+            page += 1
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from datetime import datetime, timezone
+
+
+def _to_char(value):
+    if value in (None, ''):
+        return False
+    return str(value)
+
+
+def _to_integer(value):
+    if value in (None, ''):
+        return 0
+    return int(float(value))
+
+
+def _to_float(value):
+    if value in (None, ''):
+        return 0.0
+    return float(value)
+
+
+def _to_boolean(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def _to_date(value):
+    if not value:
+        return False
+    return str(value)[:10]
+
+
+def _to_datetime(value):
+    if not value:
+        return False
+    moment = datetime.fromisoformat(str(value))
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_lookup_name(value):
+    if isinstance(value, dict):
+        return value.get('name') or False
+    return _to_char(value)
+
+
+def _to_lookup_id(value):
+    if isinstance(value, dict):
+        return value.get('id') or False
+    return _to_char(value)
+
+
+def _to_multiselect(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value) or False
+    return _to_char(value)
+
+
+CONVERTERS = {
+    'char': _to_char,
+    'integer': _to_integer,
+    'float': _to_float,
+    'boolean': _to_boolean,
+    'date': _to_date,
+    'datetime': _to_datetime,
+    'lookup_name': _to_lookup_name,
+    'lookup_id': _to_lookup_id,
+    'multiselect': _to_multiselect,
+}
+
+CONVERTER_SELECTION = [
+    ('char', 'Text'),
+    ('integer', 'Integer'),
+    ('float', 'Decimal'),
+    ('boolean', 'Boolean'),
+    ('date', 'Date'),
+    ('datetime', 'Date Time'),
+    ('lookup_name', 'Lookup Name'),
+    ('lookup_id', 'Lookup ID'),
+    ('multiselect', 'Multi-Select List'),
+]
+
+
+class CompiledMapping:
+    """
+    Field mapping of a Zoho module compiled for one sync run.
+
+    ``zoho_fields`` lists the api names to request from Zoho and
+    :meth:`convert` turns a Zoho record into Odoo values. Converters are
+    resolved once when compiling, so converting a record is a single pass
+    over prebuilt ``(api_name, odoo_field, converter)`` tuples.
+    """
+
+    def __init__(self, rules, extra_fields=()):
+        self.rules = tuple((api_name, odoo_field, CONVERTERS[converter])
+                           for api_name, odoo_field, converter in rules)
+        zoho_fields = []
+        for api_name in [rule[0] for rule in self.rules] + list(extra_fields):
+            if api_name not in zoho_fields:
+                zoho_fields.append(api_name)
+        self.zoho_fields = zoho_fields
+        self.odoo_fields = [rule[1] for rule in self.rules]
+        # Lookups converted to their name: Bulk Read exports only give their id
+        self.lookup_names = [api_name for api_name, _odoo_field, converter in rules if converter == 'lookup_name']
+
+    def convert(self, record):
+        """
+        Convert a Zoho record into a dictionary of Odoo values.
+        :param record: Zoho record dictionary
+        :return: Dictionary of Odoo field values
+        """
+        return {odoo_field: converter(record.get(api_name))
+                for api_name, odoo_field, converter in self.rules}
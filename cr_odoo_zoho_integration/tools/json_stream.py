@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import codecs
+import json
+
+READ_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+
+
+class _ChunkBuffer:
+    """Text buffer refilled from an iterable of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read the next chunk, dropping the consumed text. Return False at the end."""
+        if self.eof:
+            return False
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.text += self._decoder.decode(chunk)
+                return True
+        self.text += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Return the next non blank character without consuming it, '' at the end."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of the JSON stream")
+        self.pos += 1
+
+    def decode_value(self, decoder):
+        """Decode the next complete JSON value, reading more chunks as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number running to the end of the buffer may continue in the next chunk
+            if end < len(self.text) or self.eof:
+                self.pos = end
+                return value
+            self.fill()
+
+
+def iter_array_items(chunks, array_key='data', extra=None):
+    """
+    Incrementally decode a JSON object and yield the items of one of its arrays.
+
+    Only one item and one read chunk are held in memory at a time, instead of
+    the whole response body and its fully decoded object. The other top level
+    values, e.g. Zoho's ``info`` block, are decoded entirely and stored in
+    ``extra`` when they were read.
+    :param chunks: Iterable of byte chunks of a JSON object
+    :param array_key: Top level key of the array to stream
+    :param extra: Optional dictionary receiving the other top level values
+    :return: Generator of the decoded array items
+    """
+    decoder = json.JSONDecoder()
+    buffer = _ChunkBuffer(chunks)
+    if buffer.peek() == '':
+        return
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        key = buffer.decode_value(decoder)
+        buffer.expect(':')
+        if key == array_key and buffer.peek() == '[':
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.decode_value(decoder)
+                    if buffer.peek() == ']':
+                        buffer.pos += 1
+                        break
+                    buffer.expect(',')
+        else:
+            value = buffer.decode_value(decoder)
+            if extra is not None:
+                extra[key] = value
+        if buffer.peek() == '}':
+            return
+        buffer.expect(',')
+
+
+def decode_records_page(chunks, keep_fields=None):
+    """
+    Stream-decode a Zoho CRM records page, keeping only the requested fields.
+
+    Zoho adds its own keys to every record (``$approval``, ``$currency_symbol``,
+    ...); they are dropped as each record is decoded, along with any field not
+    in ``keep_fields``. The record ``id`` is always kept.
+    :param chunks: Byte chunks of the response body, e.g.
+        ``response.iter_content(READ_CHUNK_SIZE)`` of a streamed response
+    :param keep_fields: Iterable of field api names to keep, or None to keep all
+    :return: Tuple (list of records, ``info`` dictionary)
+    """
+    keep = set(keep_fields) | {'id'} if keep_fields is not None else None
+    extra = {}
+    records = []
+    for record in iter_array_items(chunks, 'data', extra):
+        if keep is not None:
+            record = {name: value for name, value in record.items() if name in keep}
+        records.append(record)
+    return records, extra.get('info') or {}
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+# Zoho only serves the first 2,000 records of a module by page number; records
+# beyond that are reached through the page_token returned with every page.
+MAX_PAGE_NUMBER_RECORDS = 2000
+
+
+def _start_position(cursor, field_batches):
+    """Return the page and page tokens a pagination starts from."""
+    cursor = cursor if cursor is not None else {}
+    page_tokens = cursor.get('page_tokens') or [None] * len(field_batches)
+    if len(page_tokens) != len(field_batches):
+        # The field batches changed since the cursor was saved: start over
+        cursor.clear()
+        page_tokens = [None] * len(field_batches)
+    return cursor, cursor.get('page', 1), page_tokens
+
+
+def _advance(cursor, page, page_tokens):
+    """Record in the cursor where the pagination resumes after ``page``."""
+    cursor['page'] = page + 1
+    cursor['page_tokens'] = list(page_tokens)
+
+
+def iter_pages(fetch_page, field_batches, cursor=None):
+    """
+    Fetch every page for each field batch, one request at a time.
+
+    Every field batch follows its own ``next_page_token`` chain, so pagination
+    goes past the 2,000 records reachable by page number.
+    :param fetch_page: Callable ``(fields_batch, page, page_token) -> (records, info)``
+    :param field_batches: List of field batches
+    :param cursor: Optional dictionary holding the ``page`` and ``page_tokens`` to
+        resume from; it is updated before every page is yielded, so it can be
+        saved as a checkpoint once the yielded records are committed
+    :return: Generator of lists holding the records of each field batch of a page
+    """
+    cursor, page, page_tokens = _start_position(cursor, field_batches)
+    while True:
+        more_records = False
+        batch_results = []
+        for index, fields_batch in enumerate(field_batches):
+            records, info = fetch_page(fields_batch, page, page_tokens[index])
+            page_tokens[index] = info.get('next_page_token')
+            batch_results.append(records)
+            more_records = more_records or info.get('more_records', False)
+        _advance(cursor, page, page_tokens)
+        yield batch_results
+        if not more_records:
+            break
+        page += 1
+
+
+def iter_pages_parallel(fetch_page, field_batches, max_workers, per_page=200, cursor=None):
+    """
+    Fetch pages x field batches on a bounded thread pool.
+
+    While pages are addressable by number, a window of pages is requested at
+    once for all field batches, sized so that the pool is kept busy. Past the
+    first 2,000 records, pages can only be reached by following the
+    ``next_page_token`` chain of each field batch, so the field batches of a
+    page are still fetched concurrently but pages follow one another.
+    Results are yielded in page order exactly like :func:`iter_pages`.
+    ``fetch_page`` runs in worker threads and must not use the ORM; only the
+    consumer of this generator touches the cursor.
+    :param fetch_page: Thread-safe callable ``(fields_batch, page, page_token) -> (records, info)``
+    :param field_batches: List of field batches
+    :param max_workers: Number of worker threads
+    :param per_page: Number of records per page
+    :param cursor: Optional resume cursor, see :func:`iter_pages`
+    :return: Generator of lists holding the records of each field batch of a page
+    """
+    window = max(1, math.ceil(max_workers / len(field_batches)))
+    last_numbered_page = max(1, MAX_PAGE_NUMBER_RECORDS // per_page)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='zoho_fetch')
+    cursor, page, page_tokens = _start_position(cursor, field_batches)
+    try:
+        while True:
+            if page <= last_numbered_page:
+                window_pages = range(page, min(page + window, last_numbered_page + 1))
+                futures = [
+                    [executor.submit(fetch_page, fields_batch, window_page, None)
+                     for fields_batch in field_batches]
+                    for window_page in window_pages
+                ]
+            else:
+                futures = [[
+                    executor.submit(fetch_page, fields_batch, page, page_tokens[index])
+                    for index, fields_batch in enumerate(field_batches)
+                ]]
+            for offset, page_futures in enumerate(futures):
+                more_records = False
+                batch_results = []
+                for index, future in enumerate(page_futures):
+                    records, info = future.result()
+                    page_tokens[index] = info.get('next_page_token')
+                    batch_results.append(records)
+                    more_records = more_records or info.get('more_records', False)
+                _advance(cursor, page + offset, page_tokens)
+                yield batch_results
+                if not more_records:
+                    return
+            page += len(futures)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_REQUESTS_PER_MINUTE = 100
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MAX_BACKOFF = 60
+# Share of the daily API credits kept for high priority syncs
+DEFAULT_CREDIT_RESERVE = 20
+BACKOFF_BASE = 1.0
+# Statuses retried with backoff: throttling for every call, transient gateway
+# errors only for idempotent calls
+THROTTLED_STATUSES = (429,)
+TRANSIENT_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+PRIORITY_HIGH = 'high'
+PRIORITY_LOW = 'low'
+
+
+class ZohoRateLimitError(Exception):
+    """
+    Raised when Zoho keeps throttling a call, or asks to wait longer than the
+    client is allowed to sleep. ``retry_at`` is the naive UTC datetime after
+    which the call may be attempted again, when known.
+    """
+
+    def __init__(self, message, retry_at=None):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class ZohoCreditBudgetExceeded(ZohoRateLimitError):
+    """Raised instead of sending a low priority call when API credits run low."""
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_retry_after(value):
+    """Return the seconds to wait from a ``Retry-After`` header, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _parse_ratelimit_reset(value):
+    """
+    Return the seconds to wait from an ``X-RATELIMIT-RESET`` header, or None.
+
+    Zoho sends either an epoch timestamp in milliseconds or a delay; both are
+    accepted.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value > 1e12:
+        return max(0.0, value / 1000 - time.time())
+    if value > 1e9:
+        return max(0.0, value - time.time())
+    return max(0.0, value)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, at most ``capacity``
+    tokens saved up for bursts.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, rate, capacity):
+        with self._lock:
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def reserve(self):
+        """
+        Take one token, going into debt if the bucket is empty.
+        :return: Seconds the caller must wait before using the token
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class ZohoRateLimiter:
+    """
+    Request scheduler of one Zoho organization, shared by every thread of a worker.
+
+    Before each call a token is taken from a token bucket spreading calls over
+    the configured requests per minute. When Zoho throttles a call, every thread
+    pauses until the time announced by ``Retry-After`` or ``X-RATELIMIT-RESET``,
+    or for an exponential backoff with full jitter when Zoho gives none. The
+    remaining daily API credits are tracked from the ``X-RATELIMIT-REMAINING``
+    header, or counted locally against the configured daily limit; low priority
+    calls are refused once they would eat into the reserve kept for high
+    priority syncs.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=1,
+                 max_retries=DEFAULT_MAX_RETRIES, max_backoff=DEFAULT_MAX_BACKOFF,
+                 daily_credits=0, credit_reserve=DEFAULT_CREDIT_RESERVE):
+        self._lock = threading.Lock()
+        self._bucket = TokenBucket(1, 1)
+        self._paused_until = 0.0
+        self._credit_day = None
+        self._credits_used = 0
+        self._credits_remaining = None
+        self._credits_limit = None
+        self._credits_reset_at = None
+        self.counters = dict.fromkeys(
+            ('requests', 'throttled', 'retries', 'transient_errors', 'refused', 'wait_seconds'), 0)
+        self.configure(requests_per_minute, burst, max_retries, max_backoff, daily_credits, credit_reserve)
+
+    def configure(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=1,
+                  max_retries=DEFAULT_MAX_RETRIES, max_backoff=DEFAULT_MAX_BACKOFF,
+                  daily_credits=0, credit_reserve=DEFAULT_CREDIT_RESERVE):
+        """
+        Update the limits in place, keeping the counters and the credit state.
+        :param requests_per_minute: Sustained request rate
+        :param burst: Number of calls that may be sent at once after an idle period
+        :param max_retries: Retries of a throttled call before giving up
+        :param max_backoff: Longest pause, in seconds, the client sleeps through;
+            longer waits raise :class:`ZohoRateLimitError` so the sync can be rescheduled
+        :param daily_credits: API credits available per day, 0 to rely on the
+            ``X-RATELIMIT-LIMIT`` header
+        :param credit_reserve: Percentage of the daily credits reserved for high priority calls
+        """
+        self._bucket.configure(max(requests_per_minute, 1) / 60.0, max(burst, 1))
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.daily_credits = daily_credits
+        self.credit_reserve = credit_reserve
+
+    def _count(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] += value
+
+    def _sleep(self, seconds):
+        if seconds <= 0:
+            return 0.0
+        self._count('wait_seconds', seconds)
+        time.sleep(seconds)
+        return seconds
+
+    # Credits
+
+    def credits_remaining(self):
+        """Remaining daily API credits, or None when unknown."""
+        with self._lock:
+            self._roll_credit_day()
+            if self._credits_remaining is not None:
+                return self._credits_remaining
+            if self.daily_credits:
+                return max(0, self.daily_credits - self._credits_used)
+            return None
+
+    def credits_limit(self):
+        """Daily API credits: the configured limit, else the one reported by Zoho."""
+        return self.daily_credits or self._credits_limit
+
+    def _roll_credit_day(self):
+        today = _utcnow().date()
+        if self._credit_day != today:
+            self._credit_day = today
+            self._credits_used = 0
+            self._credits_remaining = None
+
+    def _check_budget(self, priority):
+        if priority != PRIORITY_LOW:
+            return
+        remaining = self.credits_remaining()
+        limit = self.credits_limit()
+        if remaining is None or not limit:
+            return
+        if remaining <= limit * self.credit_reserve / 100.0:
+            self._count('refused')
+            with self._lock:
+                retry_at = self._credits_reset_at
+            raise ZohoCreditBudgetExceeded(
+                f"Only {remaining} of {limit} Zoho API credits left, which are reserved "
+                f"for high priority syncs", retry_at=retry_at)
+
+    def _record_credits(self, response):
+        headers = response.headers
+        with self._lock:
+            self._roll_credit_day()
+            self._credits_used += 1
+            limit = headers.get('X-RATELIMIT-LIMIT')
+            if limit and limit.isdigit():
+                self._credits_limit = int(limit)
+            remaining = headers.get('X-RATELIMIT-REMAINING')
+            if remaining is not None:
+                try:
+                    self._credits_remaining = int(remaining)
+                except ValueError:
+                    pass
+            elif self._credits_remaining is not None:
+                self._credits_remaining = max(0, self._credits_remaining - 1)
+            reset = _parse_ratelimit_reset(headers.get('X-RATELIMIT-RESET'))
+            if reset is not None:
+                self._credits_reset_at = _utcnow() + timedelta(seconds=reset)
+
+    # Scheduling
+
+    def acquire(self, priority=PRIORITY_HIGH):
+        """
+        Wait until a call may be sent.
+        :param priority: ``high`` or ``low``; low priority calls are refused when
+            the credit budget runs low
+        :return: Seconds spent waiting
+        """
+        self._check_budget(priority)
+        with self._lock:
+            pause = self._paused_until - time.monotonic()
+        waited = self._sleep(pause)
+        waited += self._sleep(self._bucket.reserve())
+        self._count('requests')
+        return waited
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before retrying a throttled call."""
+        headers = response.headers
+        delay = _parse_retry_after(headers.get('Retry-After'))
+        if delay is None and response.status_code == 429:
+            delay = _parse_ratelimit_reset(headers.get('X-RATELIMIT-RESET'))
+        if delay is None:
+            delay = random.uniform(0, min(self.max_backoff, BACKOFF_BASE * 2 ** attempt))
+        else:
+            # Spread the threads that were throttled together
+            delay += random.uniform(0, BACKOFF_BASE)
+        return delay
+
+    def after_response(self, method, response, attempt):
+        """
+        Account for a response and decide whether the call must be retried.
+
+        A throttled call pauses every thread of the organization, not only the
+        caller, since the limit is shared.
+        :param method: HTTP method of the call
+        :param response: ``requests.Response``
+        :param attempt: Number of retries already made for the call
+        :return: True when the call must be sent again
+        :raise ZohoRateLimitError: When a call is still throttled after all
+            retries, or Zoho asks to wait longer than ``max_backoff``
+        """
+        self._record_credits(response)
+        status = response.status_code
+        if status in THROTTLED_STATUSES:
+            self._count('throttled')
+        elif status in TRANSIENT_STATUSES and method.upper() in IDEMPOTENT_METHODS:
+            self._count('transient_errors')
+        else:
+            return False
+
+        if attempt >= self.max_retries and status not in THROTTLED_STATUSES:
+            # Let the caller report the gateway error
+            return False
+        delay = self._retry_delay(response, attempt)
+        retry_at = _utcnow() + timedelta(seconds=delay)
+        if attempt >= self.max_retries:
+            raise ZohoRateLimitError(
+                f"Zoho still answered {status} after {attempt} retries", retry_at=retry_at)
+        if delay > self.max_backoff:
+            raise ZohoRateLimitError(
+                f"Zoho asked to wait {int(delay)}s before the next call", retry_at=retry_at)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._count('retries')
+        return True
+
+    def drain_counters(self):
+        """Return the counters accumulated since the previous drain and reset them."""
+        with self._lock:
+            counters = self.counters
+            self.counters = dict.fromkeys(counters, 0)
+        return counters
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import hashlib
+import json
+
+
+def values_hash(vals, exclude=()):
+    """
+    Return a stable hash of the values prepared from a Zoho record.
+
+    Keys are sorted and values serialized as JSON, so the same Zoho payload
+    mapped the same way always gives the same hash, whatever the order the
+    fields were fetched and merged in. Hashing the prepared values rather than
+    the raw payload also changes the hash when the field mapping changes.
+    :param vals: Dictionary of values of the target model
+    :param exclude: Names of the values left out of the hash, e.g. the hash field
+    :return: Hexadecimal SHA-1 digest
+    """
+    payload = {name: value for name, value in vals.items() if name not in exclude}
+    data = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(data.encode()).hexdigest()
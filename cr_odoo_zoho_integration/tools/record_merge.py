@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+from collections import deque
+
+
+class ZohoRecordMerger:
+    """
+    Fold partial Zoho records coming from several field batches into complete
+    records, keyed by Zoho record id.
+
+    Zoho CRM limits a module request to 50 fields, so wide modules are fetched
+    once per field batch and every batch returns a partial dict for the same
+    record ids. The merger keeps one dict per id and updates it in place,
+    which makes merging linear in the number of partial records.
+
+    When ``batch_count`` is given, a record is complete as soon as it has been
+    seen that many times; complete records can then be handed off with
+    :meth:`pop_complete` so that only in-flight records stay in memory.
+    """
+
+    def __init__(self, batch_count=None):
+        self.batch_count = batch_count
+        self._records = {}
+        self._seen = {}
+        self._complete = deque()
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, records):
+        """
+        Merge a list of (partial) records from one field batch.
+        :param records: List of record dicts as returned by Zoho
+        """
+        merged = self._records
+        seen = self._seen
+        batch_count = self.batch_count
+        for record in records:
+            record_id = record.get('id')
+            existing = merged.get(record_id)
+            if existing is None:
+                merged[record_id] = record
+                count = seen[record_id] = 1
+            else:
+                existing.update(record)
+                count = seen[record_id] = seen[record_id] + 1
+            if batch_count and count == batch_count:
+                self._complete.append(record_id)
+
+    def pop_complete(self):
+        """
+        Yield and forget every record that received all of its field batches.
+        """
+        merged = self._records
+        seen = self._seen
+        complete = self._complete
+        while complete:
+            record_id = complete.popleft()
+            seen.pop(record_id, None)
+            record = merged.pop(record_id, None)
+            if record is not None:
+                yield record
+
+    def drain(self):
+        """
+        Yield and forget every remaining record, complete or not.
+
+        Used at the end of a run, and for records that were missing from one
+        of the field batches (e.g. deleted in Zoho while the sync was running).
+        """
+        self._complete.clear()
+        self._seen.clear()
+        merged, self._records = self._records, {}
+        yield from merged.values()
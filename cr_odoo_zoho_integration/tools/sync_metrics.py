@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Counters collected during a sync run; times are in seconds
+SYNC_METRICS = (
+    'api_calls',
+    'bytes_downloaded',
+    'pages_fetched',
+    'records_fetched',
+    'records_created',
+    'records_updated',
+    'records_unchanged',
+    'records_skipped',
+    'records_archived',
+    'retries',
+    'throttle_wait',
+    'http_time',
+    'orm_time',
+    'transform_time',
+)
+
+
+class SyncMetrics:
+    """
+    Thread-safe counters of one sync run.
+
+    The collector is handed to the page fetchers, which may run in worker
+    threads, and to the Zoho client for every call they make. Times measured
+    in worker threads are summed, so with parallel fetch the HTTP time can
+    exceed the duration of the run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = dict.fromkeys(SYNC_METRICS, 0)
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.values[name] += value
+
+    @contextmanager
+    def timer(self, name):
+        """Add the time spent in the ``with`` block to the ``name`` counter."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def count_bytes(self, chunks):
+        """Pass byte chunks through, adding their size to ``bytes_downloaded``."""
+        for chunk in chunks:
+            self.add('bytes_downloaded', len(chunk))
+            yield chunk
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Tokens are refreshed this long before they expire, so no call is ever made
+# with a token that expires in flight.
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def is_token_fresh(token, expiry):
+    """Whether a token can still be used without refreshing it first."""
+    return bool(token and expiry and expiry - _utcnow() > REFRESH_MARGIN)
+
+
+class TokenCache:
+    """
+    In-memory cache of OAuth access tokens, shared by all threads of a worker.
+
+    Tokens are served from memory until shortly before they expire. Loading a
+    token is serialized per key, so threads that find the token stale at the
+    same time trigger a single load; the loader itself is responsible for
+    serializing refreshes across worker processes.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, loader, force=False, stale_token=None):
+        """
+        Return a valid access token for ``key``.
+        :param key: Hashable identifying the token, e.g. ``(dbname, config_id)``
+        :param loader: Callable ``(stale_token) -> (token, expiry)`` returning a fresh
+            token, with ``expiry`` a naive UTC datetime
+        :param force: Load a new token even if the cached one looks valid, e.g.
+            after Zoho rejected it
+        :param stale_token: The token that was rejected, when forcing
+        :return: Access token
+        """
+        entry = self._tokens.get(key)
+        if entry and not force and is_token_fresh(*entry):
+            return entry[0]
+        with self._key_lock(key):
+            entry = self._tokens.get(key)
+            if entry and is_token_fresh(*entry) and (not force or entry[0] != stale_token):
+                # Another thread loaded a new token while this one was waiting
+                return entry[0]
+            token, expiry = loader(stale_token if force else None)
+            self._tokens[key] = (token, expiry)
+            return token
+
+    def store(self, key, token, expiry):
+        """Cache a token obtained outside of :meth:`get`, e.g. from a grant token."""
+        self._tokens[key] = (token, expiry)
+
+    def invalidate(self, key):
+        """Forget the cached token of ``key``."""
+        self._tokens.pop(key, None)
+
+
+token_cache = TokenCache()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Part of Creyox Technologies.
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import PRIORITY_HIGH, ZohoRateLimiter
+
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_CONCURRENCY = 5
+
+_clients = {}
+_rate_limiters = {}
+_clients_lock = threading.Lock()
+
+
+class ZohoClient:
+    """
+    Thin HTTP client shared by every Zoho call of one configuration.
+
+    The client owns a keep-alive ``requests.Session`` with a connection pool,
+    so consecutive calls reuse the same TCP/TLS connection instead of paying
+    a handshake per request. Responses are requested gzip compressed and
+    every call gets the configured (connect, read) timeout.
+
+    The client is safe to share between threads; the number of calls in
+    flight is capped by ``max_concurrency`` to stay under the per-org
+    concurrent call limit of Zoho. The cap is a semaphore of the process:
+    it only bounds the threads of one worker. Prefork workers each have
+    their own client and cap, so up to ``max_concurrency`` times the number
+    of workers may be in flight; calls over Zoho's limit are answered with
+    429 and retried by the rate limiter.
+
+    Authenticated calls take their access token from ``token_provider``, a
+    callable ``(force=False, stale_token=None) -> token``. When Zoho answers
+    401, the provider is asked once for a new token and the call is retried.
+
+    Every call goes through the ``rate_limiter`` of the organization, which
+    spaces calls out, retries throttled ones and refuses low priority calls
+    when the API credits run low.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, rate_limiter=None):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or ZohoRateLimiter(burst=max_concurrency)
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self.access_token = None
+        self.token_provider = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+        })
+
+    def request(self, method, url, headers=None, authenticate=True, priority=PRIORITY_HIGH,
+                metrics=None, **kwargs):
+        """
+        Send a request through the pooled session.
+        :param method: HTTP method
+        :param url: Absolute URL of the endpoint
+        :param headers: Extra request headers
+        :param authenticate: Add the ``Zoho-oauthtoken`` authorization header
+        :param priority: ``high`` or ``low``; low priority calls are refused with
+            ``ZohoCreditBudgetExceeded`` when the API credits run low
+        :param metrics: Optional ``SyncMetrics`` counting the calls, retries and
+            throttling waits of a sync run
+        :return: ``requests.Response``
+        """
+        headers = dict(headers or {})
+        kwargs.setdefault('timeout', self.timeout)
+        if not authenticate:
+            return self._send(method, url, headers, kwargs, priority, metrics)
+
+        token = self.token_provider() if self.token_provider else self.access_token
+        headers['Authorization'] = f"Zoho-oauthtoken {token}"
+        response = self._send(method, url, headers, kwargs, priority, metrics)
+        if response.status_code == 401 and self.token_provider:
+            # The token was revoked or expired early: refresh it and retry once
+            response.close()
+            token = self.token_provider(force=True, stale_token=token)
+            headers['Authorization'] = f"Zoho-oauthtoken {token}"
+            response = self._send(method, url, headers, kwargs, priority, metrics)
+        return response
+
+    def _send(self, method, url, headers, kwargs, priority=PRIORITY_HIGH, metrics=None):
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire(priority)
+            with self._slots:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            if metrics is not None:
+                metrics.add('api_calls')
+                metrics.add('throttle_wait', waited)
+            if not self.rate_limiter.after_response(method, response, attempt):
+                return response
+            # Throttled: free the connection, the limiter already paused the org
+            response.close()
+            attempt += 1
+            if metrics is not None:
+                metrics.add('retries')
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def get_zoho_client(key, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE,
+                    max_concurrency=DEFAULT_MAX_CONCURRENCY, rate_limit=None):
+    """
+    Return the process-wide client registered under ``key``.
+
+    A new client is built when none exists yet or when the connection
+    settings changed since it was created. The rate limiter of the key
+    outlives client rebuilds, so its counters and credit state are kept.
+    :param key: Hashable identifying the configuration, e.g. ``(dbname, config_id)``
+    :param timeout: ``(connect, read)`` timeout in seconds
+    :param pool_size: Maximum number of pooled connections
+    :param max_concurrency: Maximum number of calls in flight at once
+    :param rate_limit: Keyword arguments of ``ZohoRateLimiter.configure``
+    :return: ``ZohoClient``
+    """
+    settings = (timeout, pool_size, max_concurrency)
+    with _clients_lock:
+        rate_limiter = _rate_limiters.get(key)
+        if rate_limiter is None:
+            rate_limiter = _rate_limiters[key] = ZohoRateLimiter(burst=max_concurrency)
+        if rate_limit:
+            rate_limiter.configure(**rate_limit)
+        client = _clients.get(key)
+        if client is None or (client.timeout, client.pool_size, client.max_concurrency) != settings:
+            if client is not None:
+                client.close()
+            client = _clients[key] = ZohoClient(timeout=timeout, pool_size=pool_size,
+                                                max_concurrency=max_concurrency,
+                                                rate_limiter=rate_limiter)
+        return client
+
+
+def drain_rate_limiter_stats(key):
+    """
+    Return the rate limiter counters of ``key`` in this worker since the previous
+    drain, resetting them, with the credits remaining it last saw.
+
+    Counters only cover the calls of this process: callers add them to a store
+    shared by every worker, such as the database.
+    :param key: Key the client was registered under
+    :return: Dictionary of counters, empty when no call was made yet
+    """
+    rate_limiter = _rate_limiters.get(key)
+    if not rate_limiter:
+        return {}
+    stats = rate_limiter.drain_counters()
+    stats['credits_remaining'] = rate_limiter.credits_remaining()
+    return stats